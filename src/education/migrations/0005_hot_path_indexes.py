@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-18 14:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('education', '0004_remove_subject_status'),
+        ('groups', '0008_hot_path_indexes'),
+        ('users', '0002_person_search_tokens'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='homework',
+            index=models.Index(fields=['assigned_to', 'due_date'], name='education_hw_group_due_idx'),
+        ),
+    ]
@@ -17,6 +17,12 @@ class Homework(models.Model):
     description = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Pending/recent homework of a group
+            models.Index(fields=['assigned_to', 'due_date'], name='education_hw_group_due_idx'),
+        ]
+
     def __str__(self):
         return f"{self.title} - {self.subject}"
 
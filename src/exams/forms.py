@@ -15,7 +15,7 @@ class ExamResultFilterForm(forms.Form):
         })
     )
     group = forms.ModelChoiceField(
-        queryset=Group.objects.all(),
+        queryset=Group.objects.select_related('subject'),
         required=False,
         empty_label="All Groups",
         widget=forms.Select(attrs={
@@ -24,7 +24,7 @@ class ExamResultFilterForm(forms.Form):
         })
     )
     exam = forms.ModelChoiceField(
-        queryset=Exam.objects.all(),
+        queryset=Exam.objects.select_related('subject'),
         required=False,
         empty_label="All Exams",
         widget=forms.Select(attrs={
@@ -33,7 +33,7 @@ class ExamResultFilterForm(forms.Form):
         })
     )
     student = forms.ModelChoiceField(
-        queryset=Student.objects.all(),
+        queryset=Student.objects.select_related('user'),
         required=False,
         empty_label="All Students",
         widget=forms.Select(attrs={
@@ -109,7 +109,7 @@ class ExamResultFilterForm(forms.Form):
         })
     )
     group = forms.ModelChoiceField(
-        queryset=Group.objects.all(),
+        queryset=Group.objects.select_related('subject'),
         required=False,
         empty_label="All Groups",
         widget=forms.Select(attrs={
@@ -117,7 +117,7 @@ class ExamResultFilterForm(forms.Form):
         })
     )
     exam = forms.ModelChoiceField(
-        queryset=Exam.objects.all(),
+        queryset=Exam.objects.select_related('subject'),
         required=False,
         empty_label="All Exams",
         widget=forms.Select(attrs={
@@ -125,7 +125,7 @@ class ExamResultFilterForm(forms.Form):
         })
     )
     student = forms.ModelChoiceField(
-        queryset=Student.objects.all(),
+        queryset=Student.objects.select_related('user'),
         required=False,
         empty_label="All Students",
         widget=forms.Select(attrs={
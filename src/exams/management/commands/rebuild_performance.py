@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from exams.rollups import rebuild_performance
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-student and per-group subject performance rollups from the raw Result table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per insert batch')
+
+    def handle(self, *args, **options):
+        student_count, group_count = rebuild_performance(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {student_count} student and {group_count} group subject performance rows"
+        ))
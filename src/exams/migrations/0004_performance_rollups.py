@@ -0,0 +1,68 @@
+# Generated by Django 5.2.6 on 2026-10-18 14:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from exams.rollups import aggregate_performance
+
+
+def backfill_performance(apps, schema_editor):
+    Result = apps.get_model('exams', 'Result')
+    for model_name, key_fields, result_fields in (
+        ('StudentSubjectPerformance', ('student_id', 'subject_id'), ('student_id', 'exam__subject_id')),
+        ('GroupSubjectPerformance', ('group_id', 'subject_id'), ('exam__group_id', 'exam__subject_id')),
+    ):
+        model = apps.get_model('exams', model_name)
+        model.objects.bulk_create(
+            (model(**dict(zip(key_fields, key)), **counters) for key, counters in
+             aggregate_performance(Result.objects.all(), result_fields).items()),
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('education', '0004_remove_subject_status'),
+        ('exams', '0003_initial'),
+        ('groups', '0007_attendance_rollups'),
+        ('users', '0002_person_search_tokens'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupSubjectPerformance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('result_count', models.PositiveIntegerField(default=0)),
+                ('percentage_sum', models.FloatField(default=0)),
+                ('passed_count', models.PositiveIntegerField(default=0)),
+                ('best_percentage', models.FloatField(default=0)),
+                ('latest_percentage', models.FloatField(default=0)),
+                ('latest_exam_date', models.DateTimeField(blank=True, null=True)),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subject_performance', to='groups.group')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='group_performance', to='education.subject')),
+            ],
+            options={
+                'unique_together': {('group', 'subject')},
+            },
+        ),
+        migrations.CreateModel(
+            name='StudentSubjectPerformance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('result_count', models.PositiveIntegerField(default=0)),
+                ('percentage_sum', models.FloatField(default=0)),
+                ('passed_count', models.PositiveIntegerField(default=0)),
+                ('best_percentage', models.FloatField(default=0)),
+                ('latest_percentage', models.FloatField(default=0)),
+                ('latest_exam_date', models.DateTimeField(blank=True, null=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subject_performance', to='users.student')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='student_performance', to='education.subject')),
+            ],
+            options={
+                'unique_together': {('student', 'subject')},
+            },
+        ),
+        migrations.RunPython(backfill_performance, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-18 14:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('education', '0005_hot_path_indexes'),
+        ('exams', '0004_performance_rollups'),
+        ('groups', '0008_hot_path_indexes'),
+        ('users', '0002_person_search_tokens'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='exam',
+            index=models.Index(fields=['group', 'date'], name='exams_exam_group_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['student', 'exam'], name='exams_result_student_exam_idx'),
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 
 class Exam(models.Model):
     name = models.CharField(max_length=200)
@@ -7,6 +7,17 @@ class Exam(models.Model):
     date = models.DateTimeField()
     max_score = models.PositiveIntegerField()
 
+    class Meta:
+        indexes = [
+            # Upcoming/completed exams of a group
+            models.Index(fields=['group', 'date'], name='exams_exam_group_date_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # A new max_score/subject/group/date refreshes the performance rollups (signals) in the same transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.name} - {self.subject}"
 
@@ -18,6 +29,15 @@ class Result(models.Model):
 
     class Meta:
         unique_together = ['exam', 'student']
+        indexes = [
+            # A student's results; the unique index leads with exam
+            models.Index(fields=['student', 'exam'], name='exams_result_student_exam_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Keep the performance rollups (updated by signals) in the same transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.student} - {self.exam}: {self.score}"
@@ -26,4 +46,46 @@ class Result(models.Model):
     def percentage(self):
         if self.exam.max_score > 0:
             return (self.score / self.exam.max_score) * 100
-        return 0
\ No newline at end of file
+        return 0
+
+
+class PerformanceCounters(models.Model):
+    """Exam result aggregates shared by the performance rollups; percentages are 0-100."""
+    result_count = models.PositiveIntegerField(default=0)
+    percentage_sum = models.FloatField(default=0)
+    passed_count = models.PositiveIntegerField(default=0)
+    best_percentage = models.FloatField(default=0)
+    # Average over the results of the most recent exam (one result for a student)
+    latest_percentage = models.FloatField(default=0)
+    latest_exam_date = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def average_percentage(self):
+        return self.percentage_sum / self.result_count if self.result_count else 0
+
+
+class StudentSubjectPerformance(PerformanceCounters):
+    """Exam performance of one student in one subject, kept in sync with Result."""
+    student = models.ForeignKey('users.Student', on_delete=models.CASCADE, related_name='subject_performance')
+    subject = models.ForeignKey('education.Subject', on_delete=models.CASCADE, related_name='student_performance')
+
+    class Meta:
+        unique_together = ['student', 'subject']
+
+    def __str__(self):
+        return f"{self.student} - {self.subject}"
+
+
+class GroupSubjectPerformance(PerformanceCounters):
+    """Exam performance of one group in one subject, kept in sync with Result."""
+    group = models.ForeignKey('groups.Group', on_delete=models.CASCADE, related_name='subject_performance')
+    subject = models.ForeignKey('education.Subject', on_delete=models.CASCADE, related_name='group_performance')
+
+    class Meta:
+        unique_together = ['group', 'subject']
+
+    def __str__(self):
+        return f"{self.group} - {self.subject}"
@@ -0,0 +1,163 @@
+"""Per-student and per-group exam performance by subject.
+
+``StudentSubjectPerformance`` and ``GroupSubjectPerformance`` hold the
+result count, percentage sum, pass count, best and latest percentage for
+each (student, subject) and (group, subject). Writers of Result or Exam rows
+refresh just the keys they touched, inside their own transaction, so the
+dashboards read a handful of precomputed rows instead of scanning Result.
+
+A refresh recomputes the touched keys from their results rather than
+applying deltas: best and latest cannot be "un-applied" when a result is
+deleted or an exam's ``max_score`` changes, and a key only has as many rows
+as exams in that subject.
+"""
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+
+from .models import Exam, GroupSubjectPerformance, Result, StudentSubjectPerformance
+from .stats import passed, percentage
+
+COUNTER_FIELDS = (
+    'result_count', 'percentage_sum', 'passed_count', 'best_percentage', 'latest_percentage', 'latest_exam_date',
+)
+
+# rollup model -> (its key fields, the same keys seen from Result)
+ROLLUPS = {
+    StudentSubjectPerformance: (('student_id', 'subject_id'), ('student_id', 'exam__subject_id')),
+    GroupSubjectPerformance: (('group_id', 'subject_id'), ('exam__group_id', 'exam__subject_id')),
+}
+
+
+def aggregate_performance(results, key_fields):
+    """``{key: counters}`` for a Result queryset grouped by ``key_fields``.
+
+    The database groups by key and exam; the per-exam rows are folded here so
+    the latest exam's average can be picked without a correlated subquery.
+    """
+    pct = percentage()
+    rows = results.order_by().values(*key_fields, 'exam_id', 'exam__date').annotate(
+        n=Count('id'),
+        pct_sum=Sum(pct),
+        passes=Count('id', filter=passed()),
+        best=Max(pct),
+    )
+    totals = {}
+    for row in rows.iterator(chunk_size=2000):
+        key = tuple(row[field] for field in key_fields)
+        counters = totals.get(key)
+        if counters is None:
+            counters = totals[key] = dict.fromkeys(COUNTER_FIELDS, 0)
+            counters['latest_exam_date'] = None
+        counters['result_count'] += row['n']
+        counters['percentage_sum'] += row['pct_sum']
+        counters['passed_count'] += row['passes']
+        counters['best_percentage'] = max(counters['best_percentage'], row['best'])
+        if counters['latest_exam_date'] is None or row['exam__date'] > counters['latest_exam_date']:
+            counters['latest_exam_date'] = row['exam__date']
+            counters['latest_percentage'] = row['pct_sum'] / row['n']
+    return totals
+
+
+def refresh_performance(student_keys=(), group_keys=()):
+    """Recompute the (student_id, subject_id) and (group_id, subject_id) rows given.
+
+    Keys left without results lose their row. Callers writing Result rows or
+    changing an exam should run this inside the same transaction as the write.
+    """
+    with transaction.atomic(savepoint=False):
+        _refresh(StudentSubjectPerformance, set(student_keys))
+        _refresh(GroupSubjectPerformance, set(group_keys))
+
+
+def refresh_exam_performance(exams, student_ids):
+    """Refresh every key that results of ``student_ids`` in ``exams`` count towards.
+
+    ``exams`` are Exam objects or ``(subject_id, group_id)`` pairs.
+    """
+    pairs = {
+        (exam.subject_id, exam.group_id) if isinstance(exam, Exam) else tuple(exam)
+        for exam in exams
+    }
+    student_ids = set(student_ids)
+    refresh_performance(
+        student_keys=[(student_id, subject_id) for student_id in student_ids for subject_id, _ in pairs],
+        group_keys=[(group_id, subject_id) for subject_id, group_id in pairs],
+    )
+
+
+def _refresh(model, keys, batch_size=200):
+    if not keys:
+        return
+    key_fields, result_fields = ROLLUPS[model]
+    # Filtering by each column is a superset of the keys; extra keys are dropped
+    results = Result.objects.filter(**{
+        f'{field}__in': {key[i] for key in keys} for i, field in enumerate(result_fields)
+    })
+    totals = {key: counters for key, counters in aggregate_performance(results, result_fields).items() if key in keys}
+
+    if totals:
+        model.objects.bulk_create(
+            [model(**dict(zip(key_fields, key)), **counters) for key, counters in totals.items()],
+            update_conflicts=True,
+            unique_fields=[field[:-len('_id')] for field in key_fields],
+            update_fields=COUNTER_FIELDS,
+        )
+
+    gone = sorted(keys - totals.keys())
+    for start in range(0, len(gone), batch_size):
+        condition = Q()
+        for key in gone[start:start + batch_size]:
+            condition |= Q(**dict(zip(key_fields, key)))
+        model.objects.filter(condition).delete()
+
+
+def rebuild_performance(batch_size=1000):
+    """Recompute both performance rollups from the raw Result table.
+
+    Returns the number of student and group rows written.
+    """
+    written = []
+    with transaction.atomic():
+        for model, (key_fields, result_fields) in ROLLUPS.items():
+            model.objects.all().delete()
+            rows = iter(aggregate_performance(Result.objects.all(), result_fields).items())
+            count = 0
+            while True:
+                batch = [model(**dict(zip(key_fields, key)), **counters) for key, counters in islice(rows, batch_size)]
+                if not batch:
+                    break
+                model.objects.bulk_create(batch)
+                count += len(batch)
+            written.append(count)
+    return tuple(written)
+
+
+def performance_totals(queryset):
+    """Sum a performance rollup queryset into ``{'results', 'passed', 'average'}``."""
+    sums = queryset.aggregate(results=Sum('result_count'), passed=Sum('passed_count'), pct=Sum('percentage_sum'))
+    results = sums['results'] or 0
+    return {
+        'results': results,
+        'passed': sums['passed'] or 0,
+        'average': sums['pct'] / results if results else 0,
+    }
+
+
+def student_breakdown(student_id):
+    """:func:`exams.stats.subject_breakdown` rows for all results of a student, read from the rollup."""
+    rows = [
+        {
+            'exam__subject_id': row.subject_id,
+            'exam__subject__name': row.subject.name,
+            'results': row.result_count,
+            'passed': row.passed_count,
+            'avg_percentage': row.average_percentage,
+        }
+        for row in StudentSubjectPerformance.objects.filter(
+            student_id=student_id, result_count__gt=0,
+        ).select_related('subject')
+    ]
+    rows.sort(key=lambda row: (-row['avg_percentage'], row['exam__subject__name'], row['exam__subject_id']))
+    return rows
@@ -0,0 +1,82 @@
+from django.db import transaction
+
+from users.models import Student
+from users.snapshots import invalidate_dashboards
+from .models import Result
+from .rollups import refresh_exam_performance
+
+
+def _student_name(first_name, last_name, username):
+    return f"{first_name} {last_name}".strip() or username
+
+
+def parse_result_sheet(exam, data, roster):
+    """Validate the ``score_<id>``/``remarks_<id>`` pairs of a gradebook form.
+
+    ``roster`` maps student id -> display name for the exam's group. Returns
+    ``(rows, errors)`` where ``rows`` maps student id -> ``(score, remarks)``
+    and ``errors`` lists one message per bad row; every row is checked so the
+    teacher sees all problems at once.
+    """
+    rows = {}
+    errors = []
+    for key in data:
+        if not key.startswith('score_'):
+            continue
+        raw_id = key[len('score_'):]
+        try:
+            student_id = int(raw_id)
+        except ValueError:
+            errors.append(f'Unknown student "{raw_id}"')
+            continue
+        if student_id not in roster:
+            errors.append(f'Student #{student_id} is not in group {exam.group.name}')
+            continue
+
+        name = roster[student_id]
+        value = data.get(key, '').strip()
+        try:
+            score = int(value) if value else 0
+        except ValueError:
+            errors.append(f'{name}: "{value}" is not a whole number')
+            continue
+        if score < 0:
+            errors.append(f'{name}: score cannot be negative')
+        elif score > exam.max_score:
+            errors.append(f'{name}: score {score} exceeds maximum score {exam.max_score}')
+        else:
+            rows[student_id] = (score, data.get(f'remarks_{student_id}', '').strip())
+    return rows, errors
+
+
+def save_result_sheet(exam, data):
+    """Validate and save a whole gradebook form for ``exam``.
+
+    Nothing is written unless every row is valid; otherwise all results are
+    upserted with a single ``INSERT ... ON CONFLICT DO UPDATE`` in one
+    transaction. Returns ``(saved_count, errors)``.
+    """
+    roster = {
+        student_id: _student_name(*names)
+        for student_id, *names in Student.objects.filter(
+            groupmembership__group_id=exam.group_id
+        ).values_list('id', 'user__first_name', 'user__last_name', 'user__username')
+    }
+    rows, errors = parse_result_sheet(exam, data, roster)
+    if errors or not rows:
+        return 0, errors
+
+    with transaction.atomic():
+        Result.objects.bulk_create(
+            [
+                Result(exam=exam, student_id=student_id, score=score, remarks=remarks)
+                for student_id, (score, remarks) in rows.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['exam', 'student'],
+            update_fields=['score', 'remarks'],
+        )
+        # bulk_create skips the Result signals
+        refresh_exam_performance([exam], rows)
+        invalidate_dashboards(teacher_ids=[exam.group.teacher_id], student_ids=rows)
+    return len(rows), []
@@ -0,0 +1,79 @@
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from .models import Exam, Result
+from .rollups import refresh_exam_performance
+
+# Exam fields that change what its results count towards
+_EXAM_FIELDS = ('subject_id', 'group_id', 'max_score', 'date')
+
+
+def _exam_pairs(*exam_ids):
+    return Exam.objects.filter(pk__in=exam_ids).values_list('subject_id', 'group_id')
+
+
+@receiver(pre_save, sender=Result)
+def remember_previous_result(sender, instance, raw=False, **kwargs):
+    instance._rollup_previous = None
+    if instance.pk and not raw:
+        instance._rollup_previous = Result.objects.filter(pk=instance.pk).values_list(
+            'student_id', 'exam_id'
+        ).first()
+
+
+@receiver(post_save, sender=Result)
+def update_performance_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_rollup_previous', None)
+    if previous and previous != (instance.student_id, instance.exam_id):
+        refresh_exam_performance(_exam_pairs(previous[1]), [previous[0]])
+    refresh_exam_performance(_exam_pairs(instance.exam_id), [instance.student_id])
+
+
+def _deleted_with_exam(origin):
+    """Whether a delete started from an Exam (or an Exam queryset) and cascades to its results."""
+    return isinstance(origin, Exam) or getattr(origin, 'model', None) is Exam
+
+
+@receiver(post_delete, sender=Result)
+def update_performance_on_delete(sender, instance, origin=None, **kwargs):
+    # The exam's post_delete refreshes all of its results at once
+    if _deleted_with_exam(origin):
+        return
+    refresh_exam_performance(_exam_pairs(instance.exam_id), [instance.student_id])
+
+
+@receiver(pre_delete, sender=Exam)
+def remember_exam_results(sender, instance, **kwargs):
+    # The results are gone by post_delete
+    instance._rollup_students = list(Result.objects.filter(exam=instance).values_list('student_id', flat=True))
+
+
+@receiver(post_delete, sender=Exam)
+def update_performance_on_exam_delete(sender, instance, **kwargs):
+    # Once for all of the exam's results, still inside the delete's transaction
+    student_ids = getattr(instance, '_rollup_students', None)
+    if student_ids:
+        refresh_exam_performance([(instance.subject_id, instance.group_id)], student_ids)
+
+
+@receiver(pre_save, sender=Exam)
+def remember_previous_exam(sender, instance, raw=False, **kwargs):
+    instance._rollup_previous = None
+    if instance.pk and not raw:
+        instance._rollup_previous = Exam.objects.filter(pk=instance.pk).values(*_EXAM_FIELDS).first()
+
+
+@receiver(post_save, sender=Exam)
+def update_performance_on_exam_change(sender, instance, raw=False, created=False, **kwargs):
+    previous = getattr(instance, '_rollup_previous', None)
+    if raw or created or not previous:
+        return
+    if all(previous[field] == getattr(instance, field) for field in _EXAM_FIELDS):
+        return
+    student_ids = Result.objects.filter(exam=instance).values_list('student_id', flat=True)
+    refresh_exam_performance(
+        [(previous['subject_id'], previous['group_id']), instance],
+        student_ids,
+    )
@@ -0,0 +1,77 @@
+"""Score percentages and pass counts computed in the database.
+
+``score * 100 / max_score`` is an annotation, so lists can be filtered and
+grouped by it in SQL instead of loading every result into Python.
+"""
+from django.db.models import Avg, Case, Count, F, FloatField, Q, Value, When
+from django.db.models.functions import Cast
+
+PASS_PERCENTAGE = 50
+
+
+def percentage(score='score', max_score='exam__max_score'):
+    """Expression for ``score`` as a percentage of ``max_score`` (0 when the maximum is 0)."""
+    return Case(
+        When(**{f'{max_score}__gt': 0}, then=Cast(score, FloatField()) * 100 / F(max_score)),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+
+def passed(score='score', max_score='exam__max_score'):
+    """``Q`` for scores at or above the pass mark."""
+    return Q(**{f'{max_score}__gt': 0, f'{score}__gte': F(max_score) * (PASS_PERCENTAGE / 100)})
+
+
+def with_percentage(results):
+    """Annotate a Result queryset with ``score_percentage``."""
+    return results.annotate(score_percentage=percentage())
+
+
+def filter_status(results, status):
+    """Keep ``'passed'`` or ``'failed'`` results of a :func:`with_percentage` queryset."""
+    if status == 'passed':
+        return results.filter(score_percentage__gte=PASS_PERCENTAGE)
+    if status == 'failed':
+        return results.filter(score_percentage__lt=PASS_PERCENTAGE)
+    return results
+
+
+def subject_breakdown(results):
+    """One row per subject of ``results``: id, name, result count, passes and average percentage.
+
+    Grouped by subject id, so two subjects with the same name stay apart.
+    Best average first.
+    """
+    return list(
+        results.order_by()
+        .values('exam__subject_id', 'exam__subject__name')
+        .annotate(
+            results=Count('id'),
+            passed=Count('id', filter=Q(score_percentage__gte=PASS_PERCENTAGE)),
+            avg_percentage=Avg('score_percentage'),
+        )
+        .order_by('-avg_percentage', 'exam__subject__name', 'exam__subject_id')
+    )
+
+
+def exam_overview(exams):
+    """Annotate an Exam queryset with its result count, passes, average score and average percentage.
+
+    All four come from one join with ``Result`` grouped by exam, so a page of
+    exams is a single query however many results each exam has.
+    """
+    return exams.annotate(
+        result_count=Count('result'),
+        passed_count=Count('result', filter=passed('result__score', 'max_score')),
+        avg_score=Avg('result__score'),
+        avg_percentage=Avg(percentage('result__score', 'max_score')),
+    )
+
+
+def exam_counts(exams, now):
+    """``{'upcoming': n, 'completed': n}`` for ``exams`` in one query."""
+    return exams.order_by().aggregate(
+        upcoming=Count('id', filter=Q(date__gt=now)),
+        completed=Count('id', filter=Q(date__lte=now)),
+    )
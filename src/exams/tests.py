@@ -1,3 +1,285 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from education.models import Subject
+from groups.models import Group, GroupMembership
+from users.models import User, Teacher, Student
+from .models import Exam, Result, StudentSubjectPerformance, GroupSubjectPerformance
+from .rollups import rebuild_performance, refresh_exam_performance
+from .services import save_result_sheet
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class ExamTestMixin:
+    @classmethod
+    def setUpTestData(cls):
+        teacher_user = User.objects.create_user(
+            username='teacher', password='pass', role='teacher', first_name='Olim', last_name='Karimov'
+        )
+        cls.teacher = Teacher.objects.create(user=teacher_user)
+        cls.subject = Subject.objects.create(name='Math', code='M1')
+        cls.group = Group.objects.create(name='Math A', subject=cls.subject, teacher=cls.teacher, schedule={})
+        cls.students = []
+        for i in range(3):
+            student = Student.objects.create(
+                user=User.objects.create_user(username=f'student{i}', password='pass', role='student')
+            )
+            GroupMembership.objects.create(student=student, group=cls.group)
+            cls.students.append(student)
+        cls.exam = Exam.objects.create(
+            name='Midterm', subject=cls.subject, group=cls.group, date=timezone.now(), max_score=50
+        )
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ResultSheetTests(ExamTestMixin, TestCase):
+    def sheet(self, scores):
+        data = {}
+        for student_id, score in scores.items():
+            data[f'score_{student_id}'] = score
+            data[f'remarks_{student_id}'] = f'note {score}'
+        return data
+
+    def test_sheet_is_upserted_in_fixed_queries(self):
+        Result.objects.create(exam=self.exam, student=self.students[0], score=10)
+        data = self.sheet({student.id: str(40 + i) for i, student in enumerate(self.students)})
+
+        # roster, savepoint, upsert, then per rollup an aggregate and an upsert, release
+        with self.assertNumQueries(8):
+            saved, errors = save_result_sheet(self.exam, data)
+
+        self.assertEqual((saved, errors), (3, []))
+        self.assertEqual(
+            sorted(Result.objects.values_list('student_id', 'score', 'remarks')),
+            [(student.id, 40 + i, f'note {40 + i}') for i, student in enumerate(self.students)],
+        )
+
+    def test_any_bad_row_saves_nothing_and_reports_all(self):
+        outsider = Student.objects.create(
+            user=User.objects.create_user(username='outsider', password='pass', role='student')
+        )
+        data = self.sheet({
+            self.students[0].id: '45',
+            self.students[1].id: '51',
+            self.students[2].id: 'abc',
+            outsider.id: '10',
+        })
+
+        saved, errors = save_result_sheet(self.exam, data)
+
+        self.assertEqual(saved, 0)
+        self.assertEqual(len(errors), 3)
+        self.assertIn('student1: score 51 exceeds maximum score 50', errors)
+        self.assertFalse(Result.objects.exists())
+
+    def test_view_redirects_with_messages(self):
+        self.client.force_login(self.teacher.user)
+        url = f'/exams/teacher/exams/{self.exam.id}/results/save/'
+        response = self.client.post(url, self.sheet({self.students[0].id: '60'}), follow=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Result.objects.exists())
+
+        response = self.client.post(url, self.sheet({self.students[0].id: '30'}), follow=True)
+        self.assertEqual(Result.objects.get().score, 30)
+        self.assertIn('saved successfully', ' '.join(str(m) for m in response.context['messages']))
+
+
+class StudentExamResultsTests(ExamTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.student = cls.students[0]
+        # Same name, different subject: must not be merged (or crash a .get(name=...))
+        cls.other_math = Subject.objects.create(name='Math', code='M2')
+        Result.objects.create(exam=cls.exam, student=cls.student, score=40)  # 80%
+        cls.add_exam(cls.subject, 100, 30)    # 30%
+        cls.add_exam(cls.other_math, 20, 19)  # 95%
+
+    @classmethod
+    def add_exam(cls, subject, max_score, score):
+        exam = Exam.objects.create(
+            name='Quiz', subject=subject, group=cls.group, date=timezone.now(), max_score=max_score
+        )
+        Result.objects.create(exam=exam, student=cls.student, score=score)
+
+    def get(self, **params):
+        self.client.force_login(self.student.user)
+        return self.client.get(reverse('exams:student_exam_results'), params)
+
+    def test_stats_are_grouped_by_subject_id(self):
+        response = self.get()
+
+        stats = response.context['stats']
+        self.assertEqual((stats['total_exams'], stats['passed_exams']), (3, 2))
+        self.assertEqual(stats['overall_avg'], round((80 + 30 + 95) / 3, 1))
+        self.assertEqual((stats['best_subject'], stats['best_subject_score']), ('Math', 95.0))
+        self.assertEqual(
+            [(row['subject']['id'], row['avg_score']) for row in response.context['subject_performance']],
+            [(self.other_math.id, 95.0), (self.subject.id, 55.0)],
+        )
+
+    def test_status_filter_runs_in_sql(self):
+        response = self.get(status='failed')
+
+        self.assertEqual([row['percentage'] for row in response.context['results_with_data']], [30.0])
+        self.assertEqual(response.context['stats']['passed_exams'], 0)
+
+    def test_query_count_does_not_grow_with_history(self):
+        self.client.force_login(self.student.user)
+        url = reverse('exams:student_exam_results')
+        with CaptureQueriesContext(connection) as before:
+            self.client.get(url)
+        for i in range(5):
+            self.add_exam(Subject.objects.create(name=f'Extra {i}', code=f'X{i}'), 10, i)
+        with CaptureQueriesContext(connection) as after:
+            self.client.get(url)
+        self.assertEqual(len(before), len(after))
+
+
+class ExamOverviewTests(ExamTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.admin = User.objects.create_user(username='admin', password='pass', role='admin')
+        for i, score in enumerate((20, 25, 40)):  # 40%, 50%, 80% of 50
+            Result.objects.create(exam=cls.exam, student=cls.students[i], score=score)
+        cls.upcoming = Exam.objects.create(
+            name='Final', subject=cls.subject, group=cls.group,
+            date=timezone.now() + timedelta(days=7), max_score=100,
+        )
+
+    def add_past_exams(self, count):
+        for i in range(count):
+            exam = Exam.objects.create(
+                name=f'Quiz {i}', subject=self.subject, group=self.group,
+                date=timezone.now() - timedelta(days=i + 1), max_score=10,
+            )
+            for student in self.students:
+                Result.objects.create(exam=exam, student=student, score=i)
+
+    def test_completed_exams_are_annotated(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('exams:admin_exam_management'))
+
+        exam = response.context['completed_exams'].object_list[0]
+        self.assertEqual((exam.result_count, exam.passed_count), (3, 2))
+        self.assertAlmostEqual(exam.avg_score, 85 / 3)
+        self.assertAlmostEqual(exam.avg_percentage, (40 + 50 + 80) / 3)
+        self.assertEqual(response.context['exam_counts'], {'upcoming': 1, 'completed': 1})
+        self.assertEqual([e.id for e in response.context['upcoming_exams']], [self.upcoming.id])
+
+    def test_query_count_does_not_grow_with_archive(self):
+        for user, name in ((self.admin, 'exams:admin_exam_management'),
+                           (self.teacher.user, 'exams:teacher_exam_management')):
+            self.client.force_login(user)
+            with CaptureQueriesContext(connection) as before:
+                self.client.get(reverse(name), {'tab': 'completed'})
+            self.add_past_exams(4)
+            with CaptureQueriesContext(connection) as after:
+                self.client.get(reverse(name), {'tab': 'completed'})
+            self.assertEqual(len(before), len(after), name)
+
+    def test_teacher_tabs_page_through_completed_exams(self):
+        self.add_past_exams(25)
+        self.client.force_login(self.teacher.user)
+        response = self.client.get(reverse('exams:teacher_exam_management'), {'tab': 'completed'})
+
+        self.assertEqual(response.context['exam_counts'], {'upcoming': 1, 'completed': 26, 'all': 27})
+        first = response.context['display_exams']
+        self.assertEqual(len(first), 20)
+        response = self.client.get(
+            reverse('exams:teacher_exam_management'), {'tab': 'completed', 'cursor': first.next_cursor}
+        )
+        self.assertEqual(len(response.context['display_exams']), 6)
+
+
+class PerformanceRollupTests(ExamTestMixin, TestCase):
+    def rollup_rows(self):
+        return {
+            'students': sorted(
+                (row.student_id, row.subject_id, row.result_count, round(row.percentage_sum, 6), row.passed_count,
+                 row.best_percentage, row.latest_percentage)
+                for row in StudentSubjectPerformance.objects.all()
+            ),
+            'groups': sorted(
+                (row.group_id, row.subject_id, row.result_count, round(row.percentage_sum, 6), row.passed_count,
+                 row.best_percentage, row.latest_percentage)
+                for row in GroupSubjectPerformance.objects.all()
+            ),
+        }
+
+    def assertMatchesRebuild(self):
+        incremental = self.rollup_rows()
+        rebuild_performance()
+        self.assertEqual(incremental, self.rollup_rows())
+
+    def test_result_writes_keep_rollups_in_sync(self):
+        first, second, _ = self.students
+        Result.objects.create(exam=self.exam, student=first, score=20)   # 40%
+        later = Exam.objects.create(
+            name='Final', subject=self.subject, group=self.group,
+            date=self.exam.date + timedelta(days=7), max_score=10,
+        )
+        Result.objects.create(exam=later, student=first, score=9)        # 90%
+        result = Result.objects.create(exam=later, student=second, score=4)  # 40%
+
+        row = StudentSubjectPerformance.objects.get(student=first, subject=self.subject)
+        self.assertEqual((row.result_count, row.passed_count), (2, 1))
+        self.assertAlmostEqual(row.average_percentage, 65)
+        self.assertEqual((row.best_percentage, row.latest_percentage), (90, 90))
+        group_row = GroupSubjectPerformance.objects.get(group=self.group, subject=self.subject)
+        self.assertEqual((group_row.result_count, group_row.latest_percentage), (3, 65))
+        self.assertMatchesRebuild()
+
+        result.score = 10
+        result.save()
+        later.max_score = 20
+        later.save()
+        self.assertEqual(StudentSubjectPerformance.objects.get(student=second).best_percentage, 50)
+        self.assertMatchesRebuild()
+
+        result.delete()
+        self.assertFalse(StudentSubjectPerformance.objects.filter(student=second).exists())
+        self.assertMatchesRebuild()
+
+    def test_result_sheet_updates_rollups(self):
+        save_result_sheet(self.exam, {f'score_{student.id}': str(10 * (i + 2)) for i, student in enumerate(self.students)})
+
+        group_row = GroupSubjectPerformance.objects.get(group=self.group, subject=self.subject)
+        self.assertEqual((group_row.result_count, group_row.passed_count), (3, 2))
+        self.assertEqual(StudentSubjectPerformance.objects.count(), 3)
+        self.assertMatchesRebuild()
+
+    def test_deleting_exam_clears_rollups(self):
+        Result.objects.create(exam=self.exam, student=self.students[0], score=20)
+        self.exam.delete()
+        self.assertFalse(StudentSubjectPerformance.objects.exists())
+        self.assertFalse(GroupSubjectPerformance.objects.exists())
+
+    def test_deleting_exam_refreshes_once(self):
+        for student in self.students:
+            Result.objects.create(exam=self.exam, student=student, score=30)
+        other = Exam.objects.create(name='Final', subject=self.subject, group=self.group, date=timezone.now(), max_score=10)
+        Result.objects.create(exam=other, student=self.students[0], score=9)
+
+        depths = []
+
+        def record_depth(*args):
+            depths.append(len(connection.atomic_blocks))
+            refresh_exam_performance(*args)
+
+        outside = len(connection.atomic_blocks)
+        with mock.patch('exams.signals.refresh_exam_performance', side_effect=record_depth) as refresh:
+            self.exam.delete()
+        # Once, in the delete's own atomic block rather than after it commits
+        self.assertEqual(depths, [outside + 1])
+        refresh.assert_called_once()
+        self.assertEqual(StudentSubjectPerformance.objects.get().result_count, 1)
+        self.assertMatchesRebuild()
@@ -9,6 +9,7 @@ urlpatterns = [
     path('admin/exams/<int:exam_id>/edit/', views.edit_exam, name='edit_exam'),
     path('admin/exams/<int:exam_id>/delete/', views.delete_exam, name='delete_exam'),
     path('admin/results/', views.admin_exam_results, name='admin_exam_results'),
+    path('admin/results/export/', views.admin_exam_results_export, name='admin_exam_results_export'),
 
     # Teacher exam paths
     path('teacher/exams/', views.teacher_exam_management, name='teacher_exam_management'),
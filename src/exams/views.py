@@ -1,23 +1,28 @@
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.shortcuts import render
 from django.db.models import Q
+from django.utils import timezone
 from .models import Exam, Result
 from .forms import ExamResultFilterForm
 from users.models import User
+from samo_edu_crm import exports
+from samo_edu_crm.pagination import keyset_page
+from samo_edu_crm.reports import report_view
+from .stats import exam_counts, exam_overview
 
 
 def is_admin(user):
     return user.is_authenticated and user.role == 'admin'
 
 
-@login_required
-@user_passes_test(is_admin)
-def admin_exam_results(request):
-    form = ExamResultFilterForm(request.GET or None)
-    results = Result.objects.select_related(
-        'exam', 'exam__subject', 'exam__group', 'student', 'student__user'
-    ).all()
+RESULT_ORDERING = ('-exam__date', '-id')
+UPCOMING_ORDERING = ('date', 'id')
+COMPLETED_ORDERING = ('-date', '-id')
+EXAMS_PER_PAGE = 20
 
+
+def filter_results(results, form):
+    """Apply a bound ExamResultFilterForm to a Result queryset (list page and export)."""
     if form.is_valid():
         subject = form.cleaned_data.get('subject')
         group = form.cleaned_data.get('group')
@@ -38,13 +43,41 @@ def admin_exam_results(request):
             results = results.filter(exam__date__gte=date_from)
         if date_to:
             results = results.filter(exam__date__lte=date_to)
+    return results
+
+
+def _percentage(score, max_score):
+    return round(score / max_score * 100, 1) if max_score else 0
+
+
+RESULT_EXPORT_COLUMNS = [
+    exports.person('Student', 'student__user__'),
+    exports.column('Exam', 'exam__name'),
+    exports.column('Subject', 'exam__subject__name'),
+    exports.column('Group', 'exam__group__name'),
+    exports.column('Date', 'exam__date', format=lambda value: timezone.localdate(value).isoformat()),
+    exports.column('Score', 'score'),
+    exports.column('Max Score', 'exam__max_score'),
+    exports.column('Percentage', 'score', 'exam__max_score', format=_percentage),
+    exports.column('Remarks', 'remarks'),
+]
 
-    # Order by exam date (newest first)
-    results = results.order_by('-exam__date')
+
+@login_required
+@user_passes_test(is_admin)
+@report_view
+def admin_exam_results(request):
+    form = ExamResultFilterForm(request.GET or None)
+    results = filter_results(Result.objects.select_related(
+        'exam', 'exam__subject', 'exam__group', 'student', 'student__user'
+    ).all(), form)
+
+    # Order by exam date (newest first), one keyset page at a time
+    cursor_page = keyset_page(results, RESULT_ORDERING, request.GET)
 
     # Prepare results with calculated percentages
     results_with_percentage = []
-    for result in results:
+    for result in cursor_page:
         percentage = (result.score / result.exam.max_score) * 100 if result.exam.max_score > 0 else 0
         results_with_percentage.append({
             'result': result,
@@ -54,12 +87,22 @@ def admin_exam_results(request):
     context = {
         'form': form,
         'results_with_percentage': results_with_percentage,
-        'results_count': len(results_with_percentage),
+        'results_count': cursor_page.total,
+        'cursor_page': cursor_page,
     }
 
     return render(request, 'admin/admin_exam_result.html', context)
 
 
+@login_required
+@user_passes_test(is_admin)
+@report_view
+def admin_exam_results_export(request):
+    form = ExamResultFilterForm(request.GET or None)
+    results = filter_results(Result.objects.order_by(*RESULT_ORDERING), form)
+    return exports.csv_response(results, RESULT_EXPORT_COLUMNS, 'exam_results')
+
+
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.shortcuts import render, get_object_or_404, redirect
 from django.db.models import Q, Avg, Count
@@ -85,8 +128,7 @@ def admin_exam_management(request):
     status_filter = request.GET.get('status', '')
     date_filter = request.GET.get('date', '')
 
-    # Get all exams with related data
-    exams = Exam.objects.select_related('subject', 'group').prefetch_related('result_set').all()
+    exams = Exam.objects.all()
 
     # Apply filters
     if subject_filter:
@@ -96,24 +138,28 @@ def admin_exam_management(request):
     if date_filter:
         exams = exams.filter(date__date=date_filter)
 
-    # Separate upcoming and completed exams based on current time
+    # Upcoming and completed are pages of the same annotated queryset; each
+    # has its own cursor, the tab counts come from one aggregate
     now = timezone.now()
-    upcoming_exams = exams.filter(date__gt=now).order_by('date')
-    completed_exams = exams.filter(date__lte=now).order_by('-date')
-
-    # Calculate average scores for completed exams
-    for exam in completed_exams:
-        avg_result = exam.result_set.aggregate(avg_score=Avg('score'))
-        exam.avg_score = avg_result['avg_score'] or 0
-        exam.student_count = exam.result_set.count()
+    exam_totals = exam_counts(exams, now)
+    overview = exam_overview(exams.select_related('subject', 'group__teacher__user'))
+    upcoming_page = keyset_page(
+        overview.filter(date__gt=now), UPCOMING_ORDERING, request.GET,
+        per_page=EXAMS_PER_PAGE, with_total=False, param='upcoming',
+    )
+    completed_page = keyset_page(
+        overview.filter(date__lte=now), COMPLETED_ORDERING, request.GET,
+        per_page=EXAMS_PER_PAGE, with_total=False, param='completed',
+    )
 
     # Get filter options
     subjects = Subject.objects.all()
     groups = Group.objects.all()
 
     context = {
-        'upcoming_exams': upcoming_exams,
-        'completed_exams': completed_exams,
+        'upcoming_exams': upcoming_page,
+        'completed_exams': completed_page,
+        'exam_counts': exam_totals,
         'subjects': subjects,
         'groups': groups,
         'current_filters': {
@@ -187,6 +233,8 @@ from .forms import ExamResultFilterForm, ExamForm, StudentExamFilterForm
 from education.models import Subject
 from groups.models import Group
 from users.models import User, Student, Teacher
+from .rollups import student_breakdown
+from .stats import PASS_PERCENTAGE, filter_status, subject_breakdown, with_percentage
 
 
 def is_student(user):
@@ -198,22 +246,19 @@ def is_student(user):
 def student_exam_results(request):
     # Get the student profile for the current user
     try:
-        student = Student.objects.get(user=request.user)
+        student = request.user.student_profile
     except Student.DoesNotExist:
         messages.error(request, "Student profile not found.")
         return redirect('users:dashboard')
 
     form = StudentExamFilterForm(request.GET or None)
-    results = Result.objects.filter(student=student).select_related(
-        'exam', 'exam__subject', 'exam__group'
-    ).order_by('-exam__date')
+    results = with_percentage(Result.objects.filter(student=student))
 
-    # Apply subject and date filters
+    # Subject, date and passed/failed filters all run in SQL
     if form.is_valid():
         subject = form.cleaned_data.get('subject')
         date_from = form.cleaned_data.get('date_from')
         date_to = form.cleaned_data.get('date_to')
-        status_filter = form.cleaned_data.get('status')
 
         if subject:
             results = results.filter(exam__subject=subject)
@@ -221,75 +266,39 @@ def student_exam_results(request):
             results = results.filter(exam__date__gte=date_from)
         if date_to:
             results = results.filter(exam__date__lte=date_to)
+        results = filter_status(results, form.cleaned_data.get('status'))
 
-    # Convert to list for Python-based status filtering
-    results_list = list(results)
-
-    # Apply status filtering in Python
-    if form.is_valid() and form.cleaned_data.get('status'):
-        status_filter = form.cleaned_data.get('status')
-        filtered_results = []
-        for result in results_list:
-            percentage = (result.score / result.exam.max_score) * 100
-            if status_filter == 'passed' and percentage >= 50:
-                filtered_results.append(result)
-            elif status_filter == 'failed' and percentage < 50:
-                filtered_results.append(result)
-        results_list = filtered_results
-
-    # Calculate statistics
-    total_exams = len(results_list)
-    passed_exams = 0
-    overall_total_percentage = 0
-
-    # Prepare results with calculated percentages and status
     results_with_data = []
-    subject_scores = {}
-
-    for result in results_list:
-        percentage = (result.score / result.exam.max_score) * 100 if result.exam.max_score > 0 else 0
-        status = 'passed' if percentage >= 50 else 'failed'
-
-        if status == 'passed':
-            passed_exams += 1
-
-        overall_total_percentage += percentage
-
-        # Track subject scores for best subject calculation
-        subject_name = result.exam.subject.name
-        if subject_name in subject_scores:
-            subject_scores[subject_name].append(percentage)
-        else:
-            subject_scores[subject_name] = [percentage]
-
+    for result in results.select_related('exam', 'exam__subject', 'exam__group').order_by('-exam__date'):
+        percentage = result.score_percentage
         results_with_data.append({
             'result': result,
             'percentage': round(percentage, 1),
-            'status': status,
+            'status': 'passed' if percentage >= PASS_PERCENTAGE else 'failed',
             'percentage_int': int(percentage)
         })
 
-    # Calculate overall average
-    overall_avg = overall_total_percentage / total_exams if total_exams > 0 else 0
-
-    # Find best subject
-    subject_avgs = {}
-    for subject, scores in subject_scores.items():
-        subject_avgs[subject] = sum(scores) / len(scores)
-
-    best_subject = max(subject_avgs.items(), key=lambda x: x[1]) if subject_avgs else ("None", 0)
-
-    # Subject performance for sidebar
-    subject_performance = []
-    for subject, avg_score in subject_avgs.items():
-        subject_performance.append({
-            'subject': Subject.objects.get(name=subject),  # Get subject object
-            'avg_score': round(avg_score, 1),
-            'color': get_subject_color(subject)
-        })
+    # One grouped aggregate gives the sidebar and the headline numbers; with
+    # no filters they are already in the performance rollup
+    if form.is_valid() and any(form.cleaned_data.values()):
+        breakdown = subject_breakdown(results)
+    else:
+        breakdown = student_breakdown(student.id)
+    total_exams = sum(row['results'] for row in breakdown)
+    passed_exams = sum(row['passed'] for row in breakdown)
+    overall_avg = (
+        sum(row['avg_percentage'] * row['results'] for row in breakdown) / total_exams if total_exams else 0
+    )
+    best = breakdown[0] if breakdown else None
 
-    # Sort by average score (descending)
-    subject_performance.sort(key=lambda x: x['avg_score'], reverse=True)
+    subject_performance = [
+        {
+            'subject': {'id': row['exam__subject_id'], 'name': row['exam__subject__name']},
+            'avg_score': round(row['avg_percentage'], 1),
+            'color': get_subject_color(row['exam__subject__name']),
+        }
+        for row in breakdown
+    ]
 
     context = {
         'form': form,
@@ -297,8 +306,8 @@ def student_exam_results(request):
         'student': student,
         'stats': {
             'overall_avg': round(overall_avg, 1),
-            'best_subject': best_subject[0],
-            'best_subject_score': round(best_subject[1], 1),
+            'best_subject': best['exam__subject__name'] if best else 'None',
+            'best_subject_score': round(best['avg_percentage'], 1) if best else 0,
             'passed_exams': passed_exams,
             'total_exams': total_exams,
         },
@@ -335,6 +344,7 @@ from .forms import TeacherExamForm, TeacherResultForm
 from education.models import Subject
 from groups.models import Group, GroupMembership
 from users.models import User, Student, Teacher
+from .services import save_result_sheet
 
 
 def is_teacher(user):
@@ -346,7 +356,7 @@ def is_teacher(user):
 def teacher_exam_management(request):
     # Get the teacher profile for current user
     try:
-        teacher = Teacher.objects.get(user=request.user)
+        teacher = request.user.teacher_profile
     except Teacher.DoesNotExist:
         messages.error(request, "Teacher profile not found.")
         return redirect('users:dashboard')
@@ -358,9 +368,7 @@ def teacher_exam_management(request):
     search_term = request.GET.get('search', '')
 
     # Get exams only for groups taught by this teacher
-    exams = Exam.objects.select_related('subject', 'group').prefetch_related('result_set').filter(
-        group__teacher=teacher
-    )
+    exams = Exam.objects.filter(group__teacher=teacher)
 
     # Apply filters
     if subject_filter:
@@ -373,11 +381,11 @@ def teacher_exam_management(request):
             Q(subject__name__icontains=search_term)
         )
 
-    # Separate upcoming and completed exams based on current time
+    # Tab counts in one aggregate, then one annotated page for the active tab
     now = timezone.now()
-    upcoming_exams = exams.filter(date__gt=now).order_by('date')
-    completed_exams = exams.filter(date__lte=now).order_by('-date')
-    all_exams = exams.order_by('-date')
+    exam_totals = exam_counts(exams, now)
+    exam_totals['all'] = exam_totals['upcoming'] + exam_totals['completed']
+    overview = exam_overview(exams.select_related('subject', 'group'))
 
     # Get filter options for this teacher only
     subjects = Subject.objects.filter(teacher=teacher).distinct()
@@ -386,17 +394,18 @@ def teacher_exam_management(request):
     # Determine which tab is active
     active_tab = request.GET.get('tab', 'upcoming')
     if active_tab == 'completed':
-        display_exams = completed_exams
+        display_exams, ordering = overview.filter(date__lte=now), COMPLETED_ORDERING
     elif active_tab == 'all':
-        display_exams = all_exams
+        display_exams, ordering = overview, COMPLETED_ORDERING
     else:
-        display_exams = upcoming_exams
+        display_exams, ordering = overview.filter(date__gt=now), UPCOMING_ORDERING
+    cursor_page = keyset_page(display_exams, ordering, request.GET, per_page=EXAMS_PER_PAGE, with_total=False)
 
     context = {
-        'upcoming_exams': upcoming_exams,
-        'completed_exams': completed_exams,
-        'all_exams': all_exams,
-        'display_exams': display_exams,
+        'exam_counts': exam_totals,
+        'display_exams': cursor_page,
+        'cursor_page': cursor_page,
+        'now': now,
         'subjects': subjects,
         'groups': groups,
         'active_tab': active_tab,
@@ -416,7 +425,7 @@ def teacher_exam_management(request):
 @user_passes_test(is_teacher)
 def teacher_create_exam(request):
     try:
-        teacher = Teacher.objects.get(user=request.user)
+        teacher = request.user.teacher_profile
     except Teacher.DoesNotExist:
         messages.error(request, "Teacher profile not found.")
         return redirect('exams:teacher_exam_management')
@@ -439,7 +448,7 @@ def teacher_create_exam(request):
 @user_passes_test(is_teacher)
 def teacher_edit_exam(request, exam_id):
     try:
-        teacher = Teacher.objects.get(user=request.user)
+        teacher = request.user.teacher_profile
     except Teacher.DoesNotExist:
         messages.error(request, "Teacher profile not found.")
         return redirect('exams:teacher_exam_management')
@@ -464,7 +473,7 @@ def teacher_edit_exam(request, exam_id):
 @user_passes_test(is_teacher)
 def teacher_delete_exam(request, exam_id):
     try:
-        teacher = Teacher.objects.get(user=request.user)
+        teacher = request.user.teacher_profile
     except Teacher.DoesNotExist:
         messages.error(request, "Teacher profile not found.")
         return redirect('exams:teacher_exam_management')
@@ -484,7 +493,7 @@ def teacher_delete_exam(request, exam_id):
 @user_passes_test(is_teacher)
 def teacher_exam_results(request, exam_id):
     try:
-        teacher = Teacher.objects.get(user=request.user)
+        teacher = request.user.teacher_profile
     except Teacher.DoesNotExist:
         messages.error(request, "Teacher profile not found.")
         return redirect('exams:teacher_exam_management')
@@ -523,42 +532,22 @@ def teacher_exam_results(request, exam_id):
 @user_passes_test(is_teacher)
 def teacher_save_results(request, exam_id):
     try:
-        teacher = Teacher.objects.get(user=request.user)
+        teacher = request.user.teacher_profile
     except Teacher.DoesNotExist:
         messages.error(request, "Teacher profile not found.")
         return redirect('exams:teacher_exam_management')
 
-    exam = get_object_or_404(Exam, id=exam_id, group__teacher=teacher)
+    exam = get_object_or_404(Exam.objects.select_related('group'), id=exam_id, group__teacher=teacher)
 
     if request.method == 'POST':
-        try:
-            for key, value in request.POST.items():
-                if key.startswith('score_'):
-                    student_id = int(key.replace('score_', ''))
-                    score = int(value) if value else 0
-                    remarks = request.POST.get(f'remarks_{student_id}', '')
-
-                    # Validate score
-                    if score > exam.max_score:
-                        messages.error(request, f'Score {score} exceeds maximum score {exam.max_score}')
-                        return redirect('exams:teacher_exam_results', exam_id=exam_id)
-
-                    # Create or update result
-                    result, created = Result.objects.update_or_create(
-                        exam=exam,
-                        student_id=student_id,
-                        defaults={
-                            'score': score,
-                            'remarks': remarks
-                        }
-                    )
-
-            messages.success(request, f'Results for "{exam.name}" saved successfully!')
-            return redirect('exams:teacher_exam_results', exam_id=exam_id)
-
-        except Exception as e:
-            messages.error(request, f'Error saving results: {str(e)}')
-            return redirect('exams:teacher_exam_results', exam_id=exam_id)
+        saved, errors = save_result_sheet(exam, request.POST)
+        if errors:
+            # Nothing was saved - show every bad row at once
+            for error in errors:
+                messages.error(request, error)
+        else:
+            messages.success(request, f'Results for "{exam.name}" saved successfully! ({saved} students)')
+        return redirect('exams:teacher_exam_results', exam_id=exam_id)
 
     messages.error(request, 'Invalid request method.')
     return redirect('exams:teacher_exam_results', exam_id=exam_id)
\ No newline at end of file
@@ -0,0 +1,177 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from education.models import Subject
+from groups.models import Group, GroupMembership, Attendance, DailyAttendanceSummary, MonthlyStudentAttendance
+from users.management.commands.bench import LOCMEM_CACHE, percentile, quiet_loggers
+from users.models import User, Teacher, Student
+
+# What the app ran with before the tuning layer: rollback journal, Python's
+# 5 s default timeout and deferred transactions
+MODES = {
+    'default': {
+        'pragmas': {
+            'journal_mode': 'delete', 'synchronous': None, 'busy_timeout': None,
+            'mmap_size': None, 'cache_size': None, 'temp_store': None,
+        },
+        'transaction_mode': None,
+    },
+    'tuned': {'pragmas': {}, 'transaction_mode': 'IMMEDIATE'},
+}
+
+STATUSES = ('present', 'present', 'present', 'late', 'absent')
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate the morning attendance peak: one thread per teacher posts attendance sheets to "
+        "save_attendance at the same time, against a throwaway SQLite file, first with the old "
+        "connection defaults and then with the tuning layer. Reports throughput and the share of "
+        "'database is locked' failures."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--teachers', type=int, default=16, help='Concurrent teachers (threads)')
+        parser.add_argument('--groups-per-teacher', type=int, default=2)
+        parser.add_argument('--students-per-group', type=int, default=25)
+        parser.add_argument('--days', type=int, default=10, help='Sheets each teacher posts per group')
+        parser.add_argument('--mode', choices=[*MODES, 'both'], default='both')
+        parser.add_argument('--output', help='Also write the report as JSON here')
+
+    def handle(self, *args, **options):
+        workdir = tempfile.mkdtemp(prefix='bench-attendance-')
+        # Threads need a real file: the usual in-memory test database is per connection
+        connection.settings_dict['TEST']['NAME'] = os.path.join(workdir, 'bench.sqlite3')
+        options_dict = connection.settings_dict.setdefault('OPTIONS', {})
+        saved_options = dict(options_dict)
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        report = {}
+        try:
+            with override_settings(CACHES=LOCMEM_CACHE, QUERY_INSTRUMENTATION=False, ALLOWED_HOSTS=['*']), \
+                    quiet_loggers('django.request'):
+                clients = self.build_fixture(options)
+                for mode in (MODES if options['mode'] == 'both' else [options['mode']]):
+                    report[mode] = self.run_mode(mode, clients, options, options_dict)
+        finally:
+            options_dict.clear()
+            options_dict.update(saved_options)
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            shutil.rmtree(workdir, ignore_errors=True)
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(report, fh, indent=2, sort_keys=True)
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+
+    def build_fixture(self, options):
+        """Teachers with their groups and students; returns ``[(client, [group ids])]`` per teacher."""
+        password = make_password('bench')
+        subject = Subject.objects.create(name='Bench', code='BENCH')
+        clients = []
+        for t in range(options['teachers']):
+            user = User.objects.create(username=f'bench-teacher-{t}', password=password, role='teacher')
+            teacher = Teacher.objects.create(user=user)
+            group_ids = []
+            for g in range(options['groups_per_teacher']):
+                group = Group.objects.create(name=f'Bench {t}-{g}', subject=subject, teacher=teacher, schedule={})
+                users = User.objects.bulk_create(
+                    User(username=f'bench-student-{t}-{g}-{s}', password=password, role='student')
+                    for s in range(options['students_per_group'])
+                )
+                students = Student.objects.bulk_create(Student(user=u) for u in users)
+                GroupMembership.objects.bulk_create(GroupMembership(group=group, student=s) for s in students)
+                group_ids.append((group.pk, [s.pk for s in students]))
+            client = Client(raise_request_exception=False)
+            client.force_login(user)
+            clients.append((client, group_ids))
+        return clients
+
+    def run_mode(self, mode, clients, options, options_dict):
+        Attendance.objects.all().delete()
+        DailyAttendanceSummary.objects.all().delete()
+        MonthlyStudentAttendance.objects.all().delete()
+
+        # New connections (one per thread) pick these up
+        options_dict.pop('transaction_mode', None)
+        if MODES[mode]['transaction_mode']:
+            options_dict['transaction_mode'] = MODES[mode]['transaction_mode']
+        connections.close_all()
+
+        url = reverse('save_attendance')
+        start_day = date(2025, 1, 6)
+        barrier = threading.Barrier(len(clients))
+        outcomes = []  # (latency ms, outcome), list.append is thread safe
+
+        def teacher_thread(client, groups):
+            try:
+                barrier.wait()
+                for day in range(options['days']):
+                    for group_id, student_ids in groups:
+                        payload = {
+                            'group_id': group_id,
+                            'date': (start_day + timedelta(days=day)).isoformat(),
+                            'attendance': {
+                                str(pk): STATUSES[(pk + day) % len(STATUSES)] for pk in student_ids
+                            },
+                        }
+                        started = time.perf_counter()
+                        response = client.post(url, json.dumps(payload), content_type='application/json')
+                        elapsed = (time.perf_counter() - started) * 1000
+                        outcomes.append((elapsed, self.outcome(response)))
+            finally:
+                connections.close_all()
+
+        with override_settings(SQLITE_PRAGMAS=MODES[mode]['pragmas']):
+            threads = [threading.Thread(target=teacher_thread, args=client) for client in clients]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+            journal = connection.cursor().execute('PRAGMA journal_mode').fetchone()[0]
+            connections.close_all()
+
+        latencies = [ms for ms, _ in outcomes]
+        counts = {name: sum(1 for _, outcome in outcomes if outcome == name) for name in ('ok', 'locked', 'error')}
+        row = {
+            'journal_mode': journal,
+            'requests': len(outcomes),
+            **counts,
+            'lock_error_rate': round(counts['locked'] / len(outcomes) * 100, 2) if outcomes else 0,
+            'seconds': round(elapsed, 2),
+            'sheets_per_second': round(counts['ok'] / elapsed, 1),
+            'p50_ms': round(percentile(latencies, 50), 1),
+            'p95_ms': round(percentile(latencies, 95), 1),
+            'rows_written': Attendance.objects.count(),
+        }
+        self.stdout.write(
+            f"{mode:<8} {row['journal_mode']:<7} {row['requests']:>5} sheets  {row['ok']:>5} ok  "
+            f"{row['locked']:>5} locked ({row['lock_error_rate']:.1f}%)  {row['error']:>3} other  "
+            f"{row['sheets_per_second']:>7.1f} sheets/s  p50 {row['p50_ms']:>7.1f} ms  p95 {row['p95_ms']:>7.1f} ms"
+        )
+        return row
+
+    def outcome(self, response):
+        if response.status_code != 200:
+            return 'locked' if b'database is locked' in response.content else 'error'
+        data = response.json()
+        if data.get('success'):
+            return 'ok'
+        return 'locked' if 'locked' in data.get('error', '') else 'error'
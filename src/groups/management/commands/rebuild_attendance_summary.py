@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from groups.rollups import rebuild_attendance_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily and monthly attendance rollups from the raw Attendance table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per insert batch')
+
+    def handle(self, *args, **options):
+        daily_count, monthly_count = rebuild_attendance_rollups(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {daily_count} daily group summaries and {monthly_count} monthly student summaries"
+        ))
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.6 on 2026-10-18 14:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import TruncMonth
+
+
+def backfill_rollups(apps, schema_editor):
+    Attendance = apps.get_model('groups', 'Attendance')
+    DailyAttendanceSummary = apps.get_model('groups', 'DailyAttendanceSummary')
+    MonthlyStudentAttendance = apps.get_model('groups', 'MonthlyStudentAttendance')
+
+    counters = {
+        status: Count('id', filter=Q(status=status))
+        for status in ('present', 'absent', 'late', 'excused')
+    }
+    DailyAttendanceSummary.objects.bulk_create(
+        (DailyAttendanceSummary(**row) for row in
+         Attendance.objects.order_by().values('group_id', 'date').annotate(**counters)),
+        batch_size=1000,
+    )
+    MonthlyStudentAttendance.objects.bulk_create(
+        (MonthlyStudentAttendance(**row) for row in
+         Attendance.objects.order_by().annotate(month=TruncMonth('date'))
+         .values('student_id', 'group_id', 'month').annotate(**counters)),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('groups', '0006_group_created_at'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyAttendanceSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('present', models.PositiveIntegerField(default=0)),
+                ('absent', models.PositiveIntegerField(default=0)),
+                ('late', models.PositiveIntegerField(default=0)),
+                ('excused', models.PositiveIntegerField(default=0)),
+                ('date', models.DateField()),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_attendance', to='groups.group')),
+            ],
+            options={
+                'ordering': ['-date'],
+                'unique_together': {('group', 'date')},
+            },
+        ),
+        migrations.CreateModel(
+            name='MonthlyStudentAttendance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('present', models.PositiveIntegerField(default=0)),
+                ('absent', models.PositiveIntegerField(default=0)),
+                ('late', models.PositiveIntegerField(default=0)),
+                ('excused', models.PositiveIntegerField(default=0)),
+                ('month', models.DateField()),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_attendance', to='groups.group')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_attendance', to='users.student')),
+            ],
+            options={
+                'ordering': ['-month'],
+                'unique_together': {('student', 'group', 'month')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
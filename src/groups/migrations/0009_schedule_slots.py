@@ -0,0 +1,142 @@
+# Generated by Django 5.2.6 on 2026-10-18 14:54
+
+import re
+from datetime import datetime, time, timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# A frozen copy of groups.schedule.parse_schedule as it was when the slots
+# were introduced: the migration must not change with the live parser.
+DEFAULT_LESSON_MINUTES = 90
+ROOM_MAX_LENGTH = 50
+
+DAY_ALIASES = {
+    alias: weekday
+    for weekday, aliases in enumerate((
+        ('mon', 'monday', 'dushanba'),
+        ('tue', 'tues', 'tuesday', 'seshanba'),
+        ('wed', 'wednesday', 'chorshanba'),
+        ('thu', 'thur', 'thurs', 'thursday', 'payshanba'),
+        ('fri', 'friday', 'juma'),
+        ('sat', 'saturday', 'shanba'),
+        ('sun', 'sunday', 'yakshanba'),
+    ))
+    for alias in aliases
+}
+
+_TIME = r'\d{1,2}(?:[:.]\d{2}(?:\s*[ap]\.?m\.?)?|\s*[ap]\.?m\.?)'
+_TOKEN = re.compile(
+    rf'(?P<start>{_TIME})(?:\s*(?:-|–|—|to)\s*(?P<end>{_TIME}))?'
+    r'|(?P<first>[^\W\d_]+)\s*[-–]\s*(?P<last>[^\W\d_]+)'
+    r'|(?P<word>[^\W\d_]+)',
+    re.IGNORECASE,
+)
+_ROOM = re.compile(r"\b(?:room|rm|xona|aud)\.?\s*[:#№]?\s*([\w-]+)", re.IGNORECASE)
+_TIME_PARTS = re.compile(r'(\d{1,2})(?:[:.](\d{2}))?\s*(?:([ap])\.?m\.?)?', re.IGNORECASE)
+
+
+def _parse_time(text):
+    hour, minute, meridiem = _TIME_PARTS.fullmatch(text.strip()).groups()
+    hour, minute = int(hour), int(minute or 0)
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if meridiem.lower() == 'p' else 0)
+    if hour > 23 or minute > 59:
+        return None
+    return time(hour, minute)
+
+
+def _day_range(first, last):
+    first, last = DAY_ALIASES.get(first.lower()), DAY_ALIASES.get(last.lower())
+    if first is None or last is None:
+        return None
+    return [(first + i) % 7 for i in range((last - first) % 7 + 1)]
+
+
+def parse_schedule(schedule):
+    if isinstance(schedule, dict):
+        text = str(schedule.get('schedule') or schedule.get('schedule_text') or '')
+    else:
+        text = schedule if isinstance(schedule, str) else ''
+    room = schedule.get('room') if isinstance(schedule, dict) else None
+    if not room:
+        match = _ROOM.search(text) or re.search(r'\b([\w-]+)-xona\b', text, re.IGNORECASE)
+        room = match.group(1) if match else ''
+    text = _ROOM.sub(' ', text)
+    room = str(room).strip()[:ROOM_MAX_LENGTH]
+
+    slots = set()
+    pending, last_days = [], []
+    for token in _TOKEN.finditer(text):
+        if token.group('word'):
+            weekday = DAY_ALIASES.get(token.group('word').lower())
+            if weekday is not None:
+                pending.append(weekday)
+        elif token.group('first'):
+            days = _day_range(token.group('first'), token.group('last'))
+            if days:
+                pending.extend(days)
+            else:
+                pending.extend(
+                    DAY_ALIASES[word.lower()] for word in (token.group('first'), token.group('last'))
+                    if word.lower() in DAY_ALIASES
+                )
+        else:
+            days = pending or last_days
+            pending, last_days = [], days
+            start = _parse_time(token.group('start'))
+            if start is None:
+                continue
+            if token.group('end'):
+                end = _parse_time(token.group('end'))
+            else:
+                end = (datetime.combine(datetime.min, start) + timedelta(minutes=DEFAULT_LESSON_MINUTES)).time()
+                end = end if end > start else time(23, 59)
+            if end is None or end <= start:
+                continue
+            slots.update((weekday, start, end, room) for weekday in days)
+    return sorted(slots)
+
+
+def backfill_slots(apps, schema_editor):
+    Group = apps.get_model('groups', 'Group')
+    ScheduleSlot = apps.get_model('groups', 'ScheduleSlot')
+    ScheduleSlot.objects.bulk_create(
+        [
+            ScheduleSlot(group_id=group_id, teacher_id=teacher_id, weekday=weekday,
+                         start_time=start, end_time=end, room=room)
+            for group_id, teacher_id, schedule in Group.objects.values_list('id', 'teacher_id', 'schedule').iterator()
+            for weekday, start, end, room in parse_schedule(schedule)
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('groups', '0008_hot_path_indexes'),
+        ('users', '0002_person_search_tokens'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduleSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')])),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('room', models.CharField(blank=True, max_length=50)),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slots', to='groups.group')),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='schedule_slots', to='users.teacher')),
+            ],
+            options={
+                'ordering': ['weekday', 'start_time'],
+                'indexes': [models.Index(fields=['teacher', 'weekday', 'start_time'], name='groups_slot_teacher_day_idx'), models.Index(fields=['weekday', 'group'], name='groups_slot_day_group_idx'), models.Index(fields=['room', 'weekday'], name='groups_slot_room_day_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_slots, migrations.RunPython.noop),
+    ]
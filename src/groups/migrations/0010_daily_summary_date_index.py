@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('groups', '0009_schedule_slots'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dailyattendancesummary',
+            index=models.Index(fields=['date'], name='groups_dailysum_date_idx'),
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.exceptions import ValidationError
 from django.conf import settings
 class Group(models.Model):
@@ -15,9 +15,52 @@ class Group(models.Model):
     schedule = models.JSONField()  # Stores class schedule data
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='active')
     created_at = models.DateTimeField(auto_now_add=True)
+
+    def save(self, *args, **kwargs):
+        # Schedule slots are rewritten by signals in the same transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.name} - {self.subject}"
 
+
+class ScheduleSlot(models.Model):
+    """One weekly lesson of a group, parsed from ``Group.schedule``.
+
+    ``teacher`` is copied from the group so a teacher's day is read from one
+    index; the rows are rewritten whenever the group's schedule or teacher
+    changes.
+    """
+    WEEKDAY_CHOICES = (
+        (0, 'Monday'),
+        (1, 'Tuesday'),
+        (2, 'Wednesday'),
+        (3, 'Thursday'),
+        (4, 'Friday'),
+        (5, 'Saturday'),
+        (6, 'Sunday'),
+    )
+    group = models.ForeignKey(Group, on_delete=models.CASCADE, related_name='slots')
+    teacher = models.ForeignKey('users.Teacher', on_delete=models.CASCADE, related_name='schedule_slots')
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAY_CHOICES)  # date.weekday(): 0 = Monday
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    room = models.CharField(max_length=50, blank=True)
+
+    class Meta:
+        ordering = ['weekday', 'start_time']
+        indexes = [
+            # A teacher's classes on a given day
+            models.Index(fields=['teacher', 'weekday', 'start_time'], name='groups_slot_teacher_day_idx'),
+            # A day's classes of a set of groups (students) and room checks
+            models.Index(fields=['weekday', 'group'], name='groups_slot_day_group_idx'),
+            models.Index(fields=['room', 'weekday'], name='groups_slot_room_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.group} - {self.get_weekday_display()} {self.start_time:%H:%M}-{self.end_time:%H:%M}"
+
 class GroupMembership(models.Model):
     student = models.ForeignKey('users.Student', on_delete=models.CASCADE)
     group = models.ForeignKey(Group, on_delete=models.CASCADE)
@@ -53,6 +96,19 @@ class Attendance(models.Model):
     class Meta:
         unique_together = ['student', 'group', 'date']
         ordering = ['-date', 'student']
+        indexes = [
+            # Group sheets and date-range reports
+            models.Index(fields=['group', 'date'], name='groups_att_group_date_idx'),
+            # Per-student status counts
+            models.Index(fields=['student', 'status'], name='groups_att_student_status_idx'),
+            # Unfiltered admin list ordered by (-date, -id)
+            models.Index(fields=['date'], name='groups_att_date_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Keep the attendance rollups (updated by signals) in the same transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def clean(self):
         # Check if student belongs to the group
@@ -63,4 +119,47 @@ class Attendance(models.Model):
         return f"{self.student} - {self.date} - {self.status}"
 
 
+class AttendanceCounters(models.Model):
+    """Present/absent/late/excused counters shared by the attendance rollups."""
+    present = models.PositiveIntegerField(default=0)
+    absent = models.PositiveIntegerField(default=0)
+    late = models.PositiveIntegerField(default=0)
+    excused = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def total(self):
+        return self.present + self.absent + self.late + self.excused
+
+
+class DailyAttendanceSummary(AttendanceCounters):
+    """Attendance counters for one group on one day, kept in sync with Attendance."""
+    group = models.ForeignKey(Group, on_delete=models.CASCADE, related_name='daily_attendance')
+    date = models.DateField()
 
+    class Meta:
+        unique_together = ['group', 'date']
+        ordering = ['-date']
+        indexes = [
+            # The admin dashboard's monthly series reads every group from a date on
+            models.Index(fields=['date'], name='groups_dailysum_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.group} - {self.date}"
+
+
+class MonthlyStudentAttendance(AttendanceCounters):
+    """Attendance counters for one student in one group per month (month = first day)."""
+    student = models.ForeignKey('users.Student', on_delete=models.CASCADE, related_name='monthly_attendance')
+    group = models.ForeignKey(Group, on_delete=models.CASCADE, related_name='monthly_attendance')
+    month = models.DateField()
+
+    class Meta:
+        unique_together = ['student', 'group', 'month']
+        ordering = ['-month']
+
+    def __str__(self):
+        return f"{self.student} - {self.group} - {self.month:%Y-%m}"
@@ -0,0 +1,140 @@
+from collections import defaultdict
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest, TruncMonth
+
+from .models import Attendance, DailyAttendanceSummary, MonthlyStudentAttendance
+
+STATUSES = ('present', 'absent', 'late', 'excused')
+
+_date_field = Attendance._meta.get_field('date')
+
+
+def apply_attendance_changes(changes):
+    """Apply ``(student_id, group_id, date, status, delta)`` changes to both rollups.
+
+    ``delta`` is +1 for a row that now exists with that status and -1 for one
+    that no longer does. Callers writing Attendance rows should run this inside
+    the same transaction as the write.
+    """
+    daily = defaultdict(lambda: defaultdict(int))
+    monthly = defaultdict(lambda: defaultdict(int))
+    for student_id, group_id, day, status, delta in changes:
+        if status not in STATUSES:
+            continue
+        day = _date_field.to_python(day)
+        daily[(int(group_id), day)][status] += delta
+        monthly[(int(student_id), int(group_id), day.replace(day=1))][status] += delta
+
+    with transaction.atomic(savepoint=False):
+        _apply(DailyAttendanceSummary, ('group_id', 'date'), daily)
+        _apply(MonthlyStudentAttendance, ('student_id', 'group_id', 'month'), monthly)
+
+
+def _apply(model, key_fields, deltas, batch_size=200):
+    deltas = {
+        key: {status: n for status, n in counts.items() if n}
+        for key, counts in deltas.items()
+    }
+    deltas = {key: counts for key, counts in deltas.items() if counts}
+
+    # Only increments need a row to exist; a decrement on a missing row is drift
+    model.objects.bulk_create(
+        [model(**dict(zip(key_fields, key))) for key, counts in deltas.items()
+         if any(n > 0 for n in counts.values())],
+        ignore_conflicts=True,
+    )
+
+    # Rows that get the same delta share one UPDATE, so a whole attendance
+    # sheet costs a handful of statements rather than one per student
+    keys_by_delta = defaultdict(list)
+    for key, counts in deltas.items():
+        keys_by_delta[frozenset(counts.items())].append(key)
+
+    for delta, keys in keys_by_delta.items():
+        values = {
+            status: Greatest(F(status) + n, 0, output_field=IntegerField())
+            for status, n in delta
+        }
+        for start in range(0, len(keys), batch_size):
+            condition = Q()
+            for key in keys[start:start + batch_size]:
+                condition |= Q(**dict(zip(key_fields, key)))
+            model.objects.filter(condition).update(**values)
+
+
+def rebuild_attendance_rollups(batch_size=1000):
+    """Recompute both rollups from the raw Attendance table.
+
+    Returns the number of daily and monthly rows written.
+    """
+    counters = {status: Count('id', filter=Q(status=status)) for status in STATUSES}
+
+    daily_rows = Attendance.objects.order_by().values('group_id', 'date').annotate(**counters)
+    monthly_rows = Attendance.objects.order_by().annotate(
+        month=TruncMonth('date')
+    ).values('student_id', 'group_id', 'month').annotate(**counters)
+
+    with transaction.atomic():
+        DailyAttendanceSummary.objects.all().delete()
+        MonthlyStudentAttendance.objects.all().delete()
+        daily_count = _bulk_insert(DailyAttendanceSummary, daily_rows, batch_size)
+        monthly_count = _bulk_insert(MonthlyStudentAttendance, monthly_rows, batch_size)
+
+    return daily_count, monthly_count
+
+
+def _bulk_insert(model, rows, batch_size):
+    rows = rows.iterator(chunk_size=batch_size)
+    written = 0
+    while True:
+        batch = [model(**row) for row in islice(rows, batch_size)]
+        if not batch:
+            return written
+        model.objects.bulk_create(batch)
+        written += len(batch)
+
+
+def counter_totals(queryset):
+    """Sum the counters of a rollup queryset into ``{status: n, 'total': n}``."""
+    sums = queryset.aggregate(**{f'{status}_sum': Sum(status) for status in STATUSES})
+    totals = {status: sums[f'{status}_sum'] or 0 for status in STATUSES}
+    totals['total'] = sum(totals.values())
+    return totals
+
+
+def counters_by(queryset, field):
+    """Like :func:`counter_totals`, grouped by ``field`` (e.g. ``'group_id'``)."""
+    rows = queryset.order_by().values(field).annotate(
+        **{f'{status}_sum': Sum(status) for status in STATUSES}
+    )
+    result = {}
+    for row in rows:
+        totals = {status: row[f'{status}_sum'] or 0 for status in STATUSES}
+        totals['total'] = sum(totals.values())
+        result[row[field]] = totals
+    return result
+
+
+def attendance_rate(counts, digits=None):
+    """Share of ``present`` among all recorded rows, as a percentage."""
+    if not counts['total']:
+        return 0
+    return round(counts['present'] / counts['total'] * 100, digits)
+
+
+def annotate_group_attendance(queryset):
+    """Annotate groups with ``total_attendance`` and ``present_attendance``.
+
+    The counts come from correlated subqueries over the daily rollup, so they
+    can be combined with other joins (e.g. a student count) without fan-out.
+    """
+    summaries = DailyAttendanceSummary.objects.filter(group=OuterRef('pk')).order_by().values('group')
+    total = summaries.annotate(n=Sum(F('present') + F('absent') + F('late') + F('excused'))).values('n')
+    present = summaries.annotate(n=Sum('present')).values('n')
+    return queryset.annotate(
+        total_attendance=Coalesce(Subquery(total), 0),
+        present_attendance=Coalesce(Subquery(present), 0),
+    )
@@ -0,0 +1,268 @@
+"""Weekly timetable of the groups.
+
+``Group.schedule`` stays the free text the forms send
+(``{'schedule': 'Mon, Wed, Fri 09:00-10:30'}``); :func:`parse_schedule` turns
+it into ``(weekday, start, end, room)`` slots and the Group signals keep the
+``ScheduleSlot`` rows in step with it. "Today's classes" is then a lookup on
+the slot indexes, and double bookings are found with an interval sweep over
+the slots that can clash.
+"""
+import re
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .models import Group, ScheduleSlot
+
+# Lessons written with only a start time ("Mon, Wed 10:00 AM")
+DEFAULT_LESSON_MINUTES = 90
+
+DAY_NAMES = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+
+DAY_ALIASES = {
+    alias: weekday
+    for weekday, aliases in enumerate((
+        ('mon', 'monday', 'dushanba'),
+        ('tue', 'tues', 'tuesday', 'seshanba'),
+        ('wed', 'wednesday', 'chorshanba'),
+        ('thu', 'thur', 'thurs', 'thursday', 'payshanba'),
+        ('fri', 'friday', 'juma'),
+        ('sat', 'saturday', 'shanba'),
+        ('sun', 'sunday', 'yakshanba'),
+    ))
+    for alias in aliases
+}
+
+# A time needs minutes or am/pm, so room and group numbers are not read as hours
+_TIME = r'\d{1,2}(?:[:.]\d{2}(?:\s*[ap]\.?m\.?)?|\s*[ap]\.?m\.?)'
+_TOKEN = re.compile(
+    rf'(?P<start>{_TIME})(?:\s*(?:-|–|—|to)\s*(?P<end>{_TIME}))?'
+    r'|(?P<first>[^\W\d_]+)\s*[-–]\s*(?P<last>[^\W\d_]+)'
+    r'|(?P<word>[^\W\d_]+)',
+    re.IGNORECASE,
+)
+_ROOM = re.compile(r"\b(?:room|rm|xona|aud)\.?\s*[:#№]?\s*([\w-]+)", re.IGNORECASE)
+
+
+def schedule_text(schedule):
+    """The free text of a ``Group.schedule`` value (either form key, or a bare string)."""
+    if isinstance(schedule, dict):
+        return str(schedule.get('schedule') or schedule.get('schedule_text') or '')
+    return schedule if isinstance(schedule, str) else ''
+
+
+_TIME_PARTS = re.compile(r'(\d{1,2})(?:[:.](\d{2}))?\s*(?:([ap])\.?m\.?)?', re.IGNORECASE)
+
+
+def _parse_time(text):
+    hour, minute, meridiem = _TIME_PARTS.fullmatch(text.strip()).groups()
+    hour, minute = int(hour), int(minute or 0)
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if meridiem.lower() == 'p' else 0)
+    if hour > 23 or minute > 59:
+        return None
+    return time(hour, minute)
+
+
+def _day_range(first, last):
+    first, last = DAY_ALIASES.get(first.lower()), DAY_ALIASES.get(last.lower())
+    if first is None or last is None:
+        return None
+    return [(first + i) % 7 for i in range((last - first) % 7 + 1)]
+
+
+def parse_schedule(schedule):
+    """``[(weekday, start, end, room)]`` read from a ``Group.schedule`` value.
+
+    Days apply to the next time after them ("Mon, Wed 09:00-10:30; Fri
+    14:00-15:30"), a time without days reuses the previous days, "Mon-Fri"
+    is a range, and a time without an end lasts :data:`DEFAULT_LESSON_MINUTES`.
+    The room comes from a ``room`` key or "Room 12" / "12-xona" in the text.
+    Anything unreadable is skipped, so free text nobody can parse has no slots.
+    """
+    text = schedule_text(schedule)
+    room = schedule.get('room') if isinstance(schedule, dict) else None
+    if not room:
+        match = _ROOM.search(text) or re.search(r'\b([\w-]+)-xona\b', text, re.IGNORECASE)
+        room = match.group(1) if match else ''
+    text = _ROOM.sub(' ', text)
+    room = str(room).strip()[:ScheduleSlot._meta.get_field('room').max_length]
+
+    slots = set()
+    pending, last_days = [], []
+    for token in _TOKEN.finditer(text):
+        if token.group('word'):
+            weekday = DAY_ALIASES.get(token.group('word').lower())
+            if weekday is not None:
+                pending.append(weekday)
+        elif token.group('first'):
+            days = _day_range(token.group('first'), token.group('last'))
+            if days:
+                pending.extend(days)
+            else:
+                pending.extend(
+                    DAY_ALIASES[word.lower()] for word in (token.group('first'), token.group('last'))
+                    if word.lower() in DAY_ALIASES
+                )
+        else:
+            days = pending or last_days
+            pending, last_days = [], days
+            start = _parse_time(token.group('start'))
+            if start is None:
+                continue
+            if token.group('end'):
+                end = _parse_time(token.group('end'))
+            else:
+                end = (datetime.combine(datetime.min, start) + timedelta(minutes=DEFAULT_LESSON_MINUTES)).time()
+                end = end if end > start else time(23, 59)
+            if end is None or end <= start:
+                continue
+            slots.update((weekday, start, end, room) for weekday in days)
+    return sorted(slots)
+
+
+def build_slots(group, schedule=None, teacher=None):
+    """Unsaved ScheduleSlot objects for ``group`` (which may itself be unsaved)."""
+    teacher = teacher or group.teacher
+    return [
+        ScheduleSlot(group=group, teacher=teacher, weekday=weekday, start_time=start, end_time=end, room=room)
+        for weekday, start, end, room in parse_schedule(group.schedule if schedule is None else schedule)
+    ]
+
+
+def sync_schedule_slots(groups):
+    """Rewrite the slots of ``groups`` from their ``schedule``; returns the number written.
+
+    Callers changing a group's schedule or teacher should run this inside the
+    same transaction as the write (the Group signals do).
+    """
+    groups = list(groups)
+    slots = [slot for group in groups for slot in build_slots(group)]
+    with transaction.atomic(savepoint=False):
+        ScheduleSlot.objects.filter(group__in=[group.pk for group in groups]).delete()
+        ScheduleSlot.objects.bulk_create(slots, batch_size=1000)
+    return len(slots)
+
+
+def rebuild_schedule_slots(batch_size=1000):
+    """Re-parse every group's schedule; returns the number of slots written."""
+    groups = Group.objects.order_by('pk').only('pk', 'teacher_id', 'schedule')
+    rows = (
+        ScheduleSlot(group_id=group.pk, teacher_id=group.teacher_id, weekday=weekday,
+                     start_time=start, end_time=end, room=room)
+        for group in groups.iterator(chunk_size=batch_size)
+        for weekday, start, end, room in parse_schedule(group.schedule)
+    )
+    written = 0
+    with transaction.atomic():
+        ScheduleSlot.objects.all().delete()
+        while batch := list(islice(rows, batch_size)):
+            ScheduleSlot.objects.bulk_create(batch)
+            written += len(batch)
+    return written
+
+
+def classes_on(day, teacher=None, student=None):
+    """Slot queryset of active groups held on ``day``, for a teacher or a student, with the group's size.
+
+    One query: the weekday and teacher (or the student's memberships) are
+    answered from the slot and membership indexes.
+    """
+    slots = ScheduleSlot.objects.filter(weekday=day.weekday(), group__status='active')
+    if teacher is not None:
+        slots = slots.filter(teacher=teacher)
+    if student is not None:
+        slots = slots.filter(group__in=Group.objects.filter(groupmembership__student=student))
+    return (
+        slots.select_related('group__subject')
+        .annotate(student_count=Count('group__groupmembership'))
+        .order_by('start_time', 'group__name')
+    )
+
+
+def find_overlaps(slots):
+    """Pairs ``(earlier, later)`` of slots whose times overlap on the same weekday.
+
+    An interval sweep: slots are visited by (weekday, start) and only the ones
+    still running when the next starts are kept, so each slot is compared with
+    the slots it actually overlaps rather than with every other slot.
+    Touching lessons (10:30 end, 10:30 start) do not overlap.
+    """
+    pairs = []
+    running = []
+    for slot in sorted(slots, key=lambda s: (s.weekday, s.start_time, s.end_time)):
+        running = [other for other in running if other.weekday == slot.weekday and other.end_time > slot.start_time]
+        pairs.extend((other, slot) for other in running)
+        running.append(slot)
+    return pairs
+
+
+def _conflicts(kind, candidates, others, resource=lambda slot: None):
+    """Overlaps between a candidate and another slot sharing the same ``resource``."""
+    candidate_ids = {id(slot) for slot in candidates}
+    by_resource = defaultdict(list)
+    for slot in [*candidates, *others]:
+        by_resource[resource(slot)].append(slot)
+
+    conflicts = []
+    for slots in by_resource.values():
+        for first, second in find_overlaps(slots):
+            if (id(first) in candidate_ids) == (id(second) in candidate_ids):
+                continue  # two lessons of the same group, or two existing ones
+            slot, other = (first, second) if id(first) in candidate_ids else (second, first)
+            conflicts.append({'kind': kind, 'slot': slot, 'other': other})
+    return conflicts
+
+
+def group_conflicts(slots, teacher, exclude_group=None):
+    """Teacher and room double bookings the ``slots`` of a new or edited group would cause.
+
+    Only active groups hold their teacher and room; retired ones do not block.
+    """
+    if not slots:
+        return []
+    rooms = {slot.room for slot in slots if slot.room}
+    others = ScheduleSlot.objects.filter(
+        Q(teacher=teacher) | Q(room__in=rooms), weekday__in={slot.weekday for slot in slots},
+        group__status='active',
+    ).select_related('group')
+    if exclude_group is not None and exclude_group.pk:
+        others = others.exclude(group=exclude_group)
+    others = list(others)
+    teacher_id = getattr(teacher, 'pk', teacher)
+    return (
+        _conflicts('teacher', slots, [slot for slot in others if slot.teacher_id == teacher_id])
+        + _conflicts('room', [slot for slot in slots if slot.room],
+                     [slot for slot in others if slot.room in rooms], resource=lambda slot: slot.room)
+    )
+
+
+def student_conflicts(student, group):
+    """Lessons of ``group`` that overlap lessons of the student's other active groups."""
+    slots = list(group.slots.all())
+    if not slots:
+        return []
+    others = ScheduleSlot.objects.filter(
+        weekday__in={slot.weekday for slot in slots}, group__status='active',
+        group__in=Group.objects.filter(groupmembership__student=student).exclude(pk=group.pk),
+    ).select_related('group')
+    return _conflicts('student', slots, list(others))
+
+
+def _slot_label(slot):
+    return f"{DAY_NAMES[slot.weekday]} {slot.start_time:%H:%M}-{slot.end_time:%H:%M}"
+
+
+def describe_conflicts(conflicts):
+    """Human readable lines for :func:`group_conflicts` / :func:`student_conflicts` results."""
+    what = {'teacher': 'teacher is busy', 'room': 'room is taken', 'student': 'student is busy'}
+    return [
+        f"{_slot_label(c['slot'])}: {what[c['kind']]} "
+        f"({c['other'].group.name}, {_slot_label(c['other'])}{', room ' + c['other'].room if c['kind'] == 'room' else ''})"
+        for c in conflicts
+    ]
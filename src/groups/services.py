@@ -0,0 +1,91 @@
+from django.db import transaction
+
+from users.snapshots import invalidate_dashboards
+from .models import Attendance, GroupMembership
+from .rollups import apply_attendance_changes
+
+CREATED = 'created'
+UPDATED = 'updated'
+NOT_MEMBER = 'not_member'
+INVALID_STATUS = 'invalid_status'
+
+VALID_STATUSES = dict(Attendance.STATUS_CHOICES)
+
+_date_field = Attendance._meta.get_field('date')
+
+
+def write_attendance_sheet(group, date, statuses, recorded_by, notes=None):
+    """Upsert one group's attendance for ``date`` in a single transaction.
+
+    ``statuses`` maps student id -> status and ``notes`` optionally maps student
+    id -> note (notes of students left out are not touched). Membership is
+    checked against one set of member ids and all valid rows are written with a
+    single ``INSERT ... ON CONFLICT DO UPDATE``. Since that bypasses model
+    signals, the attendance rollups and dashboard snapshots are updated here.
+
+    Returns ``{student_id: outcome}`` where outcome is one of ``CREATED``,
+    ``UPDATED``, ``NOT_MEMBER`` or ``INVALID_STATUS``.
+    """
+    date = _date_field.to_python(date)
+    member_ids = set(GroupMembership.objects.filter(group=group).values_list('student_id', flat=True))
+
+    outcomes = {}
+    rows = {}
+    for raw_id, status in statuses.items():
+        try:
+            student_id = int(raw_id)
+        except (TypeError, ValueError):
+            outcomes[raw_id] = NOT_MEMBER
+            continue
+        if student_id not in member_ids:
+            outcomes[student_id] = NOT_MEMBER
+        elif status not in VALID_STATUSES:
+            outcomes[student_id] = INVALID_STATUS
+        else:
+            rows[student_id] = status
+
+    if not rows:
+        return outcomes
+
+    notes = {int(student_id): note for student_id, note in (notes or {}).items()}
+    update_fields = ['status', 'recorded_by', 'updated_at']
+    if notes:
+        update_fields.append('notes')
+
+    with transaction.atomic():
+        previous_status = {}
+        previous_notes = {}
+        for student_id, status, note in Attendance.objects.filter(
+            group=group, date=date, student_id__in=rows
+        ).values_list('student_id', 'status', 'notes'):
+            previous_status[student_id] = status
+            previous_notes[student_id] = note
+
+        Attendance.objects.bulk_create(
+            [
+                Attendance(
+                    student_id=student_id,
+                    group=group,
+                    date=date,
+                    status=status,
+                    recorded_by=recorded_by,
+                    notes=notes.get(student_id, previous_notes.get(student_id)),
+                )
+                for student_id, status in rows.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['student', 'group', 'date'],
+            update_fields=update_fields,
+        )
+
+        changes = []
+        for student_id, status in rows.items():
+            changes.append((student_id, group.id, date, status, 1))
+            if student_id in previous_status:
+                changes.append((student_id, group.id, date, previous_status[student_id], -1))
+        apply_attendance_changes(changes)
+        invalidate_dashboards(teacher_ids=[group.teacher_id], student_ids=rows)
+
+    for student_id in rows:
+        outcomes[student_id] = UPDATED if student_id in previous_status else CREATED
+    return outcomes
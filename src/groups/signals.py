@@ -0,0 +1,53 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Attendance, Group
+from .rollups import apply_attendance_changes
+from .schedule import sync_schedule_slots
+
+
+def _key(attendance):
+    return attendance.student_id, attendance.group_id, attendance.date, attendance.status
+
+
+@receiver(pre_save, sender=Attendance)
+def remember_previous_attendance(sender, instance, raw=False, **kwargs):
+    instance._rollup_previous = None
+    if instance.pk and not raw:
+        instance._rollup_previous = Attendance.objects.filter(pk=instance.pk).values_list(
+            'student_id', 'group_id', 'date', 'status'
+        ).first()
+
+
+@receiver(post_save, sender=Attendance)
+def update_rollups_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    changes = [(*_key(instance), 1)]
+    previous = getattr(instance, '_rollup_previous', None)
+    if previous:
+        changes.append((*previous, -1))
+    apply_attendance_changes(changes)
+
+
+@receiver(post_delete, sender=Attendance)
+def update_rollups_on_delete(sender, instance, **kwargs):
+    apply_attendance_changes([(*_key(instance), -1)])
+
+
+@receiver(pre_save, sender=Group)
+def remember_previous_schedule(sender, instance, raw=False, **kwargs):
+    instance._schedule_previous = None
+    if instance.pk and not raw:
+        instance._schedule_previous = Group.objects.filter(pk=instance.pk).values_list(
+            'schedule', 'teacher_id'
+        ).first()
+
+
+@receiver(post_save, sender=Group)
+def update_schedule_slots(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_schedule_previous', None)
+    if created or previous != (instance.schedule, instance.teacher_id):
+        sync_schedule_slots([instance])
@@ -1,3 +1,339 @@
+from datetime import date, time
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
+from django.urls import reverse
+
+from education.models import Subject
+from samo_edu_crm.pagination import encode_cursor, keyset_page
+from users.models import User, Teacher, Student
+from .models import Group, GroupMembership, Attendance, DailyAttendanceSummary, MonthlyStudentAttendance, ScheduleSlot
+from .rollups import counter_totals
+from .schedule import parse_schedule, classes_on
+from .services import write_attendance_sheet, CREATED, UPDATED, NOT_MEMBER, INVALID_STATUS
+
+
+class GroupTestMixin:
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', password='pass', role='admin')
+        teacher_user = User.objects.create_user(username='teacher', password='pass', role='teacher')
+        cls.teacher = Teacher.objects.create(user=teacher_user)
+        cls.subject = Subject.objects.create(name='Math', code='M1')
+        cls.group = Group.objects.create(name='Math A', subject=cls.subject, teacher=cls.teacher, schedule={})
+        cls.students = []
+        for i in range(3):
+            user = User.objects.create_user(
+                username=f'student{i}', password='pass', role='student',
+                first_name=f'First{i}', last_name=f'Last{i}',
+            )
+            student = Student.objects.create(user=user)
+            GroupMembership.objects.create(student=student, group=cls.group)
+            cls.students.append(student)
+
+
+class AttendanceRollupTests(GroupTestMixin, TestCase):
+    def mark(self, student, day, status):
+        return Attendance.objects.create(
+            student=student, group=self.group, date=day, status=status, recorded_by=self.admin
+        )
+
+    def test_create_update_delete_keep_counters_in_sync(self):
+        first = self.mark(self.students[0], date(2025, 3, 3), 'present')
+        self.mark(self.students[1], date(2025, 3, 3), 'absent')
+        self.mark(self.students[0], date(2025, 3, 10), 'late')
+
+        day = DailyAttendanceSummary.objects.get(group=self.group, date=date(2025, 3, 3))
+        self.assertEqual((day.present, day.absent, day.total), (1, 1, 2))
+        month = MonthlyStudentAttendance.objects.get(student=self.students[0], month=date(2025, 3, 1))
+        self.assertEqual((month.present, month.late), (1, 1))
+
+        first.status = 'excused'
+        first.save()
+        day.refresh_from_db()
+        self.assertEqual((day.present, day.excused), (0, 1))
+
+        first.date = date(2025, 4, 1)
+        first.save()
+        day.refresh_from_db()
+        self.assertEqual(day.total, 1)
+        self.assertEqual(
+            MonthlyStudentAttendance.objects.get(student=self.students[0], month=date(2025, 4, 1)).excused, 1
+        )
+
+        first.delete()
+        self.assertEqual(
+            counter_totals(MonthlyStudentAttendance.objects.filter(student=self.students[0]))['total'], 1
+        )
+
+    def test_string_dates_from_forms_are_accepted(self):
+        Attendance(
+            student=self.students[0], group=self.group, date='2025-05-02',
+            status='present', recorded_by=self.admin,
+        ).save()
+        self.assertTrue(
+            MonthlyStudentAttendance.objects.filter(month=date(2025, 5, 1), present=1).exists()
+        )
+
+    def test_rebuild_repairs_drift(self):
+        self.mark(self.students[0], date(2025, 3, 3), 'present')
+        self.mark(self.students[1], date(2025, 3, 3), 'present')
+        # Queryset updates bypass signals, so the rollup drifts
+        Attendance.objects.filter(student=self.students[1]).update(status='absent')
+        DailyAttendanceSummary.objects.create(group=self.group, date=date(2020, 1, 1), present=5)
+
+        call_command('rebuild_attendance_summary', stdout=StringIO())
+
+        self.assertEqual(DailyAttendanceSummary.objects.count(), 1)
+        day = DailyAttendanceSummary.objects.get()
+        self.assertEqual((day.present, day.absent), (1, 1))
+        self.assertEqual(MonthlyStudentAttendance.objects.count(), 2)
+
+
+class GroupsListTests(GroupTestMixin, TestCase):
+    def test_query_count_does_not_grow_with_groups(self):
+        for i in range(15):
+            group = Group.objects.create(name=f'Extra {i:02d}', subject=self.subject, teacher=self.teacher, schedule={})
+            for student in self.students:
+                GroupMembership.objects.create(student=student, group=group)
+                Attendance.objects.create(
+                    student=student, group=group, date=date(2025, 3, 3),
+                    status='present' if student is self.students[0] else 'absent', recorded_by=self.admin,
+                )
+        self.client.force_login(self.admin)
+
+        # session + user, 3 KPI queries, the page count and rows, subjects and teachers
+        with self.assertNumQueries(9):
+            response = self.client.get(reverse('groups_list'))
+
+        page = response.context['groups_with_attendance']
+        self.assertEqual(len(page), 12)
+        self.assertEqual(response.context['total_groups'], 16)
+        self.assertEqual(response.context['avg_attendance'], 33)
+        extra = next(item for item in page if item['group'].name == 'Extra 00')
+        self.assertEqual((extra['student_count'], extra['attendance_rate']), (3, 33))
+
+        response = self.client.get(reverse('groups_list'), {'page': 2})
+        self.assertEqual(len(response.context['groups_with_attendance']), 4)
+
+
+class AttendanceSheetTests(GroupTestMixin, TestCase):
+    def test_sheet_is_upserted_in_fixed_queries(self):
+        outsider = Student.objects.create(
+            user=User.objects.create_user(username='outsider', password='pass', role='student')
+        )
+        statuses = {str(student.id): 'present' for student in self.students}
+        statuses[str(outsider.id)] = 'present'
+
+        # members, savepoint, previous rows, upsert, daily and monthly
+        # rollup insert + update, release
+        with self.assertNumQueries(9):
+            outcomes = write_attendance_sheet(self.group, '2025-03-03', statuses, self.teacher.user)
+        self.assertEqual(outcomes[outsider.id], NOT_MEMBER)
+        self.assertEqual([outcomes[s.id] for s in self.students], [CREATED] * 3)
+
+        statuses = {student.id: 'absent' for student in self.students}
+        statuses[self.students[0].id] = 'holiday'
+        outcomes = write_attendance_sheet(self.group, date(2025, 3, 3), statuses, self.teacher.user)
+        self.assertEqual(outcomes[self.students[0].id], INVALID_STATUS)
+        self.assertEqual(outcomes[self.students[1].id], UPDATED)
+
+        self.assertEqual(Attendance.objects.count(), 3)
+        day = DailyAttendanceSummary.objects.get(group=self.group, date=date(2025, 3, 3))
+        self.assertEqual((day.present, day.absent), (1, 2))
+
+    def test_notes_are_only_overwritten_when_given(self):
+        student = self.students[0]
+        write_attendance_sheet(self.group, date(2025, 3, 3), {student.id: 'late'}, self.admin,
+                               notes={student.id: 'bus delayed'})
+        write_attendance_sheet(self.group, date(2025, 3, 3), {student.id: 'present'}, self.admin)
+        attendance = Attendance.objects.get()
+        self.assertEqual((attendance.status, attendance.notes), ('present', 'bus delayed'))
+
+    def test_save_attendance_view_reports_per_student_results(self):
+        self.client.force_login(self.teacher.user)
+        response = self.client.post(
+            reverse('save_attendance'),
+            data={'group_id': self.group.id, 'date': '2025-03-03',
+                  'attendance': {str(self.students[0].id): 'present', '999': 'present'}},
+            content_type='application/json',
+        )
+        data = response.json()
+        self.assertEqual(data['results'], {str(self.students[0].id): CREATED, '999': NOT_MEMBER})
+        self.assertEqual(data['errors'], ['Student 999 is not in this group'])
+
+
+class AttendanceExportTests(GroupTestMixin, TestCase):
+    def export(self, **params):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('attendance_export'), params)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode().splitlines()
+
+    def test_export_streams_filtered_rows_in_one_query(self):
+        write_attendance_sheet(self.group, '2025-03-03', {s.id: 'present' for s in self.students}, self.admin)
+        write_attendance_sheet(self.group, '2025-03-04', {self.students[0].id: 'late'}, self.admin)
+
+        self.client.force_login(self.admin)
+        # session + user, then a single SELECT for the rows
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('attendance_export'))
+            lines = b''.join(response.streaming_content).decode().splitlines()
+
+        self.assertEqual(lines[0], 'Student,Group,Date,Status,Recorded By,Notes')
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(lines[1], 'First0 Last0,Math A,2025-03-04,Late,admin (Admin),')
+
+        self.assertEqual(len(self.export(status='present', date='2025-03-03')), 4)
+        self.assertEqual(len(self.export(status='late')), 2)
+
+
+class KeysetPaginationTests(GroupTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for day in range(1, 21):
+            write_attendance_sheet(
+                cls.group, date(2025, 3, day), {s.id: 'present' for s in cls.students}, cls.admin
+            )
+
+    def walk(self, ordering, per_page):
+        seen = []
+        page = keyset_page(Attendance.objects.all(), ordering, {}, per_page=per_page)
+        pages = [page]
+        while page.has_next:
+            page = keyset_page(Attendance.objects.all(), ordering, {'cursor': page.next_cursor}, per_page=per_page)
+            pages.append(page)
+        for page in pages:
+            seen.extend(a.id for a in page)
+        return pages, seen
+
+    def test_pages_cover_every_row_once_in_order(self):
+        for ordering in (('-date', '-id'), ('date', '-id'), ('-date', 'id')):
+            pages, seen = self.walk(ordering, per_page=7)
+            self.assertEqual(seen, list(Attendance.objects.order_by(*ordering).values_list('id', flat=True)))
+            self.assertEqual(len(pages), 9)
+            self.assertFalse(pages[0].has_previous)
+
+            back = keyset_page(Attendance.objects.all(), ordering, {'cursor': pages[2].previous_cursor}, per_page=7)
+            self.assertEqual([a.id for a in back], [a.id for a in pages[1]])
+
+    def test_deep_page_costs_the_same_as_the_first(self):
+        self.client.force_login(self.admin)
+        url = reverse('attendance_list')
+        # session, user, page rows, capped total, groups for the filter
+        with self.assertNumQueries(5):
+            response = self.client.get(url, {'status': 'present'})
+        self.assertEqual(len(response.context['attendances']), 50)
+        self.assertEqual(response.context['cursor_page'].total, 60)
+
+        with self.assertNumQueries(5):
+            response = self.client.get(url, {'status': 'present', 'cursor': response.context['cursor_page'].next_cursor})
+        self.assertEqual(len(response.context['attendances']), 10)
+        self.assertFalse(response.context['cursor_page'].has_next)
+
+    def test_bad_cursor_falls_back_to_first_page(self):
+        page = keyset_page(Attendance.objects.all(), ('-date', '-id'), {'cursor': 'not-a-cursor'}, per_page=5)
+        self.assertEqual(page.object_list[0].date, date(2025, 3, 20))
+
+    def test_cursor_with_wrong_typed_values_falls_back_to_first_page(self):
+        self.client.force_login(self.admin)
+        first = self.client.get(reverse('attendance_list')).context['attendances']
+        for values in (['notadate', 1], [{'a': 1}, 1], ['2025-03-05', 'x'], [None, [1]]):
+            with self.subTest(values=values):
+                response = self.client.get(reverse('attendance_list'), {'cursor': encode_cursor('next', values)})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(list(response.context['attendances']), list(first))
+                self.assertFalse(response.context['cursor_page'].has_previous)
+
+
+class ScheduleTests(GroupTestMixin, TestCase):
+    def test_parse_free_text_schedules(self):
+        self.assertEqual(parse_schedule({'schedule': 'Mon, Wed, Fri 09:00-10:30'}), [
+            (day, time(9), time(10, 30), '') for day in (0, 2, 4)
+        ])
+        self.assertEqual(parse_schedule({'schedule_text': 'Tue 2pm; Thu 16:00-17:00 Room 12'}), [
+            (1, time(14), time(15, 30), '12'), (3, time(16), time(17), '12'),
+        ])
+        self.assertEqual(parse_schedule({'schedule': 'Mon-Wed 9.00-10.00', 'room': 'A1'}), [
+            (day, time(9), time(10), 'A1') for day in (0, 1, 2)
+        ])
+        self.assertEqual(parse_schedule({'schedule': 'Group 5, ask the office'}), [])
+        self.assertEqual(parse_schedule({}), [])
+
+    def test_slots_follow_group_schedule_and_teacher(self):
+        self.group.schedule = {'schedule': 'Mon, Thu 09:00-10:30'}
+        self.group.save()
+        self.assertEqual(list(self.group.slots.values_list('weekday', 'teacher_id')), [(0, self.teacher.pk), (3, self.teacher.pk)])
+
+        other = Teacher.objects.create(user=User.objects.create_user(username='t2', password='pass', role='teacher'))
+        self.group.teacher = other
+        self.group.schedule = {'schedule': 'Sat 10:00-11:00'}
+        self.group.save()
+        self.assertEqual(list(self.group.slots.values_list('weekday', 'teacher_id')), [(5, other.pk)])
+
+    def test_todays_classes_is_one_query(self):
+        self.group.schedule = {'schedule': 'Mon 09:00-10:30'}
+        self.group.save()
+        Group.objects.create(name='Math B', subject=self.subject, teacher=self.teacher, schedule={'schedule': 'Tue 09:00'})
+        monday = date(2025, 3, 3)
+        with self.assertNumQueries(1):
+            teacher_classes = classes_on(monday, teacher=self.teacher)
+            self.assertEqual([(s.group.name, s.student_count) for s in teacher_classes], [('Math A', 3)])
+        with self.assertNumQueries(1):
+            self.assertEqual([s.group_id for s in classes_on(monday, student=self.students[0])], [self.group.pk])
+        self.assertFalse(classes_on(date(2025, 3, 5), teacher=self.teacher).exists())
+
+    def test_teacher_and_room_double_booking_is_refused(self):
+        self.group.schedule = {'schedule': 'Mon, Wed 09:00-10:30', 'room': '204'}
+        self.group.save()
+        self.client.force_login(self.teacher.user)
+        url = reverse('add_group')
+
+        response = self.client.post(url, {'name': 'Clash', 'subject': self.subject.pk, 'schedule': 'Wed 10:00-11:00'})
+        self.assertFalse(response.json()['success'])
+        self.assertIn('teacher is busy', response.json()['error'])
+
+        # Back to back is fine
+        response = self.client.post(url, {'name': 'Next', 'subject': self.subject.pk, 'schedule': 'Wed 10:30-12:00'})
+        self.assertTrue(response.json()['success'])
+
+        other = Teacher.objects.create(user=User.objects.create_user(username='t2', password='pass', role='teacher'))
+        self.client.force_login(other.user)
+        response = self.client.post(url, {
+            'name': 'Same room', 'subject': self.subject.pk, 'schedule': 'Mon 10:00-11:00', 'room': '204',
+        })
+        self.assertIn('room is taken', response.json()['error'])
+        self.assertFalse(Group.objects.filter(name__in=['Clash', 'Same room']).exists())
+
+    def test_student_cannot_join_overlapping_group(self):
+        self.group.schedule = {'schedule': 'Tue 14:00-15:30'}
+        self.group.save()
+        other = Teacher.objects.create(user=User.objects.create_user(username='t2', password='pass', role='teacher'))
+        clash = Group.objects.create(name='Physics', subject=self.subject, teacher=other, schedule={'schedule': 'Tue 15:00-16:00'})
+        free = Group.objects.create(name='English', subject=self.subject, teacher=other, schedule={'schedule': 'Tue 16:00-17:00'})
+        self.client.force_login(self.admin)
+
+        response = self.client.post(reverse('add_student_to_group', args=[clash.pk]), {'student_id': self.students[0].pk})
+        self.assertIn('student is busy', response.json()['error'])
+        response = self.client.post(reverse('add_student_to_group', args=[free.pk]), {'student_id': self.students[0].pk})
+        self.assertTrue(response.json()['success'])
+        self.assertEqual(ScheduleSlot.objects.filter(group__groupmembership__student=self.students[0]).count(), 2)
+
+    def test_retired_groups_do_not_block_anyone(self):
+        self.group.schedule = {'schedule': 'Mon 09:00-10:30', 'room': '204'}
+        self.group.status = 'completed'
+        self.group.save()
+        self.client.force_login(self.teacher.user)
+
+        response = self.client.post(reverse('add_group'), {
+            'name': 'Successor', 'subject': self.subject.pk, 'schedule': 'Mon 09:00-10:30', 'room': '204',
+        })
+        self.assertTrue(response.json()['success'])
 
-# Create your tests here.
+        other = Teacher.objects.create(user=User.objects.create_user(username='t2', password='pass', role='teacher'))
+        physics = Group.objects.create(name='Physics', subject=self.subject, teacher=other, schedule={'schedule': 'Mon 10:00-11:00'})
+        self.client.force_login(self.admin)
+        response = self.client.post(reverse('add_student_to_group', args=[physics.pk]), {'student_id': self.students[0].pk})
+        self.assertTrue(response.json()['success'])
@@ -1,28 +1,44 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.http import JsonResponse
 from django.contrib import messages
-from .models import Group, GroupMembership, Attendance
-from users.models import Teacher, Student
+from django.core.paginator import Paginator
+from django.db.models import Count, Sum
+from .models import Group, GroupMembership, Attendance, DailyAttendanceSummary, MonthlyStudentAttendance
+from .rollups import counter_totals, counters_by, attendance_rate, annotate_group_attendance
+from .services import write_attendance_sheet, CREATED, UPDATED, NOT_MEMBER, INVALID_STATUS
+from .schedule import build_slots, group_conflicts, student_conflicts, describe_conflicts
+from users.models import Teacher, Student, User
+from users.search import search_people
 from education.models import Subject
+from exams.models import StudentSubjectPerformance, GroupSubjectPerformance
+from samo_edu_crm import exports
+from samo_edu_crm.pagination import keyset_page
+from samo_edu_crm.reports import report_view
 import json
 
+GROUPS_PER_PAGE = 12
 
-def groups_list(request):
-    # Statistik ma'lumotlar
-    total_groups = Group.objects.count()
-    total_students = Student.objects.count()
 
-    # O'rtacha davomatni hisoblash (soddalashtirilgan)
-    attendance_records = Attendance.objects.all()
-    avg_attendance = 0
-    if attendance_records.exists():
-        present_count = attendance_records.filter(status='present').count()
-        avg_attendance = round((present_count / attendance_records.count()) * 100)
+def groups_list(request):
+    # Guruhlar va ularning davomat ko'rsatkichlari (bitta so'rovda)
+    all_groups = annotate_group_attendance(Group.objects.all())
+
+    # Statistik ma'lumotlar: guruhlar soni va o'rtacha davomat bitta aggregate bilan
+    totals = all_groups.aggregate(
+        total_groups=Count('id'),
+        present=Sum('present_attendance'),
+        total=Sum('total_attendance'),
+    )
+    total_groups = totals['total_groups']
+    avg_attendance = attendance_rate({'present': totals['present'] or 0, 'total': totals['total'] or 0})
 
+    total_students = Student.objects.count()
     active_teachers = Teacher.objects.filter(user__is_active=True).count()
 
     # Guruhlarni olish
-    groups = Group.objects.select_related('teacher', 'subject').prefetch_related('students').all()
+    groups = all_groups.select_related('teacher__user', 'subject').annotate(
+        student_count=Count('groupmembership', distinct=True),
+    )
 
     # Filtrlash
     status_filter = request.GET.get('status', 'all')
@@ -44,19 +60,19 @@ def groups_list(request):
     if teacher_filter != 'all':
         groups = groups.filter(teacher__user__first_name=teacher_filter)
 
-    # Har bir guruh uchun davomatni hisoblash
-    groups_with_attendance = []
-    for group in groups:
-        group_attendance = Attendance.objects.filter(group=group)
-        attendance_rate = 0
-        if group_attendance.exists():
-            present_count = group_attendance.filter(status='present').count()
-            attendance_rate = round((present_count / group_attendance.count()) * 100)
+    # Sahifalash (server tomonida)
+    paginator = Paginator(groups.order_by('name', 'id'), GROUPS_PER_PAGE)
+    page_obj = paginator.get_page(request.GET.get('page'))
 
+    groups_with_attendance = []
+    for group in page_obj:
         groups_with_attendance.append({
             'group': group,
-            'attendance_rate': attendance_rate,
-            'student_count': group.students.count()
+            'attendance_rate': attendance_rate({
+                'present': group.present_attendance,
+                'total': group.total_attendance,
+            }),
+            'student_count': group.student_count,
         })
 
     context = {
@@ -65,6 +81,8 @@ def groups_list(request):
         'avg_attendance': avg_attendance,
         'active_teachers': active_teachers,
         'groups_with_attendance': groups_with_attendance,
+        'page_obj': page_obj,
+        'is_paginated': page_obj.has_other_pages(),
         'subjects': Subject.objects.all(),
         'teachers': Teacher.objects.select_related('user').all(),
         'status_filter': status_filter,
@@ -90,13 +108,19 @@ def add_group(request):
 
             # Schedule JSON formatiga o'tkazish
             schedule = {"schedule": schedule_data}
+            room = request.POST.get('room', '').strip()
+            if room:
+                schedule['room'] = room
 
-            group = Group.objects.create(
-                name=name,
-                subject=subject,
-                teacher=teacher,
-                schedule=schedule
-            )
+            group = Group(name=name, subject=subject, teacher=teacher, schedule=schedule)
+
+            # O'qituvchi yoki xona band bo'lsa guruh yaratilmaydi
+            conflicts = group_conflicts(build_slots(group), teacher)
+            if conflicts:
+                messages.error(request, 'Jadval to\'qnashuvi: ' + '; '.join(describe_conflicts(conflicts)))
+                return redirect('groups_list')
+
+            group.save()
 
             messages.success(request, 'Guruh muvaffaqiyatli qo\'shildi!')
             return redirect('groups_list')
@@ -120,7 +144,17 @@ def edit_group(request, group_id):
 
             group.subject = get_object_or_404(Subject, id=subject_id)
             group.teacher = get_object_or_404(Teacher, id=teacher_id)
+            # Xona formada bo'lmasa avvalgisi saqlanadi
+            previous_room = group.schedule.get('room', '') if isinstance(group.schedule, dict) else ''
+            room = request.POST.get('room', previous_room).strip()
             group.schedule = {"schedule": schedule_data}
+            if room:
+                group.schedule['room'] = room
+
+            conflicts = group_conflicts(build_slots(group), group.teacher, exclude_group=group)
+            if conflicts:
+                messages.error(request, 'Jadval to\'qnashuvi: ' + '; '.join(describe_conflicts(conflicts)))
+                return redirect('groups_list')
 
             group.save()
 
@@ -177,33 +211,48 @@ from django.contrib.auth.decorators import login_required
 from django.db.models import Q
 from .models import Attendance, Group, GroupMembership
 from users.models import Student, Teacher
-import csv
 from datetime import datetime
 
 
-@login_required
-def attendance_list(request):
-    # Filtrlarni olish
-    group_filter = request.GET.get('group', '')
-    date_filter = request.GET.get('date', '')
-    status_filter = request.GET.get('status', '')
+ATTENDANCE_ORDERING = ('-date', '-id')
 
-    # Attendance obyektlarini olish
-    attendances = Attendance.objects.all().select_related('student', 'group', 'recorded_by')
 
-    # Filtrlash
+def filter_attendances(attendances, params):
+    """Davomat ro'yxati va eksport uchun umumiy filtrlar (group, date, status)."""
+    group_filter = params.get('group', '')
+    date_filter = params.get('date', '')
+    status_filter = params.get('status', '')
+
     if group_filter:
         attendances = attendances.filter(group_id=group_filter)
     if date_filter:
         attendances = attendances.filter(date=date_filter)
     if status_filter:
         attendances = attendances.filter(status=status_filter)
+    return attendances
+
+
+@login_required
+@report_view
+def attendance_list(request):
+    # Filtrlarni olish
+    group_filter = request.GET.get('group', '')
+    date_filter = request.GET.get('date', '')
+    status_filter = request.GET.get('status', '')
+
+    # Attendance obyektlarini olish va filtrlash
+    attendances = filter_attendances(
+        Attendance.objects.all().select_related('student__user', 'group', 'recorded_by'), request.GET
+    )
+    # Keyset sahifalash: (-date, -id) bo'yicha, OFFSET ishlatilmaydi
+    cursor_page = keyset_page(attendances, ATTENDANCE_ORDERING, request.GET)
 
     # Guruhlarni olish (filter uchun)
     groups = Group.objects.all()
 
     context = {
-        'attendances': attendances,
+        'attendances': cursor_page.object_list,
+        'cursor_page': cursor_page,
         'groups': groups,
         'group_filter': group_filter,
         'date_filter': date_filter,
@@ -235,17 +284,17 @@ def attendance_add(request):
             # Hozirgi foydalanuvchi (admin yoki teacher bo'lishi mumkin)
             recorded_by = request.user
 
-            attendance = Attendance(
-                student_id=student_id,
-                group_id=group_id,
-                date=date,
-                status=status,
-                recorded_by=recorded_by,
-                notes=notes
-            )
-            attendance.save()
+            group = Group.objects.get(id=group_id)
+            outcome = write_attendance_sheet(
+                group, date, {student_id: status}, recorded_by, notes={student_id: notes}
+            )[int(student_id)]
 
-            return JsonResponse({'success': True})
+            if outcome == NOT_MEMBER:
+                return JsonResponse({'success': False, 'error': 'Student is not a member of this group'})
+            if outcome == INVALID_STATUS:
+                return JsonResponse({'success': False, 'error': 'Invalid status'})
+
+            return JsonResponse({'success': True, 'created': outcome == CREATED})
 
         except Exception as e:
             return JsonResponse({'success': False, 'error': str(e)})
@@ -319,40 +368,25 @@ def attendance_delete(request, pk):
     return JsonResponse({'success': False, 'error': 'Invalid request method'})
 
 
-@login_required
-def attendance_export(request):
-    # Filtrlarni olish
-    group_filter = request.GET.get('group', '')
-    date_filter = request.GET.get('date', '')
-    status_filter = request.GET.get('status', '')
-
-    attendances = Attendance.objects.all().select_related('student', 'group', 'recorded_by')
-
-    if group_filter:
-        attendances = attendances.filter(group_id=group_filter)
-    if date_filter:
-        attendances = attendances.filter(date=date_filter)
-    if status_filter:
-        attendances = attendances.filter(status=status_filter)
-
-    response = HttpResponse(content_type='text/csv')
-    response[
-        'Content-Disposition'] = f'attachment; filename="attendance_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-
-    writer = csv.writer(response)
-    writer.writerow(['Student', 'Group', 'Date', 'Status', 'Recorded By', 'Notes'])
+ATTENDANCE_EXPORT_COLUMNS = [
+    exports.person('Student', 'student__user__'),
+    exports.column('Group', 'group__name'),
+    exports.column('Date', 'date'),
+    exports.choice('Status', 'status', Attendance.STATUS_CHOICES),
+    exports.column(
+        'Recorded By', 'recorded_by__username', 'recorded_by__role',
+        format=lambda username, role: f"{username} ({dict(User.ROLE_CHOICES).get(role, role)})",
+    ),
+    exports.column('Notes', 'notes'),
+]
 
-    for attendance in attendances:
-        writer.writerow([
-            str(attendance.student),
-            attendance.group.name,
-            attendance.date,
-            attendance.get_status_display(),
-            str(attendance.recorded_by),
-            attendance.notes
-        ])
 
-    return response
+@login_required
+@report_view
+def attendance_export(request):
+    # Ro'yxatdagi filtrlar bilan, qatorlarni oqim (stream) qilib yuboramiz
+    attendances = filter_attendances(Attendance.objects.order_by(*ATTENDANCE_ORDERING), request.GET)
+    return exports.csv_response(attendances, ATTENDANCE_EXPORT_COLUMNS, 'attendance')
 
 
 # teacher attendance
@@ -395,20 +429,20 @@ def attendance_view(request):
     if status_filter:
         attendance_records = attendance_records.filter(status=status_filter)
 
-    # Calculate statistics for current month
-    current_month = timezone.now().month
-    current_year = timezone.now().year
+    # Calculate statistics for current month (date range, so the (group, date) index is used)
+    month_start = timezone.now().date().replace(day=1)
+    next_month = (month_start + timedelta(days=32)).replace(day=1)
 
-    monthly_attendance = Attendance.objects.filter(
+    monthly_attendance = counter_totals(DailyAttendanceSummary.objects.filter(
         group__teacher=teacher,
-        date__year=current_year,
-        date__month=current_month
-    )
+        date__gte=month_start,
+        date__lt=next_month
+    ))
 
-    present_count = monthly_attendance.filter(status='present').count()
-    absent_count = monthly_attendance.filter(status='absent').count()
-    late_count = monthly_attendance.filter(status='late').count()
-    total_monthly = monthly_attendance.count()
+    present_count = monthly_attendance['present']
+    absent_count = monthly_attendance['absent']
+    late_count = monthly_attendance['late']
+    total_monthly = monthly_attendance['total']
 
     overall_attendance_rate = round((present_count / total_monthly * 100) if total_monthly > 0 else 0, 1)
     absences_this_month = absent_count
@@ -486,45 +520,31 @@ def save_attendance(request):
 
             group = Group.objects.get(id=group_id, teacher=request.user.teacher_profile)
 
+            # Butun varaq bitta tranzaksiyada yoziladi
+            results = write_attendance_sheet(group, date, attendance_data, request.user)
+
             saved_count = 0
             errors = []
-
-            for student_id, status in attendance_data.items():
-                try:
-                    student = Student.objects.get(id=student_id)
-
-                    # Check if student is in the group
-                    if not GroupMembership.objects.filter(group=group, student=student).exists():
-                        errors.append(f"Student {student_id} is not in this group")
-                        continue
-
-                    # Create or update attendance
-                    attendance, created = Attendance.objects.update_or_create(
-                        student=student,
-                        group=group,
-                        date=date,
-                        defaults={
-                            'status': status,
-                            'recorded_by': request.user
-                        }
-                    )
+            for student_id, outcome in results.items():
+                if outcome in (CREATED, UPDATED):
                     saved_count += 1
-
-                except Student.DoesNotExist:
-                    errors.append(f"Student {student_id} not found")
-                except Exception as e:
-                    errors.append(f"Error saving attendance for student {student_id}: {str(e)}")
+                elif outcome == NOT_MEMBER:
+                    errors.append(f"Student {student_id} is not in this group")
+                else:
+                    errors.append(f"Invalid status for student {student_id}")
 
             if errors:
                 return JsonResponse({
                     'success': True,
                     'message': f'Attendance saved for {saved_count} students, but with some errors',
-                    'errors': errors
+                    'errors': errors,
+                    'results': results,
                 })
             else:
                 return JsonResponse({
                     'success': True,
-                    'message': f'Attendance successfully saved for {saved_count} students'
+                    'message': f'Attendance successfully saved for {saved_count} students',
+                    'results': results,
                 })
 
         except Group.DoesNotExist:
@@ -551,7 +571,7 @@ from users.models import Teacher, Student
 def teacher_groups(request):
     # Foydalanuvchi teacher ekanligini tekshirish
     try:
-        teacher = Teacher.objects.get(user=request.user)
+        teacher = request.user.teacher_profile
     except Teacher.DoesNotExist:
         # Agar teacher bo'lmasa, boshqa sahifaga yo'naltirish
         return redirect('dashboard')
@@ -601,7 +621,7 @@ def add_group(request):
     if request.method == 'POST':
         # Foydalanuvchi teacher ekanligini tekshirish
         try:
-            teacher = Teacher.objects.get(user=request.user)
+            teacher = request.user.teacher_profile
         except Teacher.DoesNotExist:
             return JsonResponse({'success': False, 'error': 'Only teachers can create groups'})
 
@@ -617,14 +637,23 @@ def add_group(request):
         except Subject.DoesNotExist:
             return JsonResponse({'success': False, 'error': 'Invalid subject'})
 
+        schedule = {'schedule_text': schedule}  # Soddalashtirilgan JSON
+        room = request.POST.get('room', '').strip()
+        if room:
+            schedule['room'] = room
+
+        group = Group(name=name, subject=subject, teacher=teacher, schedule=schedule, status='active')
+
+        # O'qituvchi yoki xona shu vaqtda band bo'lmasligi kerak
+        conflicts = group_conflicts(build_slots(group), teacher)
+        if conflicts:
+            return JsonResponse({
+                'success': False,
+                'error': 'Schedule conflict: ' + '; '.join(describe_conflicts(conflicts)),
+            })
+
         # Yangi guruh yaratish
-        group = Group.objects.create(
-            name=name,
-            subject=subject,
-            teacher=teacher,
-            schedule={'schedule_text': schedule},  # Soddalashtirilgan JSON
-            status='active'
-        )
+        group.save()
 
         return JsonResponse({'success': True, 'group_id': group.id})
 
@@ -635,7 +664,7 @@ def add_group(request):
 def group_detail(request, group_id):
     # Foydalanuvchi teacher ekanligini tekshirish
     try:
-        teacher = Teacher.objects.get(user=request.user)
+        teacher = request.user.teacher_profile
     except Teacher.DoesNotExist:
         return redirect('teacher_groups')
 
@@ -667,7 +696,7 @@ def record_attendance(request, group_id):
     if request.method == 'POST':
         # Foydalanuvchi teacher ekanligini tekshirish
         try:
-            teacher = Teacher.objects.get(user=request.user)
+            teacher = request.user.teacher_profile
         except Teacher.DoesNotExist:
             return JsonResponse({'success': False, 'error': 'Only teachers can record attendance'})
 
@@ -684,27 +713,21 @@ def record_attendance(request, group_id):
 
         try:
             date = datetime.strptime(date_str, '%Y-%m-%d').date()
-            student = Student.objects.get(id=student_id)
-        except (ValueError, Student.DoesNotExist):
+            student_id = int(student_id)
+        except ValueError:
             return JsonResponse({'success': False, 'error': 'Invalid date or student'})
 
-        # Student guruh a'zosi ekanligini tekshirish
-        if not GroupMembership.objects.filter(group=group, student=student).exists():
-            return JsonResponse({'success': False, 'error': 'Student is not a member of this group'})
+        # Davomatni yaratish yoki yangilash (a'zolik ham shu yerda tekshiriladi)
+        outcome = write_attendance_sheet(
+            group, date, {student_id: status}, request.user, notes={student_id: notes}
+        )[student_id]
 
-        # Davomatni yaratish yoki yangilash
-        attendance, created = Attendance.objects.update_or_create(
-            student=student,
-            group=group,
-            date=date,
-            defaults={
-                'status': status,
-                'notes': notes,
-                'recorded_by': request.user
-            }
-        )
+        if outcome == NOT_MEMBER:
+            return JsonResponse({'success': False, 'error': 'Student is not a member of this group'})
+        if outcome == INVALID_STATUS:
+            return JsonResponse({'success': False, 'error': 'Invalid status'})
 
-        return JsonResponse({'success': True, 'created': created})
+        return JsonResponse({'success': True, 'created': outcome == CREATED})
 
     return JsonResponse({'success': False, 'error': 'Invalid request method'})
 
@@ -732,7 +755,7 @@ def group_detail(request, group_id):
 
     # Foydalanuvchi teacher ekanligini tekshirish
     try:
-        teacher = Teacher.objects.get(user=request.user)
+        teacher = request.user.teacher_profile
         # Faqat o'z guruhini ko'ra olishi uchun
         if group.teacher != teacher:
             return redirect('groups:teacher_groups')
@@ -758,6 +781,15 @@ def group_detail(request, group_id):
         excused=Count('id', filter=Q(status='excused'))
     )
 
+    # O'rtacha ballar imtihon natijalari rollup jadvallaridan (guruh fani bo'yicha)
+    student_performance = {
+        row.student_id: row
+        for row in StudentSubjectPerformance.objects.filter(
+            subject_id=group.subject_id, student_id__in=members.values('student_id'),
+        )
+    }
+    group_performance = GroupSubjectPerformance.objects.filter(group=group, subject_id=group.subject_id).first()
+
     # Har bir talaba uchun statistikalar
     for member in members:
         student_attendance = Attendance.objects.filter(
@@ -779,8 +811,9 @@ def group_detail(request, group_id):
             (present_classes + (late_classes * 0.5)) / total_classes * 100, 1
         ) if total_classes > 0 else 0
 
-        # O'rtacha ball (soddalashtirilgan)
-        member.average_score = 85 + (member.student.id % 15)  # Tasodifiy qiymat
+        # O'rtacha ball (natijasi yo'q talabada None)
+        performance = student_performance.get(member.student_id)
+        member.average_score = round(performance.average_percentage, 1) if performance else None
 
     # Umumiy statistikalar
     total_students = members.count()
@@ -793,9 +826,7 @@ def group_detail(request, group_id):
     else:
         overall_attendance = 0
 
-    overall_average_score = round(
-        sum(member.average_score for member in members) / total_students, 1
-    ) if total_students > 0 else 0
+    overall_average_score = round(group_performance.average_percentage, 1) if group_performance else 0
 
     # Qidiruv funksiyasi
     search_query = request.GET.get('search', '')
@@ -835,6 +866,14 @@ def add_student_to_group(request, group_id):
                     'error': 'Student is already in this group'
                 })
 
+            # Talabaning boshqa guruhlari bilan dars vaqti to'qnashmasligi kerak
+            conflicts = student_conflicts(student, group)
+            if conflicts:
+                return JsonResponse({
+                    'success': False,
+                    'error': 'Schedule conflict: ' + '; '.join(describe_conflicts(conflicts)),
+                })
+
             # Talabani guruhga qo'shish
             GroupMembership.objects.create(
                 group=group,
@@ -897,14 +936,11 @@ def get_available_students(request, group_id):
 
         print(f"Total available students before search: {available_students.count()}")  # Debug
 
-        # Apply search filter if provided
+        # Apply search filter if provided (best matches first)
         if search_query:
-            available_students = available_students.filter(
-                Q(user__first_name__icontains=search_query) |
-                Q(user__last_name__icontains=search_query) |
-                Q(user__email__icontains=search_query) |
-                Q(user__username__icontains=search_query)
-            )
+            available_students = search_people(
+                available_students, search_query, user_field='user'
+            ).order_by('-search_rank', 'user__first_name', 'id')
 
         students_data = []
         for student in available_students:
@@ -967,11 +1003,9 @@ def available_students_search(request, group_id):
             ).values_list('student_id', flat=True)
 
             # 3. Search for students NOT in this group
-            students = Student.objects.filter(
-                Q(user__first_name__icontains=search_term) |
-                Q(user__last_name__icontains=search_term) |
-                Q(user__email__icontains=search_term)
-            ).exclude(id__in=current_student_ids).select_related('user')[:10]
+            students = search_people(
+                Student.objects.exclude(id__in=current_student_ids), search_term, user_field='user'
+            ).select_related('user').order_by('-search_rank', 'user__first_name', 'id')[:10]
 
             # 4. Format results
             results = []
@@ -1011,22 +1045,18 @@ def student_groups(request):
         # Get student's groups through GroupMembership
         memberships = GroupMembership.objects.filter(student=student).select_related('group')
 
+        # Attendance counters per group from the monthly rollup
+        student_rollups = MonthlyStudentAttendance.objects.filter(student=student)
+        group_counts = counters_by(student_rollups, 'group_id')
+
         # Get groups with additional data
         groups_data = []
         for membership in memberships:
             group = membership.group
 
             # Get attendance rate for this student in this group
-            attendance_records = Attendance.objects.filter(
-                student=student,
-                group=group
-            )
-
-            if attendance_records.exists():
-                present_count = attendance_records.filter(status='present').count()
-                attendance_rate = round((present_count / attendance_records.count()) * 100)
-            else:
-                attendance_rate = 0
+            counts = group_counts.get(group.id)
+            group_attendance_rate = attendance_rate(counts) if counts else 0
 
             # Get upcoming exams for this group
             upcoming_exams = Exam.objects.filter(
@@ -1043,7 +1073,7 @@ def student_groups(request):
             groups_data.append({
                 'group': group,
                 'membership': membership,
-                'attendance_rate': attendance_rate,
+                'attendance_rate': group_attendance_rate,
                 'upcoming_exams': upcoming_exams,
                 'pending_homework': pending_homework,
                 'homework_count': pending_homework.count()
@@ -1060,11 +1090,7 @@ def student_groups(request):
         ).order_by('date')[:2]
 
         # Calculate overall attendance rate
-        all_attendance = Attendance.objects.filter(student=student)
-        overall_attendance_rate = 0
-        if all_attendance.exists():
-            present_count = all_attendance.filter(status='present').count()
-            overall_attendance_rate = round((present_count / all_attendance.count()) * 100)
+        overall_attendance_rate = attendance_rate(counter_totals(student_rollups))
 
         any_homework = any([data['homework_count'] > 0 for data in groups_data])
         any_exams = any([data['upcoming_exams'].exists() for data in groups_data])
@@ -1136,14 +1162,14 @@ def student_attendance(request):
             )
 
         # Calculate statistics
-        total_attendance = Attendance.objects.filter(student=student)
-        present_count = total_attendance.filter(status='present').count()
-        absent_count = total_attendance.filter(status='absent').count()
-        late_count = total_attendance.filter(status='late').count()
-        excused_count = total_attendance.filter(status='excused').count()
-
-        total_records = total_attendance.count()
-        overall_attendance_rate = round((present_count / total_records * 100)) if total_records > 0 else 0
+        totals = counter_totals(MonthlyStudentAttendance.objects.filter(student=student))
+        present_count = totals['present']
+        absent_count = totals['absent']
+        late_count = totals['late']
+        excused_count = totals['excused']
+
+        total_records = totals['total']
+        overall_attendance_rate = attendance_rate(totals)
 
         # Get unique subjects for filter dropdown
         subjects = Subject.objects.filter(
@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models import Fee
+from .services import mark_fees_paid
 
 @admin.register(Fee)
 class FeeAdmin(admin.ModelAdmin):
@@ -10,6 +11,6 @@ class FeeAdmin(admin.ModelAdmin):
     actions = ['mark_as_paid']
 
     def mark_as_paid(self, request, queryset):
-        updated = queryset.update(status='paid')
+        updated = mark_fees_paid(queryset)
         self.message_user(request, f'{updated} fees marked as paid.')
     mark_as_paid.short_description = "Mark selected fees as paid"
\ No newline at end of file
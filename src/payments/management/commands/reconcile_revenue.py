@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from payments.rollups import reconcile_monthly_revenue
+
+
+class Command(BaseCommand):
+    help = "Compare the monthly revenue rollup with the Fee table and fix any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report the rows that differ')
+
+    def handle(self, *args, **options):
+        drift = reconcile_monthly_revenue(dry_run=options['dry_run'])
+        for (year, month, status), stored, expected in drift:
+            self.stdout.write(f"{year}-{month:02d} {status}: stored {stored}, expected {expected}")
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("Monthly revenue matches the fees"))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING(f"{len(drift)} month/status rows differ (dry run, nothing changed)"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Fixed {len(drift)} month/status rows"))
@@ -0,0 +1,22 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from payments.services import sweep_overdue_fees
+
+
+class Command(BaseCommand):
+    help = "Mark pending fees whose due date has passed as overdue (safe to run from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--today', help='Treat this date (YYYY-MM-DD) as today')
+
+    def handle(self, *args, **options):
+        today = None
+        if options['today']:
+            try:
+                today = date.fromisoformat(options['today'])
+            except ValueError:
+                raise CommandError(f"--today must be YYYY-MM-DD, got {options['today']!r}")
+        changed = sweep_overdue_fees(today=today)
+        self.stdout.write(self.style.SUCCESS(f"Marked {changed} fee(s) overdue"))
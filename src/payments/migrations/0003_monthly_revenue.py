@@ -0,0 +1,41 @@
+# Generated by Django 5.2.6 on 2026-10-18 14:46
+
+from django.db import migrations, models
+
+from payments.rollups import monthly_revenue_rows
+
+
+def backfill_monthly_revenue(apps, schema_editor):
+    Fee = apps.get_model('payments', 'Fee')
+    MonthlyRevenue = apps.get_model('payments', 'MonthlyRevenue')
+    MonthlyRevenue.objects.bulk_create(
+        (MonthlyRevenue(year=year, month=month, status=status, amount=amount, fee_count=count)
+         for (year, month, status), (amount, count) in monthly_revenue_rows(Fee.objects.all()).items()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyRevenue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('status', models.CharField(choices=[('paid', 'Paid'), ('pending', 'Pending'), ('overdue', 'Overdue')], max_length=10)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('fee_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-year', '-month', 'status'],
+                'unique_together': {('year', 'month', 'status')},
+            },
+        ),
+        migrations.RunPython(backfill_monthly_revenue, migrations.RunPython.noop),
+    ]
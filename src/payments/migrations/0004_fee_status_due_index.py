@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 14:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0003_monthly_revenue'),
+        ('users', '0002_person_search_tokens'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='fee',
+            index=models.Index(fields=['status', 'due_date'], name='payments_fee_status_due_idx'),
+        ),
+    ]
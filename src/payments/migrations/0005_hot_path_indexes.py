@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 14:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0004_fee_status_due_index'),
+        ('users', '0002_person_search_tokens'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='fee',
+            index=models.Index(fields=['student', 'status'], name='payments_fee_student_st_idx'),
+        ),
+    ]
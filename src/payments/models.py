@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 
 class Fee(models.Model):
     student = models.ForeignKey('users.Student', on_delete=models.CASCADE)
@@ -11,5 +11,38 @@ class Fee(models.Model):
         ('overdue', 'Overdue'),
     ), default='pending')
 
+    class Meta:
+        indexes = [
+            # sweep_overdue_fees: status = 'pending' AND due_date < today
+            models.Index(fields=['status', 'due_date'], name='payments_fee_status_due_idx'),
+            # Student payment pages
+            models.Index(fields=['student', 'status'], name='payments_fee_student_st_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Keep the monthly revenue rollup (updated by signals) in the same transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.student} - {self.amount} ({self.status})"
+
+
+class MonthlyRevenue(models.Model):
+    """Fee totals per calendar month and status, kept in sync with Fee.
+
+    Paid fees count in the month they were paid, the others in the month they
+    are due.
+    """
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    status = models.CharField(max_length=10, choices=Fee._meta.get_field('status').choices)
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    fee_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['year', 'month', 'status']
+        ordering = ['-year', '-month', 'status']
+
     def __str__(self):
-        return f"{self.student} - {self.amount} ({self.status})"
\ No newline at end of file
+        return f"{self.year}-{self.month:02d} {self.status}: {self.amount}"
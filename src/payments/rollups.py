@@ -0,0 +1,107 @@
+"""Monthly revenue rollup.
+
+``MonthlyRevenue`` keeps the fee total and count per (year, month, status):
+paid fees in the month they were paid, the others in the month they are due.
+Fee signals apply +/- deltas in the same transaction as the write;
+``reconcile_monthly_revenue`` compares the table with the Fee rows and
+repairs any drift (e.g. after raw SQL or a bulk load).
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, Count, DateField, F, IntegerField, Q, Sum, When
+from django.db.models.functions import ExtractMonth, ExtractYear, Greatest
+
+from .models import Fee, MonthlyRevenue
+
+_date_field = Fee._meta.get_field('due_date')
+
+
+def revenue_bucket(status, due_date, paid_date):
+    """``(year, month, status)`` a fee counts towards."""
+    day = _date_field.to_python(paid_date if status == 'paid' and paid_date else due_date)
+    return day.year, day.month, status
+
+
+def fee_revenue_key(fee):
+    """``(bucket, amount)`` of a Fee instance; dates and amounts may still be strings from a form."""
+    return revenue_bucket(fee.status, fee.due_date, fee.paid_date), Decimal(str(fee.amount))
+
+
+def apply_revenue_changes(changes):
+    """Apply ``(bucket, amount, count)`` changes: signed amounts and fee counts to add.
+
+    A new fee is ``(bucket, amount, 1)``, a removed one ``(bucket, -amount, -1)``.
+    Callers writing Fee rows should run this inside the same transaction as
+    the write.
+    """
+    deltas = defaultdict(lambda: [Decimal(0), 0])
+    for bucket, amount, count in changes:
+        deltas[bucket][0] += amount
+        deltas[bucket][1] += count
+    deltas = {bucket: (amount, count) for bucket, (amount, count) in deltas.items() if amount or count}
+    if not deltas:
+        return
+
+    with transaction.atomic(savepoint=False):
+        MonthlyRevenue.objects.bulk_create(
+            [MonthlyRevenue(year=year, month=month, status=status)
+             for (year, month, status), (_, count) in deltas.items() if count > 0],
+            ignore_conflicts=True,
+        )
+        for (year, month, status), (amount, count) in deltas.items():
+            MonthlyRevenue.objects.filter(year=year, month=month, status=status).update(
+                amount=F('amount') + amount,
+                fee_count=Greatest(F('fee_count') + count, 0, output_field=IntegerField()),
+            )
+
+
+def monthly_revenue_rows(fees):
+    """``{(year, month, status): (amount, fee_count)}`` computed from a Fee queryset."""
+    bucket_date = Case(
+        When(status='paid', paid_date__isnull=False, then=F('paid_date')),
+        default=F('due_date'),
+        output_field=DateField(),
+    )
+    rows = fees.order_by().annotate(
+        year=ExtractYear(bucket_date), month=ExtractMonth(bucket_date),
+    ).values('year', 'month', 'status').annotate(total=Sum('amount'), n=Count('id'))
+    return {(row['year'], row['month'], row['status']): (row['total'], row['n']) for row in rows}
+
+
+def reconcile_monthly_revenue(dry_run=False):
+    """Compare the rollup with the Fee table and fix the rows that differ.
+
+    Returns ``[(bucket, stored, expected)]`` where ``stored``/``expected`` are
+    ``(amount, fee_count)`` or ``None``; nothing is written when ``dry_run``.
+    """
+    with transaction.atomic():
+        expected = monthly_revenue_rows(Fee.objects.all())
+        stored = {
+            (row.year, row.month, row.status): (row.amount, row.fee_count)
+            for row in MonthlyRevenue.objects.select_for_update()
+            # Emptied months are left as zero rows by the signals; they are not drift
+            if row.amount or row.fee_count
+        }
+        drift = [
+            (bucket, stored.get(bucket), expected.get(bucket))
+            for bucket in sorted(stored.keys() | expected.keys())
+            if stored.get(bucket) != expected.get(bucket)
+        ]
+        if drift and not dry_run:
+            fixed = [(bucket, value) for bucket, _, value in drift if value is not None]
+            MonthlyRevenue.objects.bulk_create(
+                [MonthlyRevenue(year=year, month=month, status=status, amount=amount, fee_count=count)
+                 for (year, month, status), (amount, count) in fixed],
+                update_conflicts=True,
+                unique_fields=['year', 'month', 'status'],
+                update_fields=['amount', 'fee_count'],
+            )
+            condition = Q()
+            for (year, month, status), _, value in drift:
+                if value is None:
+                    condition |= Q(year=year, month=month, status=status)
+            if condition:
+                MonthlyRevenue.objects.filter(condition).delete()
+    return drift
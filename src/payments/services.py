@@ -0,0 +1,61 @@
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+from django.utils import timezone
+
+from users.snapshots import invalidate_dashboards
+from .models import Fee
+from .rollups import apply_revenue_changes, monthly_revenue_rows
+
+
+def sweep_overdue_fees(today=None):
+    """Mark every pending fee due before ``today`` as overdue; returns how many changed.
+
+    One grouped read (for the revenue rollup and the dashboards to refresh)
+    and one ``UPDATE``, both on the (status, due_date) index. Running it again
+    changes nothing, so it is safe to call from cron every few minutes.
+    """
+    today = today or timezone.localdate()
+    due = Fee.objects.filter(status='pending', due_date__lt=today)
+
+    with transaction.atomic():
+        moved = list(
+            due.order_by().annotate(year=ExtractYear('due_date'), month=ExtractMonth('due_date'))
+            .values('student_id', 'year', 'month').annotate(total=Sum('amount'), n=Count('id'))
+        )
+        if not moved:
+            return 0
+        changed = due.update(status='overdue')
+
+        # QuerySet.update() skips the Fee signals
+        changes = []
+        for row in moved:
+            changes.append(((row['year'], row['month'], 'pending'), -row['total'], -row['n']))
+            changes.append(((row['year'], row['month'], 'overdue'), row['total'], row['n']))
+        apply_revenue_changes(changes)
+        invalidate_dashboards(student_ids=[row['student_id'] for row in moved])
+    return changed
+
+
+def mark_fees_paid(fees):
+    """Mark the unpaid fees of the ``fees`` queryset as paid; returns how many changed.
+
+    The admin bulk action. Like :func:`sweep_overdue_fees` it is one
+    ``UPDATE``, with the revenue rollup moved from grouped reads before and
+    after it and the dashboards of the students refreshed, all in one
+    transaction.
+    """
+    with transaction.atomic():
+        selected = list(fees.exclude(status='paid').values_list('pk', 'student_id'))
+        if not selected:
+            return 0
+        marked = Fee.objects.filter(pk__in=[pk for pk, _ in selected])
+        before = monthly_revenue_rows(marked)
+        changed = marked.update(status='paid')
+
+        # QuerySet.update() skips the Fee signals
+        changes = [(bucket, -amount, -count) for bucket, (amount, count) in before.items()]
+        changes += [(bucket, amount, count) for bucket, (amount, count) in monthly_revenue_rows(marked).items()]
+        apply_revenue_changes(changes)
+        invalidate_dashboards(student_ids=[student_id for _, student_id in selected])
+    return changed
@@ -0,0 +1,34 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Fee
+from .rollups import apply_revenue_changes, fee_revenue_key, revenue_bucket
+
+
+@receiver(pre_save, sender=Fee)
+def remember_previous_fee(sender, instance, raw=False, **kwargs):
+    instance._rollup_previous = None
+    if instance.pk and not raw:
+        previous = Fee.objects.filter(pk=instance.pk).values_list('status', 'due_date', 'paid_date', 'amount').first()
+        if previous:
+            status, due_date, paid_date, amount = previous
+            instance._rollup_previous = (revenue_bucket(status, due_date, paid_date), amount)
+
+
+@receiver(post_save, sender=Fee)
+def update_revenue_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    bucket, amount = fee_revenue_key(instance)
+    changes = [(bucket, amount, 1)]
+    previous = getattr(instance, '_rollup_previous', None)
+    if previous:
+        previous_bucket, previous_amount = previous
+        changes.append((previous_bucket, -previous_amount, -1))
+    apply_revenue_changes(changes)
+
+
+@receiver(post_delete, sender=Fee)
+def update_revenue_on_delete(sender, instance, **kwargs):
+    bucket, amount = fee_revenue_key(instance)
+    apply_revenue_changes([(bucket, -amount, -1)])
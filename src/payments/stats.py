@@ -0,0 +1,52 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from users.stats import month_starts
+from .models import MonthlyRevenue
+
+
+def fee_kpis(fees, today=None):
+    """Revenue, pending, paid-this-month and overdue totals of ``fees`` in one query."""
+    today = today or timezone.localdate()
+    month_start = today.replace(day=1)
+    next_month = (month_start + timedelta(days=32)).replace(day=1)
+    totals = fees.order_by().aggregate(
+        total_revenue=Sum('amount', filter=Q(status='paid')),
+        pending_payments=Sum('amount', filter=Q(status='pending')),
+        paid_this_month=Sum('amount', filter=Q(status='paid', paid_date__gte=month_start, paid_date__lt=next_month)),
+        overdue_payments=Sum('amount', filter=Q(status='overdue')),
+    )
+    return {key: value or 0 for key, value in totals.items()}
+
+
+def student_fee_summary(fees):
+    """Total paid and paid/pending/overdue counts of one student's ``fees`` in one query."""
+    totals = fees.order_by().aggregate(
+        total_paid=Sum('amount', filter=Q(status='paid')),
+        completed_payments=Count('id', filter=Q(status='paid')),
+        pending_payments=Count('id', filter=Q(status='pending')),
+        overdue_payments=Count('id', filter=Q(status='overdue')),
+    )
+    totals['total_paid'] = totals['total_paid'] or 0
+    return totals
+
+
+def revenue_trend(months=24, today=None):
+    """Monthly paid/pending/overdue totals for the last ``months`` months, oldest first,
+    read from the monthly revenue rollup in one query."""
+    starts = month_starts(months, today)
+    first = starts[0]
+    rows = MonthlyRevenue.objects.filter(
+        Q(year__gt=first.year) | Q(year=first.year, month__gte=first.month)
+    ).values_list('year', 'month', 'status', 'amount')
+    amounts = {(year, month, status): amount for year, month, status, amount in rows}
+
+    series = {'labels': [start.strftime('%b %Y') for start in starts]}
+    for status in ('paid', 'pending', 'overdue'):
+        series[status] = [
+            float(amounts.get((start.year, start.month, status), Decimal(0))) for start in starts
+        ]
+    return series
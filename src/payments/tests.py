@@ -1,3 +1,131 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
+from django.urls import reverse
+
+from users.models import User, Student
+from .models import Fee, MonthlyRevenue
+from .rollups import reconcile_monthly_revenue
+from .services import mark_fees_paid, sweep_overdue_fees
+from .stats import fee_kpis, revenue_trend
+
+
+class MonthlyRevenueTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = Student.objects.create(
+            user=User.objects.create_user(username='student', password='pass', role='student')
+        )
+
+    def revenue(self):
+        return {
+            (row.year, row.month, row.status): (row.amount, row.fee_count)
+            for row in MonthlyRevenue.objects.filter(fee_count__gt=0)
+        }
+
+    def test_fee_writes_keep_rollup_in_sync(self):
+        fee = Fee.objects.create(student=self.student, amount='300.00', due_date='2025-03-10')
+        Fee.objects.create(student=self.student, amount=Decimal('200'), due_date=date(2025, 3, 20))
+        self.assertEqual(self.revenue(), {(2025, 3, 'pending'): (Decimal('500'), 2)})
+
+        # Paid fees move to the month they were paid in
+        fee.status, fee.paid_date = 'paid', date(2025, 4, 2)
+        fee.save()
+        self.assertEqual(self.revenue(), {
+            (2025, 3, 'pending'): (Decimal('200'), 1),
+            (2025, 4, 'paid'): (Decimal('300'), 1),
+        })
+
+        fee.delete()
+        self.assertEqual(self.revenue(), {(2025, 3, 'pending'): (Decimal('200'), 1)})
+        self.assertEqual(reconcile_monthly_revenue(dry_run=True), [])
+
+    def test_reconcile_fixes_drift_from_bulk_updates(self):
+        Fee.objects.create(student=self.student, amount=100, due_date=date(2025, 1, 5))
+        Fee.objects.filter(student=self.student).update(status='overdue')  # no signals
+
+        out = StringIO()
+        call_command('reconcile_revenue', stdout=out)
+        self.assertIn('Fixed 2 month/status rows', out.getvalue())
+        self.assertEqual(self.revenue(), {(2025, 1, 'overdue'): (Decimal('100'), 1)})
+        self.assertEqual(reconcile_monthly_revenue(dry_run=True), [])
+
+    def test_kpis_in_one_query_and_trend(self):
+        today = date(2025, 4, 15)
+        Fee.objects.create(student=self.student, amount=100, due_date=date(2025, 4, 1), status='paid', paid_date=today)
+        Fee.objects.create(student=self.student, amount=50, due_date=date(2025, 2, 1), status='paid', paid_date=date(2025, 2, 3))
+        Fee.objects.create(student=self.student, amount=70, due_date=date(2025, 3, 1), status='overdue')
+        Fee.objects.create(student=self.student, amount=30, due_date=date(2025, 5, 1))
+
+        with self.assertNumQueries(1):
+            kpis = fee_kpis(Fee.objects.all(), today=today)
+        self.assertEqual(kpis, {
+            'total_revenue': Decimal('150'), 'pending_payments': Decimal('30'),
+            'paid_this_month': Decimal('100'), 'overdue_payments': Decimal('70'),
+        })
+
+        with self.assertNumQueries(1):
+            trend = revenue_trend(24, today=today)
+        self.assertEqual(len(trend['labels']), 24)
+        self.assertEqual(trend['labels'][-1], 'Apr 2025')
+        self.assertEqual(trend['paid'][-3:], [50.0, 0.0, 100.0])
+        self.assertEqual(trend['overdue'][-2], 70.0)
+
+
+class SweepOverdueFeesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = Student.objects.create(
+            user=User.objects.create_user(username='student', password='pass', role='student')
+        )
+        for day, status in ((date(2025, 2, 10), 'pending'), (date(2025, 3, 1), 'pending'),
+                            (date(2025, 3, 20), 'pending'), (date(2025, 3, 2), 'paid')):
+            Fee.objects.create(
+                student=cls.student, amount=100, due_date=day, status=status,
+                paid_date=day if status == 'paid' else None,
+            )
+
+    def test_sweep_is_set_based_and_idempotent(self):
+        today = date(2025, 3, 15)
+        self.assertEqual(sweep_overdue_fees(today=today), 2)
+        self.assertEqual(
+            sorted(Fee.objects.filter(status='overdue').values_list('due_date', flat=True)),
+            [date(2025, 2, 10), date(2025, 3, 1)],
+        )
+        self.assertEqual(reconcile_monthly_revenue(dry_run=True), [])
+
+        # Nothing left to move: savepoint, the read, release
+        with self.assertNumQueries(3):
+            self.assertEqual(sweep_overdue_fees(today=today), 0)
+
+    def test_command_reports_count(self):
+        out = StringIO()
+        call_command('sweep_overdue_fees', today='2025-04-01', stdout=out)
+        self.assertIn('Marked 3 fee(s) overdue', out.getvalue())
+
+
+class MarkFeesPaidTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username='admin', password='pass', role='admin')
+        cls.student = Student.objects.create(
+            user=User.objects.create_user(username='student', password='pass', role='student')
+        )
+        Fee.objects.create(student=cls.student, amount=100, due_date=date(2025, 2, 10))
+        Fee.objects.create(student=cls.student, amount=40, due_date=date(2025, 3, 1), status='overdue')
+        Fee.objects.create(student=cls.student, amount=60, due_date=date(2025, 1, 5), status='paid', paid_date=date(2025, 3, 2))
+
+    def test_admin_action_keeps_rollup_in_sync(self):
+        self.client.force_login(self.admin)
+        response = self.client.post(reverse('admin:payments_fee_changelist'), {
+            'action': 'mark_as_paid', '_selected_action': list(Fee.objects.values_list('pk', flat=True)),
+        }, follow=True)
+        self.assertContains(response, '2 fees marked as paid.')
+        self.assertEqual(Fee.objects.exclude(status='paid').count(), 0)
+        self.assertEqual(reconcile_monthly_revenue(dry_run=True), [])
 
-# Create your tests here.
+    def test_nothing_to_mark(self):
+        self.assertEqual(mark_fees_paid(Fee.objects.filter(status='paid')), 0)
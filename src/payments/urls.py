@@ -5,6 +5,7 @@ app_name = 'payments'
 
 urlpatterns = [
     path('admin/payments/', views.admin_payments_dashboard, name='admin_payments_dashboard'),
+    path('admin/payments/export/', views.admin_payments_export, name='admin_payments_export'),
     path('', views.payments_dashboard, name='payments_dashboard'),
     path('student/', views.student_payments, name='student_payments'),
     path('add/', views.add_payment, name='add_payment'),
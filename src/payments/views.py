@@ -5,37 +5,25 @@ from django.utils import timezone
 from datetime import datetime
 from .models import Fee
 from users.models import Student
+from users.decorators import admin_required
+from samo_edu_crm import exports
+from samo_edu_crm.pagination import keyset_page
+from samo_edu_crm.reports import report_view
+from .stats import fee_kpis, revenue_trend, student_fee_summary
 from django.contrib.auth import get_user_model
+import json
 
 User = get_user_model()
 
 
-@login_required
-def admin_payments_dashboard(request):
-    # Umumiy statistik ma'lumotlar
-    total_revenue = Fee.objects.filter(status='paid').aggregate(Sum('amount'))['amount__sum'] or 0
-    pending_payments = Fee.objects.filter(status='pending').aggregate(Sum('amount'))['amount__sum'] or 0
-
-    # Oylik to'lovlar (joriy oy)
-    current_month = timezone.now().month
-    current_year = timezone.now().year
-    paid_this_month = Fee.objects.filter(
-        status='paid',
-        paid_date__month=current_month,
-        paid_date__year=current_year
-    ).aggregate(Sum('amount'))['amount__sum'] or 0
-
-    overdue_payments = Fee.objects.filter(
-        status='overdue'
-    ).aggregate(Sum('amount'))['amount__sum'] or 0
+FEE_ORDERING = ('-due_date', '-id')
 
-    # Filtrlash va qidirish
-    status_filter = request.GET.get('status', 'all')
-    student_filter = request.GET.get('student', 'all')
-    search_query = request.GET.get('search', '')
 
-    # Barcha to'lovlarni olish
-    payments = Fee.objects.all().order_by('-due_date')
+def filter_payments(payments, params):
+    """To'lovlar ro'yxati va eksport uchun umumiy filtrlar (status, student, search)."""
+    status_filter = params.get('status', 'all')
+    student_filter = params.get('student', 'all')
+    search_query = params.get('search', '')
 
     # Status bo'yicha filtrlash
     if status_filter != 'all':
@@ -51,17 +39,45 @@ def admin_payments_dashboard(request):
             Q(student__user__first_name__icontains=search_query) |
             Q(student__user__last_name__icontains=search_query)
         )
+    return payments
+
+
+FEE_EXPORT_COLUMNS = [
+    exports.person('Student', 'student__user__'),
+    exports.column('Amount', 'amount'),
+    exports.column('Due Date', 'due_date'),
+    exports.column('Paid Date', 'paid_date'),
+    exports.choice('Status', 'status', Fee._meta.get_field('status').choices),
+]
+
+
+@login_required
+@report_view
+def admin_payments_dashboard(request):
+    # Umumiy statistik ma'lumotlar: bitta shartli aggregate
+    kpis = fee_kpis(Fee.objects.all())
+
+    # Oxirgi 24 oylik tushum trendi (MonthlyRevenue rollup jadvalidan)
+    revenue_data = revenue_trend(24)
+
+    # Filtrlash va qidirish
+    status_filter = request.GET.get('status', 'all')
+    student_filter = request.GET.get('student', 'all')
+    search_query = request.GET.get('search', '')
+
+    # Barcha to'lovlarni olish
+    payments = filter_payments(Fee.objects.select_related('student__user'), request.GET)
+    cursor_page = keyset_page(payments, FEE_ORDERING, request.GET)
 
     # Barcha talabalarni olish (filter uchun)
-    students = Student.objects.all()
+    students = Student.objects.select_related('user')
 
     context = {
-        'payments': payments,
+        'payments': cursor_page.object_list,
+        'cursor_page': cursor_page,
         'students': students,
-        'total_revenue': total_revenue,
-        'pending_payments': pending_payments,
-        'paid_this_month': paid_this_month,
-        'overdue_payments': overdue_payments,
+        **kpis,
+        'revenue_trend_json': json.dumps(revenue_data),
         'selected_status': status_filter,
         'selected_student': student_filter,
         'search_query': search_query,
@@ -70,6 +86,14 @@ def admin_payments_dashboard(request):
     return render(request, 'admin/admin_payments.html', context)
 
 
+@login_required
+@admin_required
+@report_view
+def admin_payments_export(request):
+    payments = filter_payments(Fee.objects.order_by(*FEE_ORDERING), request.GET)
+    return exports.csv_response(payments, FEE_EXPORT_COLUMNS, 'payments')
+
+
 @login_required
 def add_payment(request):
     if request.method == 'POST':
@@ -142,10 +166,7 @@ def payments_dashboard(request):
     # Get student's payment statistics
     student_fees = Fee.objects.filter(student=student)
 
-    total_paid = student_fees.filter(status='paid').aggregate(Sum('amount'))['amount__sum'] or 0
-    completed_payments = student_fees.filter(status='paid').count()
-    pending_payments = student_fees.filter(status='pending').count()
-    overdue_payments = student_fees.filter(status='overdue').count()
+    summary = student_fee_summary(student_fees)
 
     # Get pending fees (not paid)
     pending_fees = student_fees.filter(status__in=['pending', 'overdue']).order_by('due_date')
@@ -155,10 +176,7 @@ def payments_dashboard(request):
 
     context = {
         'student': student,
-        'total_paid': total_paid,
-        'completed_payments': completed_payments,
-        'pending_payments': pending_payments,
-        'overdue_payments': overdue_payments,
+        **summary,
         'pending_fees': pending_fees,
         'payment_history': payment_history,
     }
@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'samo_edu_crm.settings')
 
 application = get_asgi_application()
+
+# Hashed, precompressed static files with far-future caching (after collectstatic)
+from samo_edu_crm.static_layer import ASGIStaticFiles  # noqa: E402
+
+application = ASGIStaticFiles(application)
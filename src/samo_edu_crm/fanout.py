@@ -0,0 +1,71 @@
+"""Run the independent query groups of one request side by side.
+
+An async view passes :func:`gather_parts` a list of callables that each run a
+few ORM queries and return a dict; they run on a shared, bounded thread pool
+(``FANOUT_WORKERS`` threads, each with its own database connection, kept for
+``CONN_MAX_AGE`` like a request's) and the dicts are merged in list order.
+SQLite releases the GIL while it reads, so the groups overlap instead of
+queueing behind each other.
+
+When the request's own connection is inside a transaction (ATOMIC_REQUESTS,
+a TestCase) the parts must see its uncommitted rows, so they run one after
+another on that connection instead, as does everything with
+``FANOUT_WORKERS`` of 1 or less. The parts only overlap on more than one
+CPU; ``manage.py bench_dashboards`` measures the gain on a given host.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+# QueryStats of the current request (set by QueryBudgetMiddleware). The
+# context is copied into the pool threads, so their queries are counted with
+# the request's own
+current_query_stats = ContextVar('current_query_stats', default=None)
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def _executor(workers):
+    with _executors_lock:
+        if workers not in _executors:
+            _executors[workers] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='fanout')
+        return _executors[workers]
+
+
+def _in_transaction():
+    return any(conn.in_atomic_block for conn in connections.all(initialized_only=True))
+
+
+def _run_sequentially(parts):
+    merged = {}
+    for part in parts:
+        merged.update(part())
+    return merged
+
+
+def _run_in_pool(part):
+    try:
+        return part()
+    finally:
+        # What request_finished does for the request's own connections: drop
+        # broken ones and those past CONN_MAX_AGE (every one, with the default 0)
+        close_old_connections()
+
+
+async def gather_parts(parts):
+    """Run ``parts`` (callables returning dicts) and return their merged results."""
+    workers = getattr(settings, 'FANOUT_WORKERS', 1)
+    if workers <= 1 or await sync_to_async(_in_transaction)():
+        return await sync_to_async(_run_sequentially)(parts)
+
+    run = sync_to_async(_run_in_pool, thread_sensitive=False, executor=_executor(workers))
+    merged = {}
+    for result in await asyncio.gather(*(run(part) for part in parts)):
+        merged.update(result)
+    return merged
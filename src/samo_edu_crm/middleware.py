@@ -1,9 +1,38 @@
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from functools import partial
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.contrib.auth import middleware as auth_middleware
 from django.shortcuts import redirect
 from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
 from django.urls import reverse
 
+from .fanout import current_query_stats
+
 EXEMPT_URLS = [reverse("login")]  # add more if needed
 
+async def _auser(request):
+    return await sync_to_async(auth_middleware.get_user)(request)
+
+
+class AuthenticationMiddleware(auth_middleware.AuthenticationMiddleware):
+    """
+    Django's AuthenticationMiddleware, except that request.auser() (used by
+    login_required on async views) reuses the user request.user loads
+    instead of fetching it again with a query of its own.
+    """
+    def process_request(self, request):
+        super().process_request(request)
+        request.auser = partial(_auser, request)
+
+
 class LoginRequiredMiddleware:
     """
     Middleware that requires a user to be authenticated to access any page
@@ -21,3 +50,133 @@ class LoginRequiredMiddleware:
                 return redirect(settings.LOGIN_URL)  # use your login view name
 
         return self.get_response(request)
+
+
+logger = logging.getLogger('samo_edu_crm.queries')
+
+_IN_LIST = re.compile(r'\bIN \((?:%s, )*%s\)')
+_NUMBER = re.compile(r'\b\d+\b')
+
+
+def sql_fingerprint(sql):
+    """SQL text with literals and IN-lists collapsed, so an N+1 loop gives one fingerprint."""
+    return _NUMBER.sub('?', _IN_LIST.sub('IN (...)', sql))
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+        self.lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                self.duration += elapsed
+                self.count += 1
+                self.fingerprints[sql_fingerprint(sql)] += 1
+
+    def repeated(self, threshold):
+        return [(sql, n) for sql, n in self.fingerprints.most_common() if n >= threshold]
+
+
+def count_queries(execute, sql, params, many, context):
+    """Execute wrapper every connection carries: hands the query to the QueryStats of the current request.
+
+    The stats travel in a contextvar, which follows the request into
+    sync_to_async threads and the fan-out pool, where the connections differ
+    from the ones of the thread the middleware runs in.
+    """
+    stats = current_query_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats(execute, sql, params, many, context)
+
+
+def install_query_counter(connection):
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+@receiver(connection_created)
+def count_queries_on_new_connection(sender, connection, **kwargs):
+    install_query_counter(connection)
+
+
+class QueryBudgetMiddleware:
+    """
+    Counts the queries and DB time of every request with
+    connection.execute_wrapper (so it works with DEBUG off), adds
+    Server-Timing and X-Query-Count headers and logs a warning when the
+    view's budget from settings.QUERY_BUDGETS (by URL name, falling back to
+    QUERY_BUDGET_DEFAULT) is exceeded or the same SQL repeats
+    QUERY_REPEAT_THRESHOLD times or more (the usual N+1 pattern).
+
+    Queries the view fans out to other threads (samo_edu_crm.fanout) are
+    counted too; queries run while a streaming response is consumed are not.
+    Sync and async: the async dashboards run without a thread switch here.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        # Connections opened before this module was imported
+        for connection in connections.all(initialized_only=True):
+            install_query_counter(connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not getattr(settings, 'QUERY_INSTRUMENTATION', True):
+            return self.get_response(request)
+
+        stats, start = QueryStats(), time.perf_counter()
+        token = current_query_stats.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_query_stats.reset(token)
+        return self.process_stats(request, response, stats, start)
+
+    async def __acall__(self, request):
+        if not getattr(settings, 'QUERY_INSTRUMENTATION', True):
+            return await self.get_response(request)
+
+        stats, start = QueryStats(), time.perf_counter()
+        token = current_query_stats.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_query_stats.reset(token)
+        return self.process_stats(request, response, stats, start)
+
+    def process_stats(self, request, response, stats, start):
+        total = time.perf_counter() - start
+        response['X-Query-Count'] = str(stats.count)
+        response['Server-Timing'] = (
+            f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries", '
+            f'total;dur={total * 1000:.1f}'
+        )
+        self.check_budget(request, stats)
+        return response
+
+    def check_budget(self, request, stats):
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else request.path_info
+        budget = getattr(settings, 'QUERY_BUDGETS', {}).get(view_name, getattr(settings, 'QUERY_BUDGET_DEFAULT', None))
+        if budget is not None and stats.count > budget:
+            logger.warning(
+                "%s ran %d queries (budget %d, %.1f ms in the database)",
+                view_name, stats.count, budget, stats.duration * 1000,
+            )
+
+        for sql, n in stats.repeated(getattr(settings, 'QUERY_REPEAT_THRESHOLD', 5)):
+            logger.warning("%s repeated the same query %d times (possible N+1): %s", view_name, n, sql[:300])
@@ -0,0 +1,153 @@
+"""Keyset (seek) pagination for the large admin lists.
+
+Instead of ``OFFSET n`` the page is found with a ``WHERE`` on the ordering
+key of the row next to it, e.g. ``(date, id) < (last_date, last_id)``, so
+page 500 costs the same index seek as page 1. The position travels in an
+opaque ``cursor`` GET parameter; the other GET filters are kept as they are.
+"""
+import base64
+import json
+from datetime import date, time
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+CURSOR_PARAM = 'cursor'
+PER_PAGE = 50
+TOTAL_CAP = 10000
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _json_default(value):
+    # Full precision on purpose: DjangoJSONEncoder drops microseconds, which
+    # would make the seek skip or repeat rows with the same second
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f'{type(value).__name__} cannot be used in a cursor')
+
+
+def encode_cursor(direction, values):
+    payload = json.dumps([direction, values], default=_json_default, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        direction, values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise InvalidCursor(cursor)
+    if direction not in ('next', 'prev') or not isinstance(values, list):
+        raise InvalidCursor(cursor)
+    return direction, values
+
+
+def _parse_ordering(ordering):
+    return [(key.lstrip('-'), key.startswith('-')) for key in ordering]
+
+
+def _seek(keys, values, forward):
+    """``Q`` for rows strictly after ``values`` in ``keys`` order (before it when not ``forward``)."""
+    condition = Q()
+    for i, (field, descending) in enumerate(keys):
+        lookup = 'lt' if descending == forward else 'gt'
+        ties = {prev_field: values[j] for j, (prev_field, _) in enumerate(keys[:i])}
+        condition |= Q(**ties, **{f'{field}__{lookup}': values[i]})
+    return condition
+
+
+def _row_values(row, keys):
+    values = []
+    for field, _ in keys:
+        value = row
+        for attr in field.split('__'):
+            value = getattr(value, attr)
+        values.append(value)
+    return values
+
+
+class KeysetPage:
+    def __init__(self, object_list, has_next, has_previous, next_cursor, previous_cursor, total=None, total_capped=False):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.total = total
+        self.total_capped = total_capped
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def is_paginated(self):
+        return self.has_next or self.has_previous
+
+
+def keyset_page(queryset, ordering, params, per_page=PER_PAGE, with_total=True, total_cap=TOTAL_CAP,
+                param=CURSOR_PARAM):
+    """Return one :class:`KeysetPage` of ``queryset`` ordered by ``ordering``.
+
+    ``ordering`` must end with a unique field (normally ``id``/``-id``) so the
+    order is total. ``params`` is ``request.GET``; a bad cursor falls back to
+    the first page. ``with_total`` adds a row count that stops at
+    ``total_cap`` so it stays cheap on very large tables (``total_capped``
+    tells the template to show e.g. "10000+"). Pages with two lists give
+    each one its own ``param``.
+    """
+    keys = _parse_ordering(ordering)
+    direction, values = 'next', None
+    cursor = params.get(param)
+    if cursor:
+        try:
+            direction, values = decode_cursor(cursor)
+        except InvalidCursor:
+            direction, values = 'next', None
+        if values is not None and len(values) != len(keys):
+            direction, values = 'next', None
+
+    forward = direction == 'next'
+    page_qs = queryset.order_by(*(ordering if forward else [
+        key[1:] if key.startswith('-') else f'-{key}' for key in ordering
+    ]))
+    if values is not None:
+        try:
+            page_qs = page_qs.filter(_seek(keys, values, forward))
+        except (ValidationError, ValueError, TypeError):
+            # A well-formed cursor with values the fields cannot take
+            forward, values = True, None
+            page_qs = queryset.order_by(*ordering)
+
+    rows = list(page_qs[:per_page + 1])
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if forward:
+        has_next, has_previous = has_more, values is not None
+    else:
+        rows.reverse()
+        has_next, has_previous = True, has_more
+
+    total = total_capped = None
+    if with_total:
+        total = queryset.order_by()[:total_cap + 1].count()
+        total_capped = total > total_cap
+        total = min(total, total_cap)
+
+    return KeysetPage(
+        rows,
+        has_next=has_next,
+        has_previous=has_previous,
+        next_cursor=encode_cursor('next', _row_values(rows[-1], keys)) if rows and has_next else None,
+        previous_cursor=encode_cursor('prev', _row_values(rows[0], keys)) if rows and has_previous else None,
+        total=total,
+        total_capped=total_capped,
+    )
@@ -0,0 +1,89 @@
+"""Report pages read from a snapshot of the database.
+
+``manage.py build_report_snapshot`` copies the live SQLite file to
+``settings.REPORT_SNAPSHOT_PATH`` with ``VACUUM INTO``; the
+``reports`` alias opens that copy read-only. Views decorated with
+:func:`report_view` send their reads there through :class:`ReportRouter`,
+so long report queries and exports no longer hold read locks next to the
+teachers' writes. Everything else, and every write, stays on ``default``.
+Without a snapshot (or with one older than ``REPORT_SNAPSHOT_MAX_AGE``
+seconds) report views read the live database as before.
+"""
+import contextvars
+import os
+from contextlib import contextmanager
+from datetime import datetime, timezone as dt_timezone
+from functools import wraps
+
+from django.conf import settings
+from django.utils import timezone
+
+REPORTS_DB = 'reports'
+
+# None outside report views, else whether this report reads the snapshot
+_report_source = contextvars.ContextVar('report_source', default=None)
+
+
+def snapshot_taken_at():
+    """When the report snapshot was written, or ``None`` if there is none."""
+    try:
+        return datetime.fromtimestamp(os.path.getmtime(settings.REPORT_SNAPSHOT_PATH), tz=dt_timezone.utc)
+    except (AttributeError, OSError):
+        return None
+
+
+def snapshot_usable():
+    taken_at = snapshot_taken_at()
+    if taken_at is None or REPORTS_DB not in settings.DATABASES:
+        return False
+    max_age = getattr(settings, 'REPORT_SNAPSHOT_MAX_AGE', None)
+    return max_age is None or (timezone.now() - taken_at).total_seconds() <= max_age
+
+
+@contextmanager
+def report_reads():
+    """Route the reads made inside the block to the snapshot, when there is a usable one."""
+    token = _report_source.set(snapshot_usable())
+    try:
+        yield
+    finally:
+        _report_source.reset(token)
+
+
+def report_view(view_func):
+    """Run ``view_func`` inside :func:`report_reads`."""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        with report_reads():
+            return view_func(request, *args, **kwargs)
+    return wrapper
+
+
+class ReportRouter:
+    """Reads inside :func:`report_reads` go to the snapshot; writes and migrations to ``default``."""
+
+    def db_for_read(self, model, **hints):
+        return REPORTS_DB if _report_source.get() else None
+
+    def db_for_write(self, model, **hints):
+        # Also for objects that were read from the snapshot
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The snapshot is a copy of default, so rows of both are the same rows
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPORTS_DB
+
+
+def report_snapshot(request):
+    """Template context processor: ``report_snapshot`` on report pages.
+
+    ``{'taken_at': datetime}`` when the page was read from the snapshot,
+    ``{'taken_at': None}`` when a report page had to read live data.
+    """
+    source = _report_source.get()
+    if source is None:
+        return {}
+    return {'report_snapshot': {'taken_at': snapshot_taken_at() if source else None}}
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -29,6 +30,14 @@ ALLOWED_HOSTS = ["*"]
 
 AUTH_USER_MODEL = 'users.User'
 
+# ProfileBackend loads the session user with the teacher/student/parent profile
+# in one query. ModelBackend stays so sessions created before it keep working;
+# they move to ProfileBackend at their next login.
+AUTHENTICATION_BACKENDS = [
+    'users.profiles.ProfileBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -48,10 +57,11 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'samo_edu_crm.middleware.QueryBudgetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'samo_edu_crm.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     "samo_edu_crm.middleware.LoginRequiredMiddleware",
@@ -71,6 +81,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'samo_edu_crm.reports.report_snapshot',
             ],
         },
     },
@@ -86,9 +97,72 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Take the write lock at BEGIN: a transaction that read first cannot
+            # upgrade to a writer while another one writes, and fails at once
+            # with "database is locked" whatever the busy timeout
+            'transaction_mode': 'IMMEDIATE',
+        },
+    },
+    # Read-only copy of default for report pages, refreshed by
+    # `manage.py build_report_snapshot` (samo_edu_crm/reports.py)
+    'reports': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f"file:{BASE_DIR / 'reports.sqlite3'}?mode=ro",
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+
+DATABASE_ROUTERS = ['samo_edu_crm.reports.ReportRouter']
+
+REPORT_SNAPSHOT_PATH = BASE_DIR / 'reports.sqlite3'
+# build_report_snapshot runs from cron every 15 minutes; a snapshot that missed
+# one rebuild is ignored and report pages read live data (seconds)
+REPORT_SNAPSHOT_MAX_AGE = 30 * 60
+
+# PRAGMAs run on every new SQLite connection (samo_edu_crm/sqlite_tuning.py),
+# merged over its DEFAULT_PRAGMAS: WAL, synchronous=NORMAL, 5 s busy timeout,
+# 128 MB mmap, 20 MB page cache, in-memory temp store. Override per
+# environment, e.g. {'mmap_size': 0} or {'journal_mode': None} to leave it alone.
+SQLITE_PRAGMAS = {}
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# File-based so that every gunicorn worker sees the same dashboard snapshots
+# and invalidations; no external cache service is needed.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
     }
 }
 
+# Seconds a dashboard snapshot may live before it is rebuilt even without writes
+DASHBOARD_SNAPSHOT_TIMEOUT = 300
+
+# Threads (and so extra database connections) the async dashboards share for
+# building snapshots; 1 builds them sequentially, which is all a single CPU
+# can do anyway (samo_edu_crm/fanout.py)
+FANOUT_WORKERS = min(4, os.cpu_count() or 1)
+
+# Query budget middleware: warn (logger "samo_edu_crm.queries") when a view runs
+# more queries than its budget, keyed by URL name ("namespace:name" if namespaced)
+QUERY_INSTRUMENTATION = True
+QUERY_BUDGET_DEFAULT = 30
+QUERY_BUDGETS = {
+    'admin_dashboard': 12,
+    'teacher_dashboard': 12,
+    'student_dashboard': 15,
+    'groups_list': 10,
+    'attendance_list': 6,
+    'attendance_export': 3,
+    'exams:admin_exam_results': 8,
+    'payments:admin_payments_dashboard': 10,
+    'admin_users_management': 8,
+}
+QUERY_REPEAT_THRESHOLD = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -123,6 +197,15 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 STATICFILES_DIRS = [BASE_DIR / "static"]
+# collectstatic writes hashed names plus .gz copies here; wsgi.py/asgi.py
+# serve them with one-year immutable caching (samo_edu_crm/static_layer.py).
+# brotli is an optional extra, not in requirements.txt: `pip install brotli`
+# before collectstatic to also write smaller .br copies.
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'samo_edu_crm.storage.CompressedManifestStaticFilesStorage'},
+}
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
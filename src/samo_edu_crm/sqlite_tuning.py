@@ -0,0 +1,52 @@
+"""SQLite connection tuning.
+
+Every new SQLite connection runs the PRAGMAs of ``settings.SQLITE_PRAGMAS``
+merged over :data:`DEFAULT_PRAGMAS`, so each environment can change or drop
+(``None``) single values in its settings. The defaults are for the production
+pattern of this app: many short writes (attendance sheets) next to many reads.
+"""
+import re
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+DEFAULT_PRAGMAS = {
+    # Readers and the writer no longer block each other
+    'journal_mode': 'wal',
+    # With WAL only checkpoints fsync; a power loss can lose the last commits, not corrupt the file
+    'synchronous': 'normal',
+    # Milliseconds to wait for the write lock before "database is locked"
+    'busy_timeout': 5000,
+    # Read through a memory map instead of read() calls
+    'mmap_size': 128 * 1024 * 1024,
+    # Negative means KiB: 20 MB of page cache per connection
+    'cache_size': -20000,
+    'temp_store': 'memory',
+}
+
+_NAME = re.compile(r'^[a-z_]+$')
+_VALUE = re.compile(r'^-?\w+$')
+
+
+def sqlite_pragmas():
+    """The PRAGMAs new connections get, in the order they are applied."""
+    pragmas = {**DEFAULT_PRAGMAS, **getattr(settings, 'SQLITE_PRAGMAS', {})}
+    for name, value in pragmas.items():
+        if not _NAME.match(name) or (value is not None and not _VALUE.match(str(value))):
+            raise ImproperlyConfigured(f"SQLITE_PRAGMAS: invalid PRAGMA {name!r} = {value!r}")
+    return {name: value for name, value in pragmas.items() if value is not None}
+
+
+@receiver(connection_created)
+def tune_sqlite_connection(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = sqlite_pragmas()
+    if 'mode=ro' in str(connection.settings_dict['NAME']):
+        # Read-only files (the report snapshot) cannot change their journal mode
+        pragmas.pop('journal_mode', None)
+    # On the raw connection, so the query instrumentation does not count them
+    for name, value in pragmas.items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
@@ -0,0 +1,160 @@
+"""Serves the collectstatic output (STATIC_ROOT) in front of the Django app.
+
+The manifest storage names files by content (``admin_dashboard.3f2a9c1b07de.css``),
+so a hashed name never changes and is sent with a one-year ``immutable``
+Cache-Control: browsers do not even revalidate it. Other files get a short
+max-age. The ``.br``/``.gz`` copies written at collectstatic time
+(samo_edu_crm/storage.py) are sent as they are to clients that accept them.
+
+The file list is read once, when the process starts: run collectstatic
+before (re)starting the server. Without a STATIC_ROOT, or with STATIC_URL on
+another host, every request goes straight to the app.
+"""
+import asyncio
+import json
+import mimetypes
+import os
+from urllib.parse import urlsplit
+from wsgiref.util import FileWrapper
+
+from django.conf import settings
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+SHORT_LIVED = 'public, max-age=60'
+# Preferred first
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+CHUNK_SIZE = 64 * 1024
+MANIFEST = 'staticfiles.json'
+
+
+def accepted_encodings(header):
+    """Codings of an Accept-Encoding header, leaving out the ones refused with ``q=0``."""
+    codings = set()
+    for item in header.split(','):
+        coding, *params = [part.strip() for part in item.split(';')]
+        q = next((param[2:] for param in params if param.startswith('q=')), '1')
+        try:
+            if float(q) > 0:
+                codings.add(coding.lower())
+        except ValueError:
+            continue
+    return codings
+
+
+class StaticFiles:
+    """Index of the files under ``root``, by URL path."""
+
+    def __init__(self, root=None, url=None):
+        root = root if root is not None else settings.STATIC_ROOT
+        url = url if url is not None else settings.STATIC_URL
+        self.files = {}
+        if not root or not os.path.isdir(root) or urlsplit(url).netloc:
+            return
+        prefix = '/' + urlsplit(url).path.strip('/') + '/'
+        hashed = self.hashed_names(root)
+        for directory, _, names in os.walk(root):
+            for filename in names:
+                if filename.endswith(tuple(suffix for _, suffix in ENCODINGS)):
+                    continue
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, root).replace(os.sep, '/')
+                if name == MANIFEST:
+                    continue
+                self.files[prefix + name] = self.entry(path, name in hashed)
+
+    @staticmethod
+    def hashed_names(root):
+        try:
+            with open(os.path.join(root, MANIFEST)) as fh:
+                return set(json.load(fh).get('paths', {}).values())
+        except (OSError, ValueError):
+            return set()
+
+    @staticmethod
+    def entry(path, immutable):
+        content_type, _ = mimetypes.guess_type(path)
+        content_type = content_type or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type in ('application/javascript', 'application/json'):
+            content_type += '; charset=utf-8'
+        variants = {
+            coding: (path + suffix, os.path.getsize(path + suffix))
+            for coding, suffix in ENCODINGS if os.path.isfile(path + suffix)
+        }
+        return {
+            'path': path,
+            'size': os.path.getsize(path),
+            'variants': variants,
+            'headers': [
+                ('Content-Type', content_type),
+                ('Cache-Control', IMMUTABLE if immutable else SHORT_LIVED),
+                *([('Vary', 'Accept-Encoding')] if variants else []),
+            ],
+        }
+
+    def find(self, url_path, accept_encoding=''):
+        """``(file path, headers)`` to answer a GET of ``url_path`` with, or ``None``."""
+        entry = self.files.get(url_path)
+        if entry is None:
+            return None
+        headers = list(entry['headers'])
+        codings = accepted_encodings(accept_encoding) if entry['variants'] else ()
+        for coding, _ in ENCODINGS:
+            if coding in codings and coding in entry['variants']:
+                path, size = entry['variants'][coding]
+                headers.append(('Content-Encoding', coding))
+                break
+        else:
+            path, size = entry['path'], entry['size']
+        headers.append(('Content-Length', str(size)))
+        return path, headers
+
+
+class WSGIStaticFiles:
+    """WSGI middleware answering GET/HEAD requests for collected static files."""
+
+    def __init__(self, application, files=None):
+        self.application = application
+        self.files = files if files is not None else StaticFiles()
+
+    def __call__(self, environ, start_response):
+        method = environ['REQUEST_METHOD']
+        found = method in ('GET', 'HEAD') and self.files.find(
+            environ.get('PATH_INFO', ''), environ.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        if not found:
+            return self.application(environ, start_response)
+        path, headers = found
+        start_response('200 OK', headers)
+        if method == 'HEAD':
+            return []
+        wrapper = environ.get('wsgi.file_wrapper', FileWrapper)
+        return wrapper(open(path, 'rb'), CHUNK_SIZE)
+
+
+class ASGIStaticFiles:
+    """ASGI middleware answering GET/HEAD requests for collected static files."""
+
+    def __init__(self, application, files=None):
+        self.application = application
+        self.files = files if files is not None else StaticFiles()
+
+    async def __call__(self, scope, receive, send):
+        found = None
+        if scope['type'] == 'http' and scope['method'] in ('GET', 'HEAD'):
+            accept = next((value for key, value in scope['headers'] if key == b'accept-encoding'), b'')
+            found = self.files.find(scope['path'], accept.decode('latin-1'))
+        if not found:
+            await self.application(scope, receive, send)
+            return
+
+        path, headers = found
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [(key.lower().encode('latin-1'), value.encode('latin-1')) for key, value in headers],
+        })
+        if scope['method'] == 'GET':
+            with open(path, 'rb') as fh:
+                while chunk := await asyncio.to_thread(fh.read, CHUNK_SIZE):
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
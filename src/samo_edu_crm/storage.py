@@ -0,0 +1,61 @@
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # optional: without it only .gz copies are written
+    brotli = None
+
+# Formats that are compressed already; gzip would only make them bigger
+INCOMPRESSIBLE = {
+    '.png', '.jpg', '.jpeg', '.gif', '.webp', '.avif', '.ico', '.woff', '.woff2',
+    '.gz', '.br', '.zip', '.mp3', '.mp4', '.webm', '.pdf',
+}
+COMPRESS_MIN_SIZE = 256
+
+
+def compressors():
+    """``(suffix, compress)`` pairs for the encodings that can be written here."""
+    pairs = [('.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        pairs.insert(0, ('.br', lambda data: brotli.compress(data, quality=11)))
+    return pairs
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage that also writes ``.gz`` (and ``.br`` when the
+    brotli package is installed) copies of every collected file, so the static
+    layer (samo_edu_crm/static_layer.py) never compresses per request.
+
+    Before the first collectstatic there is no manifest; ``{% static %}`` then
+    links the source names (runserver and the tests serve those).
+    """
+
+    def stored_name(self, name):
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        for name in sorted({*self.hashed_files, *self.hashed_files.values()}):
+            self.compress(name)
+
+    def compress(self, name):
+        """Write the compressed copies of ``name`` that are smaller than the file itself."""
+        path = self.path(name)
+        if os.path.splitext(name)[1].lower() in INCOMPRESSIBLE or not os.path.isfile(path):
+            return
+        with open(path, 'rb') as fh:
+            data = fh.read()
+        for suffix, compress in compressors():
+            packed = compress(data) if len(data) >= COMPRESS_MIN_SIZE else data
+            if len(packed) < len(data) * 0.95:
+                with open(path + suffix, 'wb') as fh:
+                    fh.write(packed)
+            elif os.path.exists(path + suffix):
+                os.remove(path + suffix)
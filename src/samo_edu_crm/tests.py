@@ -0,0 +1,307 @@
+import asyncio
+import os
+import re
+import sqlite3
+import tempfile
+from datetime import date, timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection, router
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from education.models import Subject, Homework
+from exams.models import Exam, Result
+from exams.rollups import student_breakdown
+from exams.stats import filter_status, subject_breakdown, with_percentage
+from exams.views import RESULT_ORDERING
+from groups.models import Group, GroupMembership, Attendance, DailyAttendanceSummary, MonthlyStudentAttendance
+from groups.rollups import counter_totals, counters_by
+from groups.schedule import classes_on
+from groups.views import ATTENDANCE_ORDERING, filter_attendances
+from payments.models import Fee
+from payments.services import sweep_overdue_fees
+from payments.stats import fee_kpis, revenue_trend, student_fee_summary
+from payments.views import FEE_ORDERING
+from users.models import User, Teacher, Student
+from users.stats import admin_dashboard_stats
+from users.views import SEARCH_USER_ORDERING, filter_users
+from .pagination import keyset_page
+from .reports import report_reads
+from .sqlite_tuning import sqlite_pragmas
+from .static_layer import IMMUTABLE, ASGIStaticFiles, StaticFiles, WSGIStaticFiles
+from .storage import brotli
+
+# "SCAN groups_attendance" with no index after it reads the whole table
+FULL_SCAN = re.compile(r'\bSCAN (\w+)\s*$')
+
+
+def full_scans(sql):
+    """Tables that ``EXPLAIN QUERY PLAN`` says ``sql`` reads end to end."""
+    tables = set(connection.introspection.table_names())
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        plan = [row[-1] for row in cursor.fetchall()]
+    # Derived tables ("SCAN subquery") are not stored tables
+    return [match.group(1) for line in plan if (match := FULL_SCAN.search(line)) and match.group(1) in tables]
+
+
+class QueryPlanTests(TestCase):
+    """The hot paths of the views must be answered from an index, not a table scan.
+
+    Each path calls the helpers the views call (with the views' own filters
+    and orderings), and every statement they run is checked, so a change in
+    a view's query is checked too.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = Teacher.objects.create(
+            user=User.objects.create_user(username='teacher', password='pass', role='teacher')
+        )
+        cls.student = Student.objects.create(
+            user=User.objects.create_user(username='student', password='pass', role='student', first_name='Karim')
+        )
+        subject = Subject.objects.create(name='Math', code='M1')
+        cls.group = Group.objects.create(name='Math A', subject=subject, teacher=cls.teacher, schedule={})
+        GroupMembership.objects.create(student=cls.student, group=cls.group)
+        Attendance.objects.create(
+            student=cls.student, group=cls.group, date=date(2025, 3, 3), status='present',
+            recorded_by=cls.teacher.user,
+        )
+        exam = Exam.objects.create(name='Quiz', subject=subject, group=cls.group, date=timezone.now(), max_score=10)
+        Result.objects.create(exam=exam, student=cls.student, score=7)
+        Fee.objects.create(student=cls.student, amount=100, due_date=date(2025, 3, 1))
+        Homework.objects.create(
+            title='Ex. 1', subject=subject, assigned_by=cls.teacher, assigned_to=cls.group,
+            due_date=timezone.now(), description='',
+        )
+
+    def hot_paths(self):
+        """``{name: (callable, tables it may read whole)}``."""
+        today = date(2025, 3, 15)
+        student_rollups = MonthlyStudentAttendance.objects.filter(student=self.student)
+        return {
+            'attendance list page': (lambda: list(keyset_page(
+                filter_attendances(Attendance.objects.select_related('student__user', 'group'), {'status': 'present'}),
+                ATTENDANCE_ORDERING, {},
+            )), ()),
+            'teacher month summary': (lambda: counter_totals(DailyAttendanceSummary.objects.filter(
+                group__teacher=self.teacher, date__gte=today.replace(day=1), date__lt=date(2025, 4, 1),
+            )), ()),
+            'student attendance rollups': (
+                lambda: (counter_totals(student_rollups), counters_by(student_rollups, 'group_id')), (),
+            ),
+            # The KPI counters count whole tables by design
+            'admin dashboard stats': (lambda: admin_dashboard_stats(now=timezone.now()), ()),
+            # The KPIs add up every fee by design
+            'payments page': (lambda: (
+                fee_kpis(Fee.objects.all()), revenue_trend(24, today=today),
+                list(keyset_page(Fee.objects.select_related('student__user'), FEE_ORDERING, {})),
+            ), ('payments_fee',)),
+            'overdue sweep': (lambda: sweep_overdue_fees(today=today), ()),
+            'student fees': (lambda: student_fee_summary(Fee.objects.filter(student=self.student)), ()),
+            'exam results page': (lambda: list(keyset_page(
+                Result.objects.select_related('exam', 'student__user'), RESULT_ORDERING, {},
+            )), ()),
+            'student exam results': (lambda: (
+                subject_breakdown(filter_status(with_percentage(Result.objects.filter(student=self.student)), 'passed')),
+                student_breakdown(self.student.pk),
+            ), ()),
+            'users search page': (lambda: list(keyset_page(
+                filter_users(User.objects.all(), {'search': 'kar'}), SEARCH_USER_ORDERING, {},
+            )), ()),
+            "teacher's classes today": (lambda: list(classes_on(today, teacher=self.teacher)), ()),
+            "student's classes today": (lambda: list(classes_on(today, student=self.student)), ()),
+        }
+
+    def test_no_full_table_scans(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('plans are checked on SQLite')
+        for name, (run, whole_tables) in self.hot_paths().items():
+            with self.subTest(name), CaptureQueriesContext(connection) as queries:
+                run()
+                statements = [
+                    query['sql'] for query in queries.captured_queries
+                    if query['sql'].lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE'))
+                ]
+                self.assertTrue(statements)
+                for sql in statements:
+                    scanned = [table for table in full_scans(sql) if table not in whole_tables]
+                    self.assertEqual(scanned, [], sql)
+
+
+class SqliteTuningTests(TestCase):
+    def open_file_database(self):
+        """A fresh connection to a throwaway SQLite file, opened through Django so the hook runs."""
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        wrapper = DatabaseWrapper({**connection.settings_dict, 'NAME': os.path.join(tmpdir.name, 'db.sqlite3')})
+        wrapper.ensure_connection()
+        self.addCleanup(wrapper.close)
+        return wrapper.connection
+
+    def pragma(self, raw, name):
+        return raw.execute(f'PRAGMA {name}').fetchone()[0]
+
+    def test_new_connections_are_tuned(self):
+        raw = self.open_file_database()
+        self.assertEqual(self.pragma(raw, 'journal_mode'), 'wal')
+        self.assertEqual(self.pragma(raw, 'synchronous'), 1)  # NORMAL
+        self.assertEqual(self.pragma(raw, 'busy_timeout'), 5000)
+        self.assertEqual(self.pragma(raw, 'cache_size'), -20000)
+        self.assertEqual(self.pragma(raw, 'temp_store'), 2)  # MEMORY
+
+    @override_settings(SQLITE_PRAGMAS={'journal_mode': None, 'busy_timeout': 250})
+    def test_settings_override_or_drop_single_pragmas(self):
+        raw = self.open_file_database()
+        self.assertEqual(self.pragma(raw, 'journal_mode'), 'delete')
+        self.assertEqual(self.pragma(raw, 'busy_timeout'), 250)
+        self.assertEqual(self.pragma(raw, 'synchronous'), 1)
+
+    @override_settings(SQLITE_PRAGMAS={'cache_size': '1; DROP TABLE users_user'})
+    def test_values_are_validated(self):
+        with self.assertRaises(ImproperlyConfigured):
+            sqlite_pragmas()
+
+
+class ReportSnapshotTests(TransactionTestCase):
+    # VACUUM INTO cannot run inside the test's own transaction
+    databases = {'default', 'reports'}
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='pass', role='admin')
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.path = Path(tmpdir.name) / 'reports.sqlite3'
+        settings = override_settings(REPORT_SNAPSHOT_PATH=self.path)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_snapshot_is_a_read_only_copy(self):
+        call_command('build_report_snapshot', stdout=StringIO())
+        self.assertFalse(os.access(self.path, os.W_OK) and os.geteuid() != 0)
+        copy = sqlite3.connect(f'file:{self.path}?mode=ro', uri=True)
+        self.addCleanup(copy.close)
+        self.assertEqual(copy.execute('PRAGMA journal_mode').fetchone()[0], 'delete')
+        self.assertEqual(
+            copy.execute('SELECT username FROM users_user').fetchall(), [('admin',)]
+        )
+
+    def test_report_reads_use_the_snapshot_only_when_there_is_one(self):
+        with report_reads():
+            self.assertEqual(router.db_for_read(Attendance), 'default')
+
+        call_command('build_report_snapshot', stdout=StringIO())
+        with report_reads():
+            self.assertEqual(router.db_for_read(Attendance), 'reports')
+            self.assertEqual(router.db_for_write(Attendance), 'default')
+        self.assertEqual(router.db_for_read(Attendance), 'default')
+
+        with override_settings(REPORT_SNAPSHOT_MAX_AGE=0), report_reads():
+            os.utime(self.path, (0, 0))
+            self.assertEqual(router.db_for_read(Attendance), 'default')
+
+    def test_report_pages_show_snapshot_age(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('attendance_list'))
+        self.assertContains(response, 'Live data')
+
+        call_command('build_report_snapshot', stdout=StringIO())
+        response = self.client.get(reverse('attendance_list'))
+        self.assertIsNotNone(response.context['report_snapshot']['taken_at'])
+        self.assertContains(response, 'Report data as of')
+        # Pages that are not reports do not get the flag
+        self.assertNotIn('report_snapshot', self.client.get(reverse('groups_list')).context)
+
+
+STYLESHEET = re.compile(r'<link rel="stylesheet" href="(/static/[^"]+)"')
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class StaticPipelineTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', password='pass', role='admin')
+        cls.student = Student.objects.create(
+            user=User.objects.create_user(username='student', password='pass', role='student')
+        )
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        settings = override_settings(STATIC_ROOT=tmpdir.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        self.files = StaticFiles(tmpdir.name, '/static/')
+        self.layer = WSGIStaticFiles(lambda environ, start_response: [], self.files)
+
+    def fetch(self, url, accept_encoding='gzip, br'):
+        response = {}
+        body = b''.join(self.layer(
+            {'REQUEST_METHOD': 'GET', 'PATH_INFO': url, 'HTTP_ACCEPT_ENCODING': accept_encoding},
+            lambda status, headers: response.update(status=status, headers=dict(headers)),
+        ))
+        return response['status'], response['headers'], body
+
+    def test_transferred_bytes_per_page(self):
+        for user, name in ((self.admin, 'admin_dashboard'), (self.student.user, 'student_dashboard')):
+            with self.subTest(name):
+                self.client.force_login(user)
+                html = self.client.get(reverse(name)).content
+                stylesheets = STYLESHEET.findall(html.decode())
+                self.assertTrue(stylesheets)
+                raw = compressed = 0
+                for url in stylesheets:
+                    status, headers, body = self.fetch(url)
+                    self.assertEqual((status, headers['Cache-Control']), ('200 OK', IMMUTABLE))
+                    raw += len(self.fetch(url, accept_encoding='')[2])
+                    compressed += len(body)
+
+                # Before: the same CSS inline in every response, uncompressed
+                before = len(html) + raw
+                first_visit = len(html) + compressed
+                # Immutable stylesheets are not even revalidated on later visits
+                repeat_visit = len(html)
+                self.assertLess(compressed, raw / 2)
+                self.assertLess(first_visit, before)
+                self.assertLess(repeat_visit, before * 0.75, (before, first_visit, repeat_visit))
+
+    def test_layer_negotiates_encoding_and_cache_lifetime(self):
+        hashed = next(url for url in self.files.files if re.search(r'/admin_dashboard\.[0-9a-f]{12}\.css$', url))
+        _, headers, body = self.fetch(hashed, accept_encoding='gzip;q=0, identity')
+        self.assertNotIn('Content-Encoding', headers)
+        self.assertEqual(headers['Vary'], 'Accept-Encoding')
+        self.assertEqual(int(headers['Content-Length']), len(body))
+        _, headers, _ = self.fetch(hashed)
+        self.assertEqual(headers['Content-Encoding'], 'br' if brotli else 'gzip')
+        # The unhashed copy may change on the next deploy
+        _, headers, _ = self.fetch('/static/css/admin/admin_dashboard.css')
+        self.assertNotEqual(headers['Cache-Control'], IMMUTABLE)
+
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        asgi = ASGIStaticFiles(None, self.files)
+        asyncio.run(asgi({'type': 'http', 'method': 'GET', 'path': hashed, 'headers': []}, None, send))
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertIn((b'cache-control', IMMUTABLE.encode()), sent[0]['headers'])
+        self.assertEqual(b''.join(message.get('body', b'') for message in sent[1:]), body)
+
+    def test_collectstatic_without_brotli_writes_only_gzip(self):
+        with tempfile.TemporaryDirectory() as root, override_settings(STATIC_ROOT=root), \
+                mock.patch('samo_edu_crm.storage.brotli', None):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            written = [name for _, _, names in os.walk(root) for name in names]
+        self.assertTrue(any(name.endswith('.css.gz') for name in written))
+        self.assertFalse(any(name.endswith('.br') for name in written))
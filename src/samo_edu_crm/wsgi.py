@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'samo_edu_crm.settings')
 
 application = get_wsgi_application()
+
+# Hashed, precompressed static files with far-future caching (after collectstatic)
+from samo_edu_crm.static_layer import WSGIStaticFiles  # noqa: E402
+
+application = WSGIStaticFiles(application)
@@ -0,0 +1,316 @@
+"""Deterministic bulk dataset builder for load tests and benchmarks.
+
+Everything is written with ``bulk_create`` in batches and a single password
+hash, so tens of thousands of users and millions of attendance rows take
+minutes instead of hours. The same ``seed`` and ``today`` always give the same
+data. Rows written this way skip model signals, so the derived tables
+(attendance, performance and revenue rollups, search index) are rebuilt at the end
+and the people APIs get a new ETag stamp.
+"""
+import random
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from education.models import Subject, Homework
+from exams.models import Exam, Result
+from exams.rollups import rebuild_performance
+from groups.models import Group, GroupMembership, Attendance
+from groups.rollups import rebuild_attendance_rollups
+from groups.schedule import rebuild_schedule_slots
+from payments.models import Fee
+from payments.rollups import reconcile_monthly_revenue
+from .models import User, Teacher, Student, Parent
+from .search import rebuild_search_index
+from .versions import PEOPLE, touch
+
+DEFAULT_PASSWORD = 'password123'
+
+FIRST_NAMES = [
+    'Akbar', 'Dilshod', 'Anvar', 'Oybek', 'Nodir', 'Sardor', 'Jasur', 'Bekzod', 'Aziz', 'Sherzod',
+    'Zarina', 'Malika', 'Nilufar', 'Dilnoza', 'Madina', 'Sevara', 'Kamola', 'Gulnora', 'Shahnoza', 'Feruza',
+]
+LAST_NAMES = [
+    'Ibragimov', 'Karimov', 'Sultonov', 'Rahimov', 'Qodirov', 'Usmonov', 'Yusupov', 'Aliyev',
+    'Tursunov', 'Ergashev', 'Nazarov', 'Mirzayev', 'Xolmatov', 'Saidov', 'Abdullayev', 'Hasanov',
+]
+SUBJECT_NAMES = [
+    'Mathematics', 'Physics', 'Chemistry', 'Biology', 'English', 'Russian', 'History', 'Geography',
+    'Informatics', 'Literature', 'Economics', 'Drawing',
+]
+# Mon/Wed/Fri or Tue/Thu/Sat, as date.weekday() numbers
+WEEK_PATTERNS = ((0, 2, 4), (1, 3, 5))
+DAY_NAMES = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+ATTENDANCE_WEIGHTS = (('present', 80), ('absent', 8), ('late', 8), ('excused', 4))
+
+
+@dataclass
+class DatasetSpec:
+    teachers: int = 5
+    students: int = 30
+    subjects: int = 6
+    groups: int = 6
+    groups_per_student: int = 2
+    attendance_days: int = 30
+    exams_per_group: int = 2
+    results_per_exam: int = 0  # 0 means every member of the group
+    fees_per_student: int = 2
+    homework_per_group: int = 2
+    parents_ratio: int = 6  # one parent per this many students
+    seed: int = 1
+    batch_size: int = 2000
+    prefix: str = ''  # added to usernames and subject codes so a second run does not collide
+    today: date = None
+
+
+def _name(rng):
+    return rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+
+
+def _batched(rows, batch_size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+class DatasetBuilder:
+    def __init__(self, spec, log=None):
+        self.spec = spec
+        self.rng = random.Random(spec.seed)
+        self.today = spec.today or timezone.localdate()
+        self.log = log or (lambda message: None)
+        self.counts = {}
+
+    def bulk(self, model, rows):
+        """bulk_create ``rows`` in batches; returns the saved objects (with pks)."""
+        saved = []
+        for batch in _batched(rows, self.spec.batch_size):
+            saved.extend(model.objects.bulk_create(batch))
+        self.counts[model._meta.label] = self.counts.get(model._meta.label, 0) + len(saved)
+        return saved
+
+    def stream(self, model, rows):
+        """Like :meth:`bulk` for large tables: keeps only a count, not the objects."""
+        written = 0
+        for batch in _batched(rows, self.spec.batch_size):
+            model.objects.bulk_create(batch)
+            written += len(batch)
+        self.counts[model._meta.label] = self.counts.get(model._meta.label, 0) + written
+        return written
+
+    def aware(self, day, hour=9):
+        return timezone.make_aware(datetime.combine(day, time(hour)))
+
+    def build(self):
+        spec = self.spec
+        with transaction.atomic():
+            password = make_password(DEFAULT_PASSWORD)
+            subjects = self.build_subjects()
+            teachers = self.build_people(Teacher, 'teacher', spec.teachers, password)
+            students = self.build_people(Student, 'student', spec.students, password)
+            self.build_parents(students, password)
+            self.log(f"Users: {spec.teachers} teachers, {spec.students} students")
+
+            self.assign_teacher_subjects(teachers, subjects)
+            groups = self.build_groups(subjects, teachers)
+            members = self.build_memberships(groups, students)
+            self.log(f"Groups: {len(groups)} with {sum(len(m) for m in members.values())} memberships")
+
+            self.build_homework(groups)
+            self.build_exams_and_results(groups, members)
+            self.build_attendance(groups, members)
+            self.build_fees(students)
+            self.log(f"Attendance rows: {self.counts.get('groups.Attendance', 0)}")
+
+            self.rebuild_derived()
+        return self.counts
+
+    def build_subjects(self):
+        return self.bulk(Subject, (
+            Subject(
+                name=SUBJECT_NAMES[i % len(SUBJECT_NAMES)] + (f' {i // len(SUBJECT_NAMES) + 1}' if i >= len(SUBJECT_NAMES) else ''),
+                code=f'{self.spec.prefix}S{i + 1:03d}',
+                description='',
+            )
+            for i in range(self.spec.subjects)
+        ))
+
+    def build_people(self, profile_model, role, count, password):
+        users = []
+        for i in range(count):
+            first_name, last_name = _name(self.rng)
+            username = f'{self.spec.prefix}{role}{i + 1:05d}'
+            users.append(User(
+                username=username, password=password, role=role,
+                first_name=first_name, last_name=last_name, email=f'{username}@example.com',
+            ))
+        users = self.bulk(User, users)
+        return self.bulk(profile_model, (profile_model(user_id=user.pk) for user in users))
+
+    def build_parents(self, students, password):
+        if not students or not self.spec.parents_ratio:
+            return
+        parents = self.build_people(Parent, 'parent', max(1, len(students) // self.spec.parents_ratio), password)
+        links = Parent.students.through
+        self.bulk(links, (
+            links(parent_id=parent.pk, student_id=student.pk)
+            for i, parent in enumerate(parents)
+            for student in students[i * self.spec.parents_ratio:(i + 1) * self.spec.parents_ratio]
+        ))
+
+    def assign_teacher_subjects(self, teachers, subjects):
+        links = Teacher.subjects.through
+        self.bulk(links, (
+            links(teacher_id=teacher.pk, subject_id=subject.pk)
+            for teacher in teachers
+            for subject in self.rng.sample(subjects, k=min(len(subjects), self.rng.randint(1, 3)))
+        ))
+
+    def build_groups(self, subjects, teachers):
+        groups = []
+        for i in range(self.spec.groups):
+            days = WEEK_PATTERNS[i % len(WEEK_PATTERNS)]
+            start = 9 + (i // len(WEEK_PATTERNS)) % 8
+            groups.append(Group(
+                name=f'{self.spec.prefix}Group {i + 1}',
+                subject=subjects[i % len(subjects)],
+                teacher=teachers[i % len(teachers)],
+                schedule={'schedule': f"{', '.join(DAY_NAMES[d] for d in days)} {start:02d}:00-{start + 1:02d}:30"},
+                status='active',
+            ))
+        return self.bulk(Group, groups)
+
+    def build_memberships(self, groups, students):
+        members = {group.pk: [] for group in groups}
+        per_student = min(self.spec.groups_per_student, len(groups))
+        for i, student in enumerate(students):
+            # Round-robin first group keeps group sizes even, the rest are random
+            chosen = [groups[i % len(groups)].pk]
+            target = self.rng.randint(1, per_student) if per_student else 0
+            while len(chosen) < target:
+                group_id = self.rng.choice(groups).pk
+                if group_id not in chosen:
+                    chosen.append(group_id)
+            for group_id in chosen:
+                members[group_id].append(student.pk)
+        self.bulk(GroupMembership, (
+            GroupMembership(group_id=group_id, student_id=student_id)
+            for group_id, student_ids in members.items()
+            for student_id in student_ids
+        ))
+        return members
+
+    def build_homework(self, groups):
+        self.bulk(Homework, (
+            Homework(
+                title=f'{group.subject.name} homework {n + 1}',
+                subject_id=group.subject_id,
+                assigned_by_id=group.teacher_id,
+                assigned_to_id=group.pk,
+                due_date=self.aware(self.today + timedelta(days=self.rng.randint(-14, 14)), 23),
+                description='Complete the exercises.',
+            )
+            for group in groups
+            for n in range(self.spec.homework_per_group)
+        ))
+
+    def build_exams_and_results(self, groups, members):
+        exams = self.bulk(Exam, (
+            Exam(
+                name=f'{group.subject.name} exam {n + 1}',
+                subject_id=group.subject_id,
+                group_id=group.pk,
+                # Every other exam is in the future, the rest already graded
+                date=self.aware(self.today + timedelta(days=(7 if n % 2 else -7 * (n + 1)))),
+                max_score=100,
+            )
+            for group in groups
+            for n in range(self.spec.exams_per_group)
+        ))
+
+        def results():
+            for exam in exams:
+                if exam.date.date() > self.today:
+                    continue
+                student_ids = members[exam.group_id]
+                if self.spec.results_per_exam:
+                    student_ids = self.rng.sample(student_ids, k=min(len(student_ids), self.spec.results_per_exam))
+                for student_id in student_ids:
+                    yield Result(exam_id=exam.pk, student_id=student_id, score=self.rng.randint(30, 100), remarks='')
+
+        self.stream(Result, results())
+
+    def build_attendance(self, groups, members):
+        statuses = [status for status, _ in ATTENDANCE_WEIGHTS]
+        weights = [weight for _, weight in ATTENDANCE_WEIGHTS]
+
+        def rows():
+            for i, group in enumerate(groups):
+                days = WEEK_PATTERNS[i % len(WEEK_PATTERNS)]
+                recorded_by = group.teacher.user_id
+                for back in range(self.spec.attendance_days, 0, -1):
+                    day = self.today - timedelta(days=back)
+                    if day.weekday() not in days:
+                        continue
+                    picks = self.rng.choices(statuses, weights, k=len(members[group.pk]))
+                    for student_id, status in zip(members[group.pk], picks):
+                        yield Attendance(
+                            student_id=student_id, group_id=group.pk, date=day,
+                            status=status, recorded_by_id=recorded_by,
+                        )
+
+        self.stream(Attendance, rows())
+
+    def build_fees(self, students):
+        def rows():
+            for student in students:
+                for n in range(self.spec.fees_per_student):
+                    due = self.today + timedelta(days=30 * (n - self.spec.fees_per_student + 1) + self.rng.randint(-10, 10))
+                    roll = self.rng.random()
+                    if due < self.today and roll < 0.8:
+                        status, paid = 'paid', due - timedelta(days=self.rng.randint(0, 5))
+                    elif due < self.today:
+                        status, paid = 'overdue', None
+                    else:
+                        status, paid = 'pending', None
+                    yield Fee(
+                        student_id=student.pk, amount=Decimal(self.rng.choice((300, 400, 500))),
+                        due_date=due, paid_date=paid, status=status,
+                    )
+
+        self.stream(Fee, rows())
+
+    def rebuild_derived(self):
+        """Refresh the tables that signals would have maintained."""
+        rebuild_attendance_rollups(batch_size=self.spec.batch_size)
+        rebuild_schedule_slots(batch_size=self.spec.batch_size)
+        rebuild_performance(batch_size=self.spec.batch_size)
+        reconcile_monthly_revenue()
+        rebuild_search_index(batch_size=self.spec.batch_size)
+        touch(PEOPLE)
+
+
+def existing_keys(spec):
+    """Usernames and subject codes ``spec`` would create that are already taken."""
+    usernames = [
+        f'{spec.prefix}{role}{1:05d}' for role, count in
+        (('teacher', spec.teachers), ('student', spec.students), ('parent', spec.students // max(spec.parents_ratio, 1)))
+        if count
+    ]
+    taken = list(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+    if spec.subjects:
+        taken += Subject.objects.filter(code=f'{spec.prefix}S001').values_list('code', flat=True)
+    return taken
+
+
+def build_dataset(spec, log=None):
+    """Build ``spec`` into the current database; returns ``{model label: rows written}``."""
+    return DatasetBuilder(spec, log=log).build()
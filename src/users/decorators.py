@@ -1,72 +1,50 @@
 from functools import wraps
-from django.shortcuts import redirect
-from django.contrib import messages
-from django.core.exceptions import PermissionDenied
-from django.shortcuts import redirect
-
-def admin_required(view_func):
-    @wraps(view_func)
-    def _wrapped_view(request, *args, **kwargs):
-        if not request.user.is_authenticated:
-            messages.error(request, "Please log in to access this page.")
-            return redirect('login')
-
-        if not request.user.role == 'admin':
-            messages.error(request, "You don't have permission to access this page.")
-            return redirect('login')
-
-        return view_func(request, *args, **kwargs)
-
-    return _wrapped_view
-
-def teacher_required(view_func):
-    def wrapper(request, *args, **kwargs):
-        if request.user.is_authenticated and request.user.role == 'teacher':
-            return view_func(request, *args, **kwargs)
-        else:
-            return redirect('login')
-    return wrapper
-
-def student_required(view_func):
-    @wraps(view_func)
-    def _wrapped_view(request, *args, **kwargs):
-        if not request.user.is_authenticated:
-            messages.error(request, "Please log in to access this page.")
-            return redirect('login')
-
-        if not request.user.role == 'student':
-            messages.error(request, "You don't have permission to access this page.")
-            return redirect('login')
-
-        return view_func(request, *args, **kwargs)
-    return _wrapped_view
 
-from django.http import HttpResponseForbidden
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.http import Http404, HttpResponseForbidden
 from django.shortcuts import redirect
 
-def admin_required(view_func):
-    def wrapper(request, *args, **kwargs):
-        if not request.user.is_authenticated:
-            return redirect('login')
-        if not request.user.role == 'admin':
-            return HttpResponseForbidden("You don't have permission to access this page.")
-        return view_func(request, *args, **kwargs)
-    return wrapper
-
-def teacher_required(view_func):
-    def wrapper(request, *args, **kwargs):
-        if not request.user.is_authenticated:
-            return redirect('login')
-        if not request.user.role == 'teacher':
-            return HttpResponseForbidden("You don't have permission to access this page.")
-        return view_func(request, *args, **kwargs)
-    return wrapper
-
-def student_required(view_func):
-    def wrapper(request, *args, **kwargs):
-        if not request.user.is_authenticated:
-            return redirect('login')
-        if not request.user.role == 'student':
-            return HttpResponseForbidden("You don't have permission to access this page.")
-        return view_func(request, *args, **kwargs)
-    return wrapper
\ No newline at end of file
+from .profiles import PROFILE_FIELDS, request_profile
+
+
+def _check_role(request, role):
+    """Response refusing ``request``, or ``None`` after setting ``request.profile``."""
+    if not request.user.is_authenticated:
+        return redirect('login')
+    if request.user.role != role:
+        return HttpResponseForbidden("You don't have permission to access this page.")
+    request.profile = request_profile(request)
+    if role in PROFILE_FIELDS and request.profile is None:
+        raise Http404(f"No {role} profile for this user")
+    return None
+
+
+def role_required(role):
+    """Only let users with ``role`` in; their profile is set as ``request.profile``.
+
+    Anonymous users go to the login page, other roles get a 403 and a
+    teacher/student account without its profile row a 404. Stacking the
+    decorator (in urls.py and on the view) resolves the profile only once.
+    Works on sync and async views.
+    """
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            async def wrapper(request, *args, **kwargs):
+                # request.user is loaded lazily from the database
+                denied = await sync_to_async(_check_role)(request, role)
+                if denied is not None:
+                    return denied
+                return await view_func(request, *args, **kwargs)
+        else:
+            def wrapper(request, *args, **kwargs):
+                denied = _check_role(request, role)
+                if denied is not None:
+                    return denied
+                return view_func(request, *args, **kwargs)
+        return wraps(view_func)(wrapper)
+    return decorator
+
+
+admin_required = role_required('admin')
+teacher_required = role_required('teacher')
+student_required = role_required('student')
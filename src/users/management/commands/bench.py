@@ -0,0 +1,287 @@
+import io
+import json
+import logging
+import math
+import os
+import platform
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager, redirect_stdout
+from dataclasses import asdict, fields
+
+import django
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils import timezone
+
+from education.models import Homework
+from exams.models import Exam
+from groups.models import Group, Attendance, GroupMembership
+from payments.models import Fee
+from users.dataset import DatasetSpec, build_dataset
+from users.models import User, Student
+
+APPS = ('users', 'groups', 'exams', 'education', 'payments')
+
+SCALES = {
+    'small': DatasetSpec(teachers=10, students=500, subjects=8, groups=25, attendance_days=60),
+    'medium': DatasetSpec(teachers=25, students=5000, subjects=10, groups=150, attendance_days=120),
+    'large': DatasetSpec(teachers=50, students=20000, subjects=12, groups=600, attendance_days=240),
+}
+
+# GET on these either changes data or needs a POST body
+SKIP_WORDS = ('delete', 'remove', 'save', 'mark', 'logout')
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@contextmanager
+def quiet_loggers(*names):
+    """Silence budget warnings and error tracebacks; the report has the numbers."""
+    loggers = [logging.getLogger(name) for name in names]
+    previous = [logger.disabled for logger in loggers]
+    for logger in loggers:
+        logger.disabled = True
+    try:
+        yield
+    finally:
+        for logger, disabled in zip(loggers, previous):
+            logger.disabled = disabled
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of ``values`` (0 < p <= 100)."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def named_urls(resolver=None, namespace=None, app=None):
+    """Yield ``(url name, route kwargs, app)`` for every named pattern of :data:`APPS`."""
+    resolver = resolver or get_resolver()
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            module = getattr(pattern.urlconf_module, '__name__', '')
+            child_app = module.split('.')[0] if module.split('.')[0] in APPS else app
+            child_namespace = ':'.join(filter(None, [namespace, pattern.namespace])) or None
+            yield from named_urls(pattern, child_namespace, child_app)
+        elif isinstance(pattern, URLPattern) and pattern.name and app:
+            name = f'{namespace}:{pattern.name}' if namespace else pattern.name
+            yield name, list(pattern.pattern.converters), app
+
+
+class Command(BaseCommand):
+    help = (
+        "Build a deterministic dataset in a throwaway test database, request every named URL of "
+        "the main apps as admin, teacher and student, and report p50/p95 latency and query counts "
+        "as JSON, optionally compared with a saved baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=SCALES, default='small', help='Dataset size preset')
+        for field in fields(DatasetSpec):
+            if field.name in ('today', 'prefix'):
+                continue
+            parser.add_argument(
+                f"--{field.name.replace('_', '-')}", type=int, default=None,
+                help=f'Override the preset {field.name}',
+            )
+        parser.add_argument('--repeat', type=int, default=10, help='Timed requests per URL')
+        parser.add_argument('--warmup', type=int, default=1, help='Untimed requests per URL')
+        parser.add_argument('--warm-cache', action='store_true', help='Keep dashboard snapshots between requests')
+        parser.add_argument('--only', action='append', default=[], help='Only URL names containing this text')
+        parser.add_argument('--output', default='bench.json', help='Where to write the JSON report')
+        parser.add_argument('--baseline', help='Earlier report to compare with')
+        parser.add_argument('--threshold', type=float, default=1.25, help='Slowdown factor counted as a regression')
+        parser.add_argument('--min-delta-ms', type=float, default=2.0, help='Ignore slowdowns smaller than this')
+        parser.add_argument('--fail-on-regression', action='store_true', help='Exit with an error on regressions')
+
+    def handle(self, *args, **options):
+        spec = DatasetSpec(**asdict(SCALES[options['scale']]))
+        for field in fields(DatasetSpec):
+            if options.get(field.name) is not None:
+                setattr(spec, field.name, options[field.name])
+
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as fh:
+                baseline = json.load(fh)
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        # Only default gets a test database: with the real report snapshot
+        # configured, report views would time reads of production data
+        no_snapshot = tempfile.TemporaryDirectory()
+        try:
+            with override_settings(CACHES=LOCMEM_CACHE, QUERY_INSTRUMENTATION=True, ALLOWED_HOSTS=['*'],
+                                   REPORT_SNAPSHOT_PATH=os.path.join(no_snapshot.name, 'reports.sqlite3')), \
+                    quiet_loggers('samo_edu_crm.queries', 'django.request'):
+                started = time.perf_counter()
+                counts = build_dataset(spec, log=self.stdout.write)
+                self.stdout.write(f"Dataset built in {time.perf_counter() - started:.1f}s")
+                results = self.run_urls(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            no_snapshot.cleanup()
+
+        report = {
+            'meta': {
+                'created': timezone.now().isoformat(),
+                'scale': options['scale'],
+                'spec': {k: v for k, v in asdict(spec).items() if k not in ('today', 'prefix')},
+                'rows': counts,
+                'repeat': options['repeat'],
+                'warm_cache': options['warm_cache'],
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'sqlite': sqlite3.sqlite_version,
+            },
+            'urls': results,
+        }
+        with open(options['output'], 'w') as fh:
+            json.dump(report, fh, indent=2, sort_keys=True)
+        self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+
+        if baseline:
+            regressions = self.compare(baseline, report, options)
+            if regressions and options['fail_on_regression']:
+                raise CommandError(f"{len(regressions)} regression(s) against {options['baseline']}")
+
+    def sample_objects(self):
+        """One teacher/student/group/exam/... that the role views below can all reach."""
+        group = Group.objects.select_related('teacher__user').order_by('pk').first()
+        student_id = GroupMembership.objects.filter(group=group).values_list('student_id', flat=True).first()
+        student = Student.objects.select_related('user').get(pk=student_id)
+        exam = Exam.objects.filter(group=group).order_by('pk').first()
+        homework = Homework.objects.filter(assigned_to=group).order_by('pk').first()
+        admin = User.objects.create_user(username='bench-admin', password='x', role='admin', is_staff=True)
+        return {
+            'users': {'admin': admin, 'teacher': group.teacher.user, 'student': student.user},
+            'kwargs': {
+                'group_id': group.pk,
+                'exam_id': exam.pk if exam else None,
+                'student_id': student.pk,
+                'teacher_id': group.teacher_id,
+                'user_id': student.user_id,
+                'payment_id': Fee.objects.filter(student=student).values_list('pk', flat=True).first(),
+            },
+            'pk': {
+                'attendance': Attendance.objects.filter(group=group).values_list('pk', flat=True).first(),
+                'homework': homework.pk if homework else None,
+                'subject': group.subject_id,
+                'student': student.pk,
+            },
+        }
+
+    def url_kwargs(self, name, params, samples):
+        kwargs = {}
+        for param in params:
+            if param == 'pk':
+                value = next((v for key, v in samples['pk'].items() if key in name), None)
+            else:
+                value = samples['kwargs'].get(param)
+            if value is None:
+                return None
+            kwargs[param] = value
+        return kwargs
+
+    def request(self, client, url):
+        # Some views still print debug output; keep it out of the report
+        with redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            response = client.get(url)
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+            elapsed = (time.perf_counter() - start) * 1000
+        return response, elapsed
+
+    def run_urls(self, options):
+        samples = self.sample_objects()
+        clients = {}
+        for role, user in samples['users'].items():
+            clients[role] = Client(raise_request_exception=False)
+            clients[role].force_login(user)
+
+        results = {}
+        for name, params, app in named_urls():
+            if name in results or any(word in name for word in SKIP_WORDS):
+                continue
+            if options['only'] and not any(text in name for text in options['only']):
+                continue
+            kwargs = self.url_kwargs(name, params, samples)
+            if kwargs is None:
+                self.stdout.write(self.style.WARNING(f"skip {name}: no sample for {params}"))
+                continue
+            url = reverse(name, kwargs=kwargs)
+
+            # The first role that gets a real page (not a redirect, 403 or error) owns the URL
+            statuses = {}
+            for role, client in clients.items():
+                cache.clear()
+                response, _ = self.request(client, url)
+                statuses[role] = response.status_code
+                if response.status_code < 300:
+                    break
+            else:
+                self.stdout.write(self.style.WARNING(f"skip {name}: no role got a page {statuses}"))
+                continue
+
+            for _ in range(options['warmup'] - 1):
+                self.request(client, url)
+            timings, queries = [], []
+            for _ in range(options['repeat']):
+                if not options['warm_cache']:
+                    cache.clear()
+                response, elapsed = self.request(client, url)
+                timings.append(elapsed)
+                queries.append(int(response.get('X-Query-Count', 0)))
+
+            results[name] = {
+                'app': app,
+                'url': url,
+                'role': role,
+                'status': response.status_code,
+                'p50_ms': round(percentile(timings, 50), 2),
+                'p95_ms': round(percentile(timings, 95), 2),
+                'mean_ms': round(sum(timings) / len(timings), 2),
+                'queries': max(queries),
+            }
+            row = results[name]
+            self.stdout.write(
+                f"{name:<45} {role:<8} {row['status']}  p50 {row['p50_ms']:>8.2f} ms  "
+                f"p95 {row['p95_ms']:>8.2f} ms  {row['queries']:>4} queries"
+            )
+        return results
+
+    def compare(self, baseline, report, options):
+        regressions = []
+        for name, row in report['urls'].items():
+            old = baseline.get('urls', {}).get(name)
+            if not old:
+                continue
+            slower = (row['p50_ms'] > old['p50_ms'] * options['threshold']
+                      and row['p50_ms'] - old['p50_ms'] > options['min_delta_ms'])
+            more_queries = row['queries'] > old['queries']
+            if slower or more_queries:
+                regressions.append(name)
+                self.stdout.write(self.style.ERROR(
+                    f"REGRESSION {name}: p50 {old['p50_ms']} -> {row['p50_ms']} ms, "
+                    f"queries {old['queries']} -> {row['queries']}"
+                ))
+            elif row['p50_ms'] * options['threshold'] < old['p50_ms'] or row['queries'] < old['queries']:
+                self.stdout.write(self.style.SUCCESS(
+                    f"improved {name}: p50 {old['p50_ms']} -> {row['p50_ms']} ms, "
+                    f"queries {old['queries']} -> {row['queries']}"
+                ))
+        missing = sorted(set(baseline.get('urls', {})) - set(report['urls']))
+        for name in missing if not options['only'] else ():
+            self.stdout.write(self.style.WARNING(f"{name} is in the baseline but was not measured"))
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline"))
+        return regressions
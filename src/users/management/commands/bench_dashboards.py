@@ -0,0 +1,112 @@
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import time
+from dataclasses import asdict
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.db.models import Count
+from django.test import AsyncClient
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from users.dataset import DatasetSpec, build_dataset
+from users.management.commands.bench import LOCMEM_CACHE, SCALES, percentile, quiet_loggers
+from users.models import User, Student
+
+DASHBOARDS = (('admin_dashboard', 'admin'), ('student_dashboard', 'student'))
+
+
+class Command(BaseCommand):
+    help = (
+        "Build a dataset in a throwaway SQLite file and time cold (uncached) admin and student "
+        "dashboard requests through the ASGI handler, with the snapshot query groups run one "
+        "after another (FANOUT_WORKERS=1) and side by side on the thread pool."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=SCALES, default='medium', help='Dataset size preset')
+        parser.add_argument('--workers', type=int, default=4, help='FANOUT_WORKERS of the concurrent run')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed requests per dashboard and mode')
+        parser.add_argument('--warmup', type=int, default=2, help='Untimed requests per dashboard and mode')
+        parser.add_argument('--output', help='Also write the report as JSON here')
+
+    def handle(self, *args, **options):
+        workdir = tempfile.mkdtemp(prefix='bench-dashboards-')
+        # The pool threads open connections of their own, so the database must be a file
+        connection.settings_dict['TEST']['NAME'] = os.path.join(workdir, 'bench.sqlite3')
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(CACHES=LOCMEM_CACHE, ALLOWED_HOSTS=['*']), \
+                    quiet_loggers('samo_edu_crm.queries', 'django.request'):
+                spec = DatasetSpec(**asdict(SCALES[options['scale']]))
+                started = time.perf_counter()
+                build_dataset(spec, log=self.stdout.write)
+                self.stdout.write(f"Dataset built in {time.perf_counter() - started:.1f}s")
+                clients = self.login_clients()
+                connections.close_all()
+                report = asyncio.run(self.run_modes(clients, options))
+        finally:
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            shutil.rmtree(workdir, ignore_errors=True)
+
+        for name, _ in DASHBOARDS:
+            sequential, concurrent = report[name]['sequential'], report[name]['concurrent']
+            report[name]['speedup'] = round(sequential['p50_ms'] / concurrent['p50_ms'], 2)
+            self.stdout.write(self.style.SUCCESS(
+                f"{name:<18} p50 {sequential['p50_ms']:.1f} -> {concurrent['p50_ms']:.1f} ms "
+                f"({report[name]['speedup']}x)"
+            ))
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(report, fh, indent=2, sort_keys=True)
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+
+    def login_clients(self):
+        """An admin and the student with the most group memberships, logged in."""
+        admin = User.objects.create_user(username='bench-admin', password='x', role='admin', is_staff=True)
+        student = Student.objects.annotate(groups=Count('groupmembership')).order_by('-groups', 'pk').first()
+        clients = {}
+        for role, user in (('admin', admin), ('student', student.user)):
+            clients[role] = AsyncClient(raise_request_exception=False)
+            clients[role].force_login(user)
+        return clients
+
+    async def run_modes(self, clients, options):
+        report = {name: {} for name, _ in DASHBOARDS}
+        for mode, workers in (('sequential', 1), ('concurrent', options['workers'])):
+            with override_settings(FANOUT_WORKERS=workers):
+                for name, role in DASHBOARDS:
+                    report[name][mode] = row = await self.measure(clients[role], reverse(name), options)
+                    self.stdout.write(
+                        f"{name:<18} {mode:<10} p50 {row['p50_ms']:>8.2f} ms  p95 {row['p95_ms']:>8.2f} ms  "
+                        f"{row['queries']:>3} queries"
+                    )
+        return report
+
+    async def measure(self, client, url, options):
+        timings, queries = [], set()
+        for i in range(options['warmup'] + options['repeat']):
+            # Only a snapshot miss runs the query groups
+            await cache.aclear()
+            started = time.perf_counter()
+            response = await client.get(url)
+            elapsed = (time.perf_counter() - started) * 1000
+            assert response.status_code == 200, f"{url} returned {response.status_code}"
+            if i >= options['warmup']:
+                timings.append(elapsed)
+                queries.add(int(response.get('X-Query-Count', 0)))
+        return {
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'mean_ms': round(sum(timings) / len(timings), 2),
+            'queries': max(queries),
+        }
@@ -0,0 +1,52 @@
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from samo_edu_crm.reports import REPORTS_DB
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the live database into the read-only report snapshot (REPORT_SNAPSHOT_PATH) with "
+        "VACUUM INTO: one read transaction, so writers (WAL) carry on and never restart the copy, "
+        "and the finished copy replaces the old snapshot in one rename. Run it from cron more "
+        "often than REPORT_SNAPSHOT_MAX_AGE."
+    )
+
+    def handle(self, *args, **options):
+        source = connections[DEFAULT_DB_ALIAS]
+        if source.vendor != 'sqlite':
+            raise CommandError("Report snapshots need the default database to be SQLite")
+
+        target = Path(settings.REPORT_SNAPSHOT_PATH)
+        partial = target.with_name(f'{target.name}.partial')
+        partial.unlink(missing_ok=True)
+
+        started = time.perf_counter()
+        source.ensure_connection()
+        # Unlike the stepwise backup API, which starts over whenever the source
+        # is written, this reads one consistent version of the database
+        source.connection.execute('VACUUM INTO ?', [str(partial)])
+        copy = sqlite3.connect(partial)
+        try:
+            # A WAL copy could not be opened read-only without its -shm file
+            copy.execute('PRAGMA journal_mode = DELETE')
+            page_count = copy.execute('PRAGMA page_count').fetchone()[0]
+        finally:
+            copy.close()
+
+        partial.chmod(0o444)
+        # Open report connections keep reading the old file until they close
+        os.replace(partial, target)
+        if REPORTS_DB in settings.DATABASES:
+            connections[REPORTS_DB].close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Report snapshot written to {target}: {page_count} pages, "
+            f"{target.stat().st_size / 1024 / 1024:.1f} MB in {time.perf_counter() - started:.2f}s"
+        ))
@@ -1,7 +1,8 @@
 # users/management/commands/seed_db.py
 import random
+import time
 from datetime import timedelta, datetime
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
 from django.db import IntegrityError, transaction
 from django.contrib.auth import get_user_model
@@ -21,6 +22,7 @@ from groups.models import Group, GroupMembership, Attendance
 from exams.models import Exam, Result
 from payments.models import Fee
 from users.models import Teacher, Student, Parent
+from users.dataset import DatasetSpec, build_dataset, existing_keys
 
 def fake_name():
     if fake:
@@ -48,7 +50,23 @@ class Command(BaseCommand):
         parser.add_argument('--subjects', type=int, default=6, help='Number of subjects to create')
         parser.add_argument('--groups', type=int, default=6, help='Number of groups to create')
 
+        # --bulk: bitta parol hash, bulk_create, seed bilan takrorlanadigan ma'lumot
+        bulk = parser.add_argument_group('bulk mode')
+        bulk.add_argument('--bulk', action='store_true', help='Generate data with bulk_create (for load tests)')
+        bulk.add_argument('--seed', type=int, default=1, help='Random seed; the same seed gives the same data')
+        bulk.add_argument('--prefix', default='', help='Prefix for usernames and subject codes (max 6 chars)')
+        bulk.add_argument('--groups-per-student', type=int, default=2, help='Max groups per student')
+        bulk.add_argument('--attendance-days', type=int, default=30, help='Days of attendance history')
+        bulk.add_argument('--exams-per-group', type=int, default=2, help='Exams per group')
+        bulk.add_argument('--results-per-exam', type=int, default=0, help='Results per past exam (0 = every member)')
+        bulk.add_argument('--fees-per-student', type=int, default=2, help='Monthly fees per student')
+        bulk.add_argument('--homework-per-group', type=int, default=2, help='Homework per group')
+        bulk.add_argument('--batch-size', type=int, default=2000, help='Rows per bulk_create batch')
+
     def handle(self, *args, **options):
+        if options['bulk']:
+            return self.handle_bulk(options)
+
         t_count = options['teachers']
         s_count = options['students']
         subj_count = options['subjects']
@@ -232,3 +250,38 @@ class Command(BaseCommand):
 
         self.stdout.write(self.style.SUCCESS("Seeding complete."))
         self.stdout.write(self.style.WARNING("Default passwords for created users are 'password123' — change them in production!"))
+
+    def handle_bulk(self, options):
+        if len(options['prefix']) > 6:
+            raise CommandError("--prefix can be at most 6 characters (subject codes are 10)")
+        if options['teachers'] < 1 or options['subjects'] < 1 or options['groups'] < 1:
+            raise CommandError("--bulk needs at least one teacher, subject and group")
+
+        spec = DatasetSpec(
+            teachers=options['teachers'],
+            students=options['students'],
+            subjects=options['subjects'],
+            groups=options['groups'],
+            groups_per_student=options['groups_per_student'],
+            attendance_days=options['attendance_days'],
+            exams_per_group=options['exams_per_group'],
+            results_per_exam=options['results_per_exam'],
+            fees_per_student=options['fees_per_student'],
+            homework_per_group=options['homework_per_group'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            prefix=options['prefix'],
+        )
+        taken = existing_keys(spec)
+        if taken:
+            raise CommandError(
+                f"{', '.join(taken)} already exist; run with a different --prefix"
+            )
+
+        self.stdout.write(self.style.SUCCESS("Starting bulk DB seed..."))
+        started = time.perf_counter()
+        counts = build_dataset(spec, log=self.stdout.write)
+        for label, count in counts.items():
+            self.stdout.write(f"  {label}: {count}")
+        self.stdout.write(self.style.SUCCESS(f"Bulk seeding complete in {time.perf_counter() - started:.1f}s."))
+        self.stdout.write(self.style.WARNING("Default passwords for created users are 'password123' — change them in production!"))
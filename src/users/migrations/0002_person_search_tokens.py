@@ -0,0 +1,43 @@
+# Generated by Django 5.2.6 on 2026-10-18 14:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_search_tokens(apps, schema_editor):
+    # Tokenizing is plain string work, so the current helper is safe to use here
+    from users.search import person_tokens
+
+    User = apps.get_model('users', 'User')
+    PersonSearchToken = apps.get_model('users', 'PersonSearchToken')
+    PersonSearchToken.objects.bulk_create(
+        (PersonSearchToken(user_id=user.pk, token=token, weight=weight)
+         for user in User.objects.only('first_name', 'last_name', 'username', 'email').iterator()
+         for token, weight in person_tokens(user).items()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PersonSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=254)),
+                ('weight', models.PositiveSmallIntegerField(default=1)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['token', 'user'], name='users_search_token_idx')],
+                'unique_together': {('user', 'token')},
+            },
+        ),
+        migrations.RunPython(backfill_search_tokens, migrations.RunPython.noop),
+    ]
@@ -11,6 +11,8 @@ class User(AbstractUser):
     role = models.CharField(max_length=10, choices=ROLE_CHOICES)
     phone = models.CharField(max_length=15, blank=True)
     address = models.TextField(blank=True)
+    # Moves on every save except login stamps (see users/signals.py); the ?since= of the student API reads it
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         permissions = [
@@ -43,4 +45,17 @@ class Parent(models.Model):
     students = models.ManyToManyField(Student, related_name='parents')
 
     def __str__(self):
-        return self.user.get_full_name() or self.user.username
\ No newline at end of file
+        return self.user.get_full_name() or self.user.username
+
+
+class PersonSearchToken(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='search_tokens')
+    token = models.CharField(max_length=254)
+    weight = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        unique_together = ['user', 'token']
+        indexes = [models.Index(fields=['token', 'user'], name='users_search_token_idx')]
+
+    def __str__(self):
+        return f"{self.token} -> {self.user_id}"
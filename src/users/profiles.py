@@ -0,0 +1,39 @@
+"""The role profile (Teacher/Student/Parent row) of the logged-in user.
+
+``ProfileBackend`` loads the session user with every profile joined in, so
+``request.user.teacher_profile`` (and ``hasattr`` checks on it) cost no
+extra query; :func:`request_profile` picks the one matching the user's role
+and keeps it on the request for the role decorators and views.
+"""
+from django.contrib.auth.backends import ModelBackend
+from django.core.exceptions import ObjectDoesNotExist
+
+from .models import User
+
+PROFILE_FIELDS = {'teacher': 'teacher_profile', 'student': 'student_profile', 'parent': 'parent_profile'}
+
+
+class ProfileBackend(ModelBackend):
+    """ModelBackend whose ``get_user`` joins the role profiles into the user query."""
+
+    def get_user(self, user_id):
+        user = User._default_manager.select_related(*PROFILE_FIELDS.values()).filter(pk=user_id).first()
+        return user if user is not None and self.user_can_authenticate(user) else None
+
+
+def role_profile(user):
+    """Profile row of ``user``'s role, or ``None`` (admins, anonymous users, missing rows)."""
+    field = PROFILE_FIELDS.get(getattr(user, 'role', None))
+    if field is None:
+        return None
+    try:
+        return getattr(user, field)
+    except ObjectDoesNotExist:
+        return None
+
+
+def request_profile(request):
+    """:func:`role_profile` of ``request.user``, resolved once per request."""
+    if not hasattr(request, '_role_profile'):
+        request._role_profile = role_profile(request.user)
+    return request._role_profile
@@ -0,0 +1,113 @@
+"""People search over a normalized token table.
+
+Every user gets one ``PersonSearchToken`` row per word of their first name,
+last name, username and email. Tokens are lowercased, accents and Uzbek
+apostrophes are dropped ("G'ulom" -> "gulom"), so a search term matches with
+an indexed range scan ``token >= term AND token < term + U+10FFFF`` instead of
+four ``icontains`` scans over ``users_user``.
+"""
+import re
+import unicodedata
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Max, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+from .models import PersonSearchToken, User
+
+# Names count more than the username, the email counts least
+FIELD_WEIGHTS = (
+    ('first_name', 3),
+    ('last_name', 3),
+    ('username', 2),
+    ('email', 1),
+)
+INDEXED_FIELDS = frozenset(field for field, _ in FIELD_WEIGHTS)
+
+MAX_TERMS = 5
+_PREFIX_END = '\U0010ffff'
+_APOSTROPHES = re.compile("['‘’ʻʼ`]")
+_SEPARATORS = re.compile(r'[\W_]+')
+_token_length = PersonSearchToken._meta.get_field('token').max_length
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return _APOSTROPHES.sub('', text.casefold())
+
+
+def tokenize(text):
+    return [token[:_token_length] for token in _SEPARATORS.split(normalize(text)) if token]
+
+
+def person_tokens(user):
+    """``{token: weight}`` for one user; the whole email is a token too."""
+    tokens = {}
+    for field, weight in FIELD_WEIGHTS:
+        value = getattr(user, field)
+        words = tokenize(value)
+        if field == 'email' and value:
+            words.append(normalize(value)[:_token_length])
+        for token in words:
+            tokens[token] = max(weight, tokens.get(token, 0))
+    return tokens
+
+
+def index_user(user):
+    """Replace the search tokens of ``user``."""
+    with transaction.atomic():
+        PersonSearchToken.objects.filter(user=user).delete()
+        PersonSearchToken.objects.bulk_create([
+            PersonSearchToken(user=user, token=token, weight=weight)
+            for token, weight in person_tokens(user).items()
+        ])
+
+
+def rebuild_search_index(batch_size=500):
+    """Re-tokenize every user; returns the number of tokens written."""
+    users = User.objects.only(*INDEXED_FIELDS).order_by('pk').iterator(chunk_size=batch_size)
+    written = 0
+    with transaction.atomic():
+        PersonSearchToken.objects.all().delete()
+        while True:
+            batch = [
+                PersonSearchToken(user_id=user.pk, token=token, weight=weight)
+                for user in islice(users, batch_size)
+                for token, weight in person_tokens(user).items()
+            ]
+            if not batch:
+                return written
+            PersonSearchToken.objects.bulk_create(batch)
+            written += len(batch)
+
+
+def _term_matches(term):
+    return PersonSearchToken.objects.filter(token__gte=term, token__lt=term + _PREFIX_END)
+
+
+def search_people(queryset, query, user_field=None):
+    """Filter ``queryset`` to the people matching every word of ``query``.
+
+    ``user_field`` is the path to the user from the queryset's model (e.g.
+    ``'user'`` for Student, ``None`` for User itself). Each word matches
+    tokens by prefix. Rows are annotated with ``search_rank``: per word the
+    best token weight, doubled for an exact token match, summed over the
+    words. A blank ``query`` keeps every row, with a ``search_rank`` of 0.
+    """
+    terms = tokenize(query)[:MAX_TERMS]
+    if not terms:
+        queryset = queryset.none() if (query or '').strip() else queryset
+        return queryset.annotate(search_rank=Value(0))
+
+    user_pk = f'{user_field}_id' if user_field else 'pk'
+    rank = Value(0)
+    for term in terms:
+        queryset = queryset.filter(**{f'{user_pk}__in': _term_matches(term).values('user_id')})
+        best = _term_matches(term).filter(user_id=OuterRef(user_pk)).order_by().values('user_id').annotate(
+            score=Max(Case(When(token=term, then=F('weight') * 2), default=F('weight'), output_field=IntegerField())),
+        ).values('score')
+        rank = rank + Coalesce(Subquery(best), 0)
+    return queryset.annotate(search_rank=rank)
+
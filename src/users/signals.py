@@ -0,0 +1,120 @@
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from education.models import Homework, Subject
+from exams.models import Exam, Result
+from groups.models import Group, GroupMembership, Attendance
+from payments.models import Fee
+from .models import Parent, Student, Teacher, User
+from .search import INDEXED_FIELDS, index_user
+from .snapshots import invalidate_dashboards
+from .versions import PEOPLE, touch
+
+
+def _group_teacher_id(group_id):
+    return Group.objects.filter(pk=group_id).values_list('teacher_id', flat=True).first()
+
+
+def _group_student_ids(group_id):
+    return GroupMembership.objects.filter(group_id=group_id).values_list('student_id', flat=True)
+
+
+@receiver([post_save, post_delete], sender=Attendance)
+@receiver([post_save, post_delete], sender=GroupMembership)
+def invalidate_for_group_row(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_dashboards(
+        teacher_ids=[_group_teacher_id(instance.group_id)],
+        student_ids=[instance.student_id],
+    )
+
+
+@receiver(pre_delete, sender=Group)
+def remember_group_members(sender, instance, **kwargs):
+    # The memberships are gone by post_delete
+    instance._dashboard_student_ids = list(_group_student_ids(instance.pk))
+
+
+@receiver([post_save, post_delete], sender=Group)
+def invalidate_for_group(sender, instance, signal, raw=False, **kwargs):
+    if raw:
+        return
+    # (schedule, teacher_id) before the save, kept by groups.signals; a
+    # reassigned group leaves the old teacher's dashboard as well
+    previous = getattr(instance, '_schedule_previous', None) if signal is post_save else None
+    student_ids = getattr(instance, '_dashboard_student_ids', None)
+    invalidate_dashboards(
+        teacher_ids=[instance.teacher_id, previous[1] if previous else None],
+        student_ids=_group_student_ids(instance.pk) if student_ids is None else student_ids,
+    )
+
+
+@receiver([post_save, post_delete], sender=Result)
+def invalidate_for_result(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    teacher_id = Exam.objects.filter(pk=instance.exam_id).values_list('group__teacher_id', flat=True).first()
+    invalidate_dashboards(teacher_ids=[teacher_id], student_ids=[instance.student_id])
+
+
+@receiver([post_save, post_delete], sender=Fee)
+def invalidate_for_fee(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_dashboards(student_ids=[instance.student_id])
+
+
+@receiver([post_save, post_delete], sender=Homework)
+def invalidate_for_homework(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_dashboards(
+        teacher_ids=[instance.assigned_by_id],
+        student_ids=_group_student_ids(instance.assigned_to_id),
+    )
+
+
+@receiver([post_save, post_delete], sender=Exam)
+def invalidate_for_exam(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_dashboards(
+        teacher_ids=[_group_teacher_id(instance.group_id)],
+        student_ids=_group_student_ids(instance.group_id),
+    )
+
+
+@receiver([post_save, post_delete], sender=Student)
+@receiver([post_save, post_delete], sender=Teacher)
+@receiver([post_save, post_delete], sender=Subject)
+def invalidate_admin_counters(sender, instance, raw=False, **kwargs):
+    # Only the admin KPIs count these rows
+    if not raw:
+        invalidate_dashboards()
+
+
+@receiver(post_save, sender=User)
+def index_person(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Logins save only last_login; skip saves that cannot change the tokens
+    if raw or (update_fields is not None and not INDEXED_FIELDS.intersection(update_fields)):
+        return
+    index_user(instance)
+
+
+@receiver([post_save, post_delete], sender=User)
+@receiver([post_save, post_delete], sender=Student)
+@receiver([post_save, post_delete], sender=Teacher)
+@receiver([post_save, post_delete], sender=Parent)
+def touch_people(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Logins save only last_login, which none of the people APIs show
+    if not raw and (update_fields is None or not set(update_fields) <= {'last_login'}):
+        touch(PEOPLE)
+
+
+@receiver(post_save, sender=Student)
+def stamp_student_user(sender, instance, created, raw=False, **kwargs):
+    # ?since= of the student API filters on the user's updated_at
+    if not raw and not created:
+        User.objects.filter(pk=instance.user_id).update(updated_at=timezone.now())
@@ -0,0 +1,81 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+ROLES = ('admin', 'teacher', 'student')
+
+SNAPSHOT_TIMEOUT = getattr(settings, 'DASHBOARD_SNAPSHOT_TIMEOUT', 300)
+
+
+def snapshot_key(role, profile_id=None):
+    return f"dashboard:{role}:{profile_id if profile_id is not None else 'all'}"
+
+
+def _counter_key(role, outcome):
+    return f"dashboard-stats:{role}:{outcome}"
+
+
+def _count(role, outcome):
+    key = _counter_key(role, outcome)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # First event (or evicted): incr() needs an existing key
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def get_snapshot(role, profile_id, build):
+    """Return the cached dashboard snapshot for ``role``/``profile_id``.
+
+    On a miss ``build()`` is called and its (picklable) result is stored until
+    a related write invalidates it or ``DASHBOARD_SNAPSHOT_TIMEOUT`` passes.
+    """
+    key = snapshot_key(role, profile_id)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        _count(role, 'misses')
+        snapshot = build()
+        cache.set(key, snapshot, SNAPSHOT_TIMEOUT)
+    else:
+        _count(role, 'hits')
+    return snapshot
+
+
+async def aget_snapshot(role, profile_id, build):
+    """:func:`get_snapshot` for async views; ``build`` is a coroutine function."""
+    key = snapshot_key(role, profile_id)
+    snapshot = await cache.aget(key)
+    if snapshot is None:
+        await sync_to_async(_count)(role, 'misses')
+        snapshot = await build()
+        await cache.aset(key, snapshot, SNAPSHOT_TIMEOUT)
+    else:
+        await sync_to_async(_count)(role, 'hits')
+    return snapshot
+
+
+def invalidate_dashboards(teacher_ids=(), student_ids=(), admin=True):
+    """Drop the snapshots of the given profiles once the current transaction commits."""
+    keys = [snapshot_key('teacher', pk) for pk in set(teacher_ids) if pk is not None]
+    keys += [snapshot_key('student', pk) for pk in set(student_ids) if pk is not None]
+    if admin:
+        keys.append(snapshot_key('admin'))
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def snapshot_stats():
+    """Hit/miss counters per role since the cache was last cleared."""
+    counters = cache.get_many([_counter_key(role, outcome) for role in ROLES for outcome in ('hits', 'misses')])
+    stats = {}
+    for role in ROLES:
+        hits = counters.get(_counter_key(role, 'hits'), 0)
+        misses = counters.get(_counter_key(role, 'misses'), 0)
+        stats[role] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses) * 100, 1) if hits + misses else 0,
+        }
+    return stats
@@ -0,0 +1,95 @@
+from datetime import date, timedelta
+
+from django.db.models import F, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from education.models import Subject
+from groups.models import DailyAttendanceSummary
+from payments.models import Fee
+from .models import Student, Teacher
+
+
+def month_starts(count, today=None):
+    """Return the first day of the last ``count`` calendar months, oldest first."""
+    today = today or timezone.now().date()
+    year, month = today.year, today.month
+    starts = []
+    for _ in range(count):
+        starts.append(date(year, month, 1))
+        month -= 1
+        if month == 0:
+            year, month = year - 1, 12
+    return starts[::-1]
+
+
+def dashboard_kpis(now=None):
+    """Headline counters for the admin dashboard."""
+    now = now or timezone.now()
+    thirty_days_ago = now - timedelta(days=30)
+
+    monthly_revenue = Fee.objects.filter(
+        paid_date__gte=thirty_days_ago,
+        status='paid'
+    ).aggregate(total=Sum('amount'))['total'] or 0
+
+    return {
+        'total_students': Student.objects.count(),
+        'total_teachers': Teacher.objects.count(),
+        'total_subjects': Subject.objects.count(),
+        'monthly_revenue': monthly_revenue,
+    }
+
+
+def subject_performance(limit=5):
+    """Average exam percentage for the first ``limit`` subjects, from the group performance rollup."""
+    subjects = Subject.objects.annotate(
+        result_count=Sum('group_performance__result_count'),
+        percentage_sum=Sum('group_performance__percentage_sum'),
+    ).order_by('pk')[:limit]
+
+    return {
+        'labels': [subject.name for subject in subjects],
+        'data': [
+            round(subject.percentage_sum / subject.result_count, 1) if subject.result_count else 0
+            for subject in subjects
+        ],
+    }
+
+
+def attendance_series(months=6, today=None):
+    """Monthly attendance rate for the last ``months`` months, in one grouped query
+    over the daily attendance rollup."""
+    starts = month_starts(months, today)
+
+    rows = DailyAttendanceSummary.objects.filter(
+        date__gte=starts[0]
+    ).annotate(
+        month=TruncMonth('date')
+    ).order_by().values('month').annotate(
+        total=Sum(F('present') + F('absent') + F('late') + F('excused')),
+        present_sum=Sum('present'),
+    )
+    by_month = {row['month']: row for row in rows}
+
+    rates = []
+    for start in starts:
+        row = by_month.get(start)
+        if row and row['total']:
+            rates.append(round(row['present_sum'] / row['total'] * 100, 1))
+        else:
+            rates.append(0)
+
+    return {
+        'labels': [start.strftime('%b') for start in starts],
+        'data': rates,
+    }
+
+
+def admin_dashboard_stats(now=None):
+    """KPIs and chart series for the admin dashboard in a fixed number of queries."""
+    now = now or timezone.now()
+    stats = dashboard_kpis(now)
+    stats['performance_data'] = subject_performance()
+    stats['attendance_data'] = attendance_series(today=now.date())
+    return stats
@@ -1,3 +1,558 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction
+
+from django.contrib.auth import BACKEND_SESSION_KEY
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.http import HttpResponse
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from education.models import Subject
+from exams.models import Exam, Result
+from groups.models import Group, GroupMembership, Attendance
+from payments.models import Fee
+from samo_edu_crm import fanout
+from samo_edu_crm.pagination import keyset_page
+from .dataset import DatasetSpec, build_dataset
+from .models import User, Teacher, Student, PersonSearchToken
+from .profiles import ProfileBackend, role_profile
+from .search import search_people
+from samo_edu_crm.middleware import QueryBudgetMiddleware, sql_fingerprint
+from .snapshots import snapshot_stats
+from .stats import admin_dashboard_stats, month_starts
+from .views import SEARCH_USER_ORDERING
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class AdminDashboardStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', password='pass', role='admin')
+        teacher_user = User.objects.create_user(username='teacher', password='pass', role='teacher')
+        cls.teacher = Teacher.objects.create(user=teacher_user)
+        cls.students = [
+            Student.objects.create(
+                user=User.objects.create_user(username=f'student{i}', password='pass', role='student')
+            )
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def add_subject(self, code, scores, months_back=0):
+        subject = Subject.objects.create(name=f'Subject {code}', code=code)
+        group = Group.objects.create(name=f'Group {code}', subject=subject, teacher=self.teacher, schedule={})
+        exam = Exam.objects.create(
+            name=f'Exam {code}', subject=subject, group=group,
+            date=timezone.now(), max_score=100,
+        )
+        start = month_starts(months_back + 1)[0]
+        for student, score in zip(self.students, scores):
+            GroupMembership.objects.create(student=student, group=group)
+            Result.objects.create(exam=exam, student=student, score=score)
+            Attendance.objects.create(
+                student=student, group=group, date=start,
+                status='present' if score >= 50 else 'absent', recorded_by=self.admin,
+            )
+        return subject
+
+    def test_values(self):
+        self.add_subject('A', [40, 60, 80])
+        self.add_subject('B', [100, 100, 100], months_back=2)
+
+        stats = admin_dashboard_stats()
+
+        self.assertEqual(stats['total_students'], 3)
+        self.assertEqual(stats['total_teachers'], 1)
+        self.assertEqual(stats['total_subjects'], 2)
+        self.assertEqual(stats['performance_data']['labels'], ['Subject A', 'Subject B'])
+        self.assertEqual(stats['performance_data']['data'], [60.0, 100.0])
+        self.assertEqual(len(stats['attendance_data']['data']), 6)
+        self.assertEqual(stats['attendance_data']['data'][-1], 66.7)
+        self.assertEqual(stats['attendance_data']['data'][-3], 100.0)
+        self.assertEqual(stats['attendance_data']['data'][0], 0)
+
+    def test_query_count_is_constant(self):
+        self.add_subject('A', [40, 60, 80])
+        with self.assertNumQueries(6):
+            admin_dashboard_stats()
+
+        for months_back, code in enumerate('BCDEFG'):
+            self.add_subject(code, [70, 80, 90], months_back=months_back)
+        with self.assertNumQueries(6):
+            admin_dashboard_stats()
+
+    def test_view_query_budget(self):
+        for months_back, code in enumerate('ABCDE'):
+            self.add_subject(code, [50, 60, 70], months_back=months_back)
+        self.client.force_login(self.admin)
+        # session + user, 6 for the stats and 4 for the dashboard lists
+        with self.assertNumQueries(12):
+            response = self.client.get(reverse('admin_dashboard'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_month_starts_crosses_year_boundary(self):
+        self.assertEqual(
+            month_starts(3, today=date(2025, 2, 14)),
+            [date(2024, 12, 1), date(2025, 1, 1), date(2025, 2, 1)],
+        )
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class DashboardSnapshotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', password='pass', role='admin')
+        cls.subject = Subject.objects.create(name='Math', code='M1')
+        cls.teachers = []
+        cls.groups = []
+        for i in range(2):
+            teacher = Teacher.objects.create(
+                user=User.objects.create_user(username=f'teacher{i}', password='pass', role='teacher')
+            )
+            cls.teachers.append(teacher)
+            cls.groups.append(Group.objects.create(
+                name=f'Group {i}', subject=cls.subject, teacher=teacher, schedule={}
+            ))
+        cls.student = Student.objects.create(
+            user=User.objects.create_user(username='student', password='pass', role='student')
+        )
+        GroupMembership.objects.create(student=cls.student, group=cls.groups[0])
+
+    def setUp(self):
+        cache.clear()
+
+    def get_dashboard(self, user, name):
+        self.client.force_login(user)
+        response = self.client.get(reverse(name))
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_repeat_visit_is_served_from_snapshot(self):
+        self.get_dashboard(self.teachers[0].user, 'teacher_dashboard')
+        # session, user with its profile, and today's timetable (not cached, it changes at midnight)
+        with self.assertNumQueries(3):
+            self.client.get(reverse('teacher_dashboard'))
+        self.assertEqual(snapshot_stats()['teacher'], {'hits': 1, 'misses': 1, 'hit_rate': 50.0})
+
+    def test_write_invalidates_only_affected_dashboards(self):
+        for teacher in self.teachers:
+            self.get_dashboard(teacher.user, 'teacher_dashboard')
+        self.get_dashboard(self.student.user, 'student_dashboard')
+        self.get_dashboard(self.admin, 'admin_dashboard')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Attendance.objects.create(
+                student=self.student, group=self.groups[0], date=date.today(),
+                status='present', recorded_by=self.teachers[0].user,
+            )
+
+        for user, name in ((self.teachers[0].user, 'teacher_dashboard'),
+                           (self.teachers[1].user, 'teacher_dashboard'),
+                           (self.student.user, 'student_dashboard'),
+                           (self.admin, 'admin_dashboard')):
+            self.get_dashboard(user, name)
+
+        stats = snapshot_stats()
+        self.assertEqual(stats['teacher'], {'hits': 1, 'misses': 3, 'hit_rate': 25.0})
+        self.assertEqual((stats['student']['hits'], stats['student']['misses']), (0, 2))
+        self.assertEqual((stats['admin']['hits'], stats['admin']['misses']), (0, 2))
+        response = self.get_dashboard(self.student.user, 'student_dashboard')
+        self.assertEqual(response.context['attendance_rate'], 100.0)
+
+    def test_group_changes_invalidate_old_and_new_teacher(self):
+        def visit_all():
+            for user, name in ((self.teachers[0].user, 'teacher_dashboard'),
+                               (self.teachers[1].user, 'teacher_dashboard'),
+                               (self.student.user, 'student_dashboard'),
+                               (self.admin, 'admin_dashboard')):
+                self.get_dashboard(user, name)
+
+        visit_all()
+        group = self.groups[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            group.teacher = self.teachers[1]
+            group.save()
+        visit_all()
+        stats = snapshot_stats()
+        self.assertEqual((stats['teacher']['hits'], stats['teacher']['misses']), (0, 4))
+        self.assertEqual((stats['student']['hits'], stats['student']['misses']), (0, 2))
+        self.assertEqual((stats['admin']['hits'], stats['admin']['misses']), (0, 2))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            group.delete()
+        visit_all()
+        stats = snapshot_stats()
+        # The first teacher no longer had the group
+        self.assertEqual((stats['teacher']['hits'], stats['teacher']['misses']), (1, 5))
+        self.assertEqual((stats['student']['hits'], stats['student']['misses']), (0, 3))
+        self.assertEqual((stats['admin']['hits'], stats['admin']['misses']), (0, 3))
+
+    def test_active_classes_card_counts_groups_on_days_without_lessons(self):
+        teacher = self.teachers[0]
+        self.groups[0].schedule = {'schedule': 'Mon 09:00-10:30'}
+        self.groups[0].save()
+        Group.objects.create(name='Retired', subject=self.subject, teacher=teacher, schedule={}, status='completed')
+        Group.objects.create(name='Evening', subject=self.subject, teacher=teacher, schedule={})
+
+        with mock.patch('users.views.timezone.localdate', return_value=date(2025, 3, 4)):  # a Tuesday
+            response = self.get_dashboard(teacher.user, 'teacher_dashboard')
+        self.assertEqual(response.context['today_classes'], [])
+        self.assertEqual(response.context['active_classes_count'], 2)
+
+    def test_cache_stats_api_is_admin_only(self):
+        self.client.force_login(self.student.user)
+        self.assertEqual(self.client.get(reverse('dashboard_cache_stats_api')).status_code, 403)
+        response = self.get_dashboard(self.admin, 'dashboard_cache_stats_api')
+        self.assertEqual(set(response.json()), {'admin', 'teacher', 'student'})
+
+
+@override_settings(CACHES=LOCMEM_CACHE, FANOUT_WORKERS=3)
+class DashboardFanoutTests(TransactionTestCase):
+    # Committed rows: the pool threads read through connections of their own
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='admin', password='pass', role='admin')
+        teacher = Teacher.objects.create(
+            user=User.objects.create_user(username='teacher', password='pass', role='teacher')
+        )
+        self.student = Student.objects.create(
+            user=User.objects.create_user(username='student', password='pass', role='student')
+        )
+        subject = Subject.objects.create(name='Math', code='M1')
+        group = Group.objects.create(name='Math A', subject=subject, teacher=teacher, schedule={})
+        GroupMembership.objects.create(student=self.student, group=group)
+        exam = Exam.objects.create(
+            name='Quiz', subject=subject, group=group, date=timezone.now() + timedelta(days=3), max_score=10,
+        )
+        Result.objects.create(exam=exam, student=self.student, score=7)
+        Attendance.objects.create(
+            student=self.student, group=group, date=date.today(), status='present', recorded_by=teacher.user,
+        )
+        Fee.objects.create(student=self.student, amount=100, due_date=date.today())
+
+    def get_twice(self, user, name):
+        """The dashboard built by the thread pool, then built sequentially."""
+        self.client.force_login(user)
+        concurrent = self.client.get(reverse(name))
+        cache.clear()
+        with override_settings(FANOUT_WORKERS=1):
+            sequential = self.client.get(reverse(name))
+        self.assertIn(3, fanout._executors)
+        return concurrent, sequential
+
+    def test_student_dashboard_matches_sequential_build(self):
+        concurrent, sequential = self.get_twice(self.student.user, 'student_dashboard')
+        for key in ('pending_homework', 'upcoming_exams', 'pending_payments', 'attendance_rate',
+                    'attendance_summary', 'upcoming_exams_list', 'recent_attendance', 'exam_results',
+                    'payment_history', 'student_groups', 'today_classes'):
+            self.assertEqual(concurrent.context[key], sequential.context[key], key)
+        self.assertEqual(concurrent.context['upcoming_exams'], 1)
+        # Queries of the pool threads are counted with the request's
+        self.assertEqual(concurrent['X-Query-Count'], sequential['X-Query-Count'])
+
+    def test_admin_dashboard_matches_sequential_build(self):
+        concurrent, sequential = self.get_twice(self.admin, 'admin_dashboard')
+        for key in ('total_students', 'monthly_revenue', 'performance_data', 'attendance_data',
+                    'upcoming_exams', 'todays_attendance', 'pending_payments'):
+            self.assertEqual(concurrent.context[key], sequential.context[key], key)
+        self.assertEqual(concurrent['X-Query-Count'], '12')
+
+    async def test_async_requests_are_counted(self):
+        client = AsyncClient()
+        await client.aforce_login(self.admin)
+        response = await client.get(reverse('admin_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Query-Count'], '12')
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ConditionalApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', password='pass', role='admin')
+        cls.students = [
+            Student.objects.create(user=User.objects.create_user(
+                username=f'student{i}', password='pass', role='student', first_name='Ali', last_name=f'Valiyev{i}',
+            ))
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def test_polls_get_304_until_people_change(self):
+        url = reverse('student_stats_api')
+        first = self.client.get(url)
+        self.assertEqual(first.json()['total_students'], 3)
+        self.assertIn('no-cache', first['Cache-Control'])
+        self.assertIn('Last-Modified', first)
+
+        # session and user only: the ETag comes from the cache
+        with self.assertNumQueries(2):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Student.objects.create(user=User.objects.create_user(username='new', password='pass', role='student'))
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.json()['total_students'], 4)
+
+    def test_admin_users_stats_api(self):
+        url = reverse('admin_users_stats_api')
+        first = self.client.get(url)
+        self.assertEqual(first.json()['total_students'], 3)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified']).status_code, 304)
+
+        self.client.force_login(self.students[0].user)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_student_data_api_fields_since_and_cursor(self):
+        url = reverse('student_data_api')
+        response = self.client.get(url, {'fields': 'id,avatar_text'})
+        self.assertEqual(response.json()['students'][0], {'id': self.students[0].id, 'avatar_text': 'AV'})
+        self.assertNotEqual(response['ETag'], self.client.get(url)['ETag'])
+        self.assertEqual(self.client.get(url, {'fields': 'id,password'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'since': 'yesterday'}).status_code, 400)
+
+        User.objects.filter(student_profile__in=self.students[:2]).update(
+            updated_at=timezone.now() - timedelta(days=10)
+        )
+        since = (timezone.localdate() - timedelta(days=1)).isoformat()
+        changed = self.client.get(url, {'since': since, 'fields': 'id'}).json()['students']
+        self.assertEqual(changed, [{'id': self.students[2].id}])
+
+        with mock.patch('users.views.STUDENT_API_PER_PAGE', 2):
+            first = self.client.get(url, {'fields': 'id'}).json()
+            second = self.client.get(url, {'fields': 'id', 'cursor': first['next_cursor']}).json()
+        self.assertEqual(
+            [row['id'] for row in first['students'] + second['students']], [s.id for s in self.students]
+        )
+        self.assertIsNone(second['next_cursor'])
+
+
+class UserExportTests(TestCase):
+    def test_export_uses_list_filters_and_is_admin_only(self):
+        admin = User.objects.create_user(username='admin', password='pass', role='admin')
+        User.objects.create_user(username='t1', password='pass', role='teacher', first_name='Aziz')
+        User.objects.create_user(username='s1', password='pass', role='student', is_active=False)
+
+        self.client.force_login(User.objects.get(username='s1'))
+        self.assertEqual(self.client.get(reverse('admin_users_export')).status_code, 302)
+
+        self.client.force_login(admin)
+        response = self.client.get(reverse('admin_users_export'), {'role': 'teacher'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'Username,First Name,Last Name,Email,Role,Phone,Status,Date Joined')
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[1].startswith('t1,Aziz,,,Teacher,,Active,'))
+
+
+class PersonSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        def student(username, first_name, last_name, email=''):
+            user = User.objects.create_user(
+                username=username, password='pass', role='student',
+                first_name=first_name, last_name=last_name, email=email,
+            )
+            return Student.objects.create(user=user)
+
+        cls.gulom = student('gulom01', "G'ulom", 'Karimov', 'gulom.k@mail.uz')
+        cls.karim = student('karim', 'Karim', 'Aliyev', 'k.aliyev@mail.uz')
+        cls.dilnoza = student('dilnoza', 'Dilnoza', 'Karimova')
+
+    def search(self, query):
+        return list(search_people(Student.objects.all(), query, user_field='user')
+                    .order_by('-search_rank', 'id'))
+
+    def test_prefix_terms_apostrophes_and_ranking(self):
+        self.assertEqual(self.search('gul'), [self.gulom])
+        self.assertEqual(self.search('Gʻulom'), [self.gulom])
+        self.assertEqual(self.search('gulom kari'), [self.gulom])
+        self.assertEqual(self.search('k.aliyev@mail.uz'), [self.karim])
+        # exact first name beats the surname prefixes
+        self.assertEqual(self.search('karim'), [self.karim, self.gulom, self.dilnoza])
+        self.assertEqual(len(self.search('')), 3)
+        self.assertEqual(self.search('!!'), [])
+
+    def test_index_follows_user_changes(self):
+        user = self.karim.user
+        user.first_name = 'Bobur'
+        user.save()
+        self.assertEqual(self.search('bobur'), [self.karim])
+        # 'karim' is now only the username
+        self.assertEqual(user.search_tokens.get(token='karim').weight, 2)
+
+        with self.assertNumQueries(1):
+            user.save(update_fields=['last_login'])
+
+        user.delete()
+        self.assertFalse(PersonSearchToken.objects.filter(user_id=user.pk).exists())
+
+    def test_users_page_keeps_best_matches_first(self):
+        admin = User.objects.create_user(username='admin', password='pass', role='admin')
+        self.client.force_login(admin)
+        response = self.client.get(reverse('admin_users_management'), {'search': 'karim'})
+        # Equal ranks fall back to the newest first
+        expected = [self.karim.user, self.dilnoza.user, self.gulom.user]
+        self.assertEqual(list(response.context['users']), expected)
+
+        users = search_people(User.objects.all(), 'karim')
+        page = keyset_page(users, SEARCH_USER_ORDERING, {}, per_page=1)
+        seen = list(page)
+        while page.has_next:
+            page = keyset_page(users, SEARCH_USER_ORDERING, {'cursor': page.next_cursor}, per_page=1)
+            seen.extend(page)
+        self.assertEqual(seen, expected)
+
+    def test_rebuild_command(self):
+        PersonSearchToken.objects.all().delete()
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.search('dil'), [self.dilnoza])
+
+    def test_available_students_search_view(self):
+        admin = User.objects.create_user(username='admin', password='pass', role='admin')
+        teacher = Teacher.objects.create(
+            user=User.objects.create_user(username='teacher', password='pass', role='teacher')
+        )
+        group = Group.objects.create(
+            name='G', subject=Subject.objects.create(name='Math', code='M1'), teacher=teacher, schedule={}
+        )
+        GroupMembership.objects.create(student=self.gulom, group=group)
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse('available_students_search', args=[group.id]), {'search': 'karim'},
+            headers={'x-requested-with': 'XMLHttpRequest'},
+        )
+        self.assertEqual([s['id'] for s in response.json()['students']], [self.karim.id, self.dilnoza.id])
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class RoleProfileTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = Teacher.objects.create(
+            user=User.objects.create_user(username='teacher', password='pass', role='teacher')
+        )
+        cls.student = Student.objects.create(
+            user=User.objects.create_user(username='student', password='pass', role='student')
+        )
+        cls.orphan = User.objects.create_user(username='orphan', password='pass', role='teacher')
+
+    def test_session_user_comes_with_its_profile(self):
+        with self.assertNumQueries(1):
+            user = ProfileBackend().get_user(self.teacher.user_id)
+        with self.assertNumQueries(0):
+            self.assertEqual(role_profile(user), self.teacher)
+            self.assertFalse(hasattr(user, 'student_profile'))
+            self.assertEqual(user.teacher_profile.user, user)
+        self.assertIsNone(role_profile(ProfileBackend().get_user(self.orphan.pk)))
+
+    def test_sessions_of_the_previous_backend_stay_logged_in(self):
+        self.client.force_login(self.teacher.user, backend='django.contrib.auth.backends.ModelBackend')
+        self.assertEqual(self.client.get(reverse('teacher_dashboard')).status_code, 200)
+
+        self.assertTrue(self.client.login(username='teacher', password='pass'))
+        self.assertEqual(self.client.session[BACKEND_SESSION_KEY], 'users.profiles.ProfileBackend')
+
+    @override_settings(CACHES=LOCMEM_CACHE)
+    def test_role_decorators(self):
+        url = reverse('teacher_dashboard')
+        self.assertRedirects(self.client.get(url), reverse('login'), fetch_redirect_response=False)
+
+        self.client.force_login(self.student.user)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.client.force_login(self.orphan)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        self.client.force_login(self.teacher.user)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['teacher'], self.teacher)
+
+
+class QueryBudgetMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', password='pass', role='admin')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_headers_and_budget_warning(self):
+        self.client.force_login(self.admin)
+        with override_settings(QUERY_BUDGETS={'admin_dashboard': 1}):
+            with self.assertLogs('samo_edu_crm.queries', 'WARNING') as logs:
+                response = self.client.get(reverse('admin_dashboard'))
+
+        self.assertEqual(response['X-Query-Count'], '12')
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="12 queries", total;dur=[\d.]+$')
+        self.assertIn('admin_dashboard ran 12 queries (budget 1', logs.output[0])
+
+    def test_middleware_follows_the_chain_mode(self):
+        async def async_view(request):
+            return HttpResponse()
+
+        self.assertTrue(iscoroutinefunction(QueryBudgetMiddleware(async_view)))
+        self.assertFalse(iscoroutinefunction(QueryBudgetMiddleware(lambda request: HttpResponse())))
+
+    def test_repeated_queries_are_reported_as_n_plus_one(self):
+        for i in range(6):
+            Teacher.objects.create(
+                user=User.objects.create_user(username=f'teacher{i}', password='pass', role='teacher')
+            )
+        self.client.force_login(self.admin)
+        with self.assertLogs('samo_edu_crm.queries', 'WARNING') as logs:
+            self.client.get(reverse('teachers_list'))
+        self.assertTrue(any('possible N+1' in line for line in logs.output))
+
+    def test_fingerprint_collapses_in_lists(self):
+        self.assertEqual(
+            sql_fingerprint('SELECT 1 FROM t WHERE id IN (%s, %s, %s) LIMIT 21'),
+            sql_fingerprint('SELECT 1 FROM t WHERE id IN (%s) LIMIT 5'),
+        )
+
+
+class DatasetBuilderTests(TestCase):
+    spec = dict(teachers=2, students=12, subjects=3, groups=3, attendance_days=14, seed=7, today=date(2025, 3, 3))
+
+    def test_counts_and_derived_tables(self):
+        counts = build_dataset(DatasetSpec(**self.spec))
+
+        self.assertEqual(counts['users.Student'], 12)
+        self.assertEqual(counts['groups.Group'], 3)
+        self.assertEqual(counts['groups.Attendance'], Attendance.objects.count())
+        self.assertTrue(User.objects.get(username='student00001').check_password('password123'))
+        self.assertTrue(PersonSearchToken.objects.filter(token='student00001').exists())
+
+    def test_same_seed_gives_same_data(self):
+        build_dataset(DatasetSpec(**self.spec))
+        first = list(Attendance.objects.order_by('pk').values_list('student__user__username', 'date', 'status'))
+        Attendance.objects.all().delete()
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        Subject.objects.all().delete()
+
+        build_dataset(DatasetSpec(**self.spec))
+        second = list(Attendance.objects.order_by('pk').values_list('student__user__username', 'date', 'status'))
+        self.assertEqual(first, second)
+
+    def test_seed_db_bulk_refuses_to_collide(self):
+        call_command('seed_db', bulk=True, teachers=1, students=3, subjects=1, groups=1, stdout=StringIO())
+        with self.assertRaisesMessage(CommandError, 'run with a different --prefix'):
+            call_command('seed_db', bulk=True, teachers=1, students=3, subjects=1, groups=1, stdout=StringIO())
+
+        call_command('seed_db', bulk=True, teachers=1, students=3, subjects=1, groups=1, prefix='b-', stdout=StringIO())
+        self.assertEqual(Student.objects.filter(user__username__startswith='b-student').count(), 3)
@@ -31,6 +31,7 @@ urlpatterns = [
     # API endpoints for dynamic data
     path('api/students/stats/', login_required(views.student_stats_api), name='student_stats_api'),
     path('api/students/data/', login_required(views.student_data_api), name='student_data_api'),
+    path('api/dashboard/cache-stats/', views.dashboard_cache_stats_api, name='dashboard_cache_stats_api'),
 
     # admin-teachers
     path('list/', views.teachers_list, name='teachers_list'),
@@ -40,6 +41,8 @@ urlpatterns = [
 
     # Admin Users Management
     path('users/admin/users/', login_required(admin_required(views.admin_users_management)), name='admin_users_management'),
+    path('users/admin/users/stats/', login_required(admin_required(views.admin_users_stats_api)), name='admin_users_stats_api'),
+    path('users/admin/users/export/', login_required(admin_required(views.admin_users_export)), name='admin_users_export'),
     path('users/admin/users/add/', login_required(admin_required(views.admin_add_user)), name='admin_add_user'),
     path('users/admin/users/<int:user_id>/edit/', login_required(admin_required(views.admin_edit_user)), name='admin_edit_user'),
     path('users/admin/users/<int:user_id>/delete/', login_required(admin_required(views.admin_delete_user)), name='admin_delete_user'),
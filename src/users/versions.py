@@ -0,0 +1,62 @@
+"""Change stamps behind the ETag/Last-Modified headers of the polled JSON APIs.
+
+A scope (``PEOPLE``: users and their profile rows) has a stamp in the cache,
+the time of its last change in nanoseconds. The signals in users/signals.py
+move it once a write to a row of the scope commits; bulk writes call
+:func:`touch` themselves. A missing stamp (cache cleared or evicted) restarts
+at the current time, which only costs the clients one full response.
+
+:func:`api_condition` turns the stamp into Django's ``condition`` decorator,
+so a poll whose ETag still matches gets a 304 before the view runs a query.
+"""
+import hashlib
+import time
+from datetime import datetime, time as dt_time, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+PEOPLE = 'people'
+
+
+def _key(scope):
+    return f"data-version:{scope}"
+
+
+def data_version(scope):
+    """Current stamp of ``scope``."""
+    return cache.get_or_set(_key(scope), time.time_ns, timeout=None)
+
+
+def touch(*scopes):
+    """Give ``scopes`` a new stamp once the current transaction commits."""
+    transaction.on_commit(lambda: cache.set_many({_key(scope): time.time_ns() for scope in scopes}, timeout=None))
+
+
+def api_condition(scope, daily=False):
+    """Conditional GET for a JSON API that depends only on ``scope`` and its query string.
+
+    ``daily`` APIs also count days back from today ("joined in the last 30
+    days"), so their ETag and Last-Modified move at midnight as well.
+    Responses are marked private and must be revalidated on every poll.
+    """
+    def etag(request, *args, **kwargs):
+        parts = [scope, data_version(scope), request.get_full_path()]
+        if daily:
+            parts.append(timezone.localdate().isoformat())
+        return hashlib.md5('|'.join(map(str, parts)).encode(), usedforsecurity=False).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        changed = datetime.fromtimestamp(data_version(scope) / 1e9, tz=dt_timezone.utc)
+        if daily:
+            changed = max(changed, timezone.make_aware(datetime.combine(timezone.localdate(), dt_time.min)))
+        return changed
+
+    def decorator(view_func):
+        return cache_control(private=True, no_cache=True)(
+            condition(etag_func=etag, last_modified_func=last_modified)(view_func)
+        )
+    return decorator
@@ -8,14 +8,26 @@ from payments.models import Fee
 from django.urls import reverse_lazy
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView, DetailView
 from django.utils import timezone
-from datetime import timedelta
+from django.utils.dateparse import parse_date, parse_datetime
+from datetime import datetime, timedelta
 from .models import Student, User
+from .search import search_people
+from .stats import dashboard_kpis, subject_performance, attendance_series
+from .snapshots import aget_snapshot, get_snapshot, snapshot_stats
+from .versions import PEOPLE, api_condition
+from .decorators import admin_required
+from samo_edu_crm import exports
+from samo_edu_crm.fanout import gather_parts
+from samo_edu_crm.pagination import keyset_page
+from samo_edu_crm.reports import report_view
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
 from django.db.models import Q
 from education.models import Subject
+from asgiref.sync import sync_to_async
+import asyncio
 import json
 
 from .models import Teacher, User
@@ -46,100 +58,59 @@ class CustomLoginView(LoginView):
 
 #Dashboar qismi
 
-@login_required
-def admin_dashboard(request):
-    # Get statistics
-    total_students = Student.objects.count()
-    total_teachers = Teacher.objects.count()
-    total_subjects = Subject.objects.count()
-
-    # Calculate monthly revenue (last 30 days)
-    thirty_days_ago = timezone.now() - timedelta(days=30)
-    monthly_revenue = Fee.objects.filter(
-        paid_date__gte=thirty_days_ago,
-        status='paid'
-    ).aggregate(Sum('amount'))['amount__sum'] or 0
-
-    # Get recent homework assignments
-    recent_homework = Homework.objects.select_related(
-        'subject', 'assigned_by', 'assigned_to'
-    ).order_by('-created_at')[:5]
-
-    # Get upcoming exams
-    upcoming_exams = Exam.objects.select_related(
-        'subject', 'group'
-    ).filter(date__gte=timezone.now()).order_by('date')[:5]
-
-    # Get today's attendance
-    today = timezone.now().date()
-    todays_attendance = Attendance.objects.select_related(
-        'student', 'group', 'recorded_by'
-    ).filter(date=today).order_by('group__name')[:10]
-
-    # Get pending payments
-    pending_payments = Fee.objects.select_related('student').filter(
-        status='pending'
-    ).order_by('due_date')[:10]
-
-    # Performance data for chart (real data from exam results)
-    subjects = Subject.objects.all()[:5]
-    performance_data = {
-        'labels': [subject.name for subject in subjects],
-        'data': []
-    }
+def _admin_dashboard_parts():
+    """Independent query groups of the admin dashboard snapshot (see samo_edu_crm/fanout.py)."""
+    now = timezone.now()
+    today = now.date()
+    return [
+        # KPIs
+        lambda: dashboard_kpis(now),
+        # Chart series
+        lambda: {'performance_data': subject_performance()},
+        lambda: {'attendance_data': attendance_series(today=today)},
+        # Recent homework assignments
+        lambda: {'recent_homework': list(Homework.objects.select_related(
+            'subject', 'assigned_by__user', 'assigned_to'
+        ).order_by('-created_at')[:5])},
+        # Upcoming exams
+        lambda: {'upcoming_exams': list(Exam.objects.select_related(
+            'subject', 'group'
+        ).filter(date__gte=now).order_by('date')[:5])},
+        # Today's attendance
+        lambda: {'todays_attendance': list(Attendance.objects.select_related(
+            'student__user', 'group', 'recorded_by'
+        ).filter(date=today).order_by('group__name')[:10])},
+        # Pending payments
+        lambda: {'pending_payments': list(Fee.objects.select_related('student__user').filter(
+            status='pending'
+        ).order_by('due_date')[:10])},
+    ]
 
-    for subject in subjects:
-        avg_score = Result.objects.filter(
-            exam__subject=subject
-        ).aggregate(Avg('score'))['score__avg'] or 0
-        performance_data['data'].append(round(avg_score, 1))
-
-    # Attendance data for chart (real data from attendance records)
-    months = []
-    attendance_rates = []
-
-    for i in range(5, -1, -1):
-        month_start = timezone.now().replace(day=1) - timedelta(days=30 * i)
-        month_name = month_start.strftime('%b')
-        months.append(month_name)
-
-        # Calculate attendance rate for the month
-        month_attendance = Attendance.objects.filter(
-            date__year=month_start.year,
-            date__month=month_start.month
-        )
-
-        if month_attendance.exists():
-            present_count = month_attendance.filter(status='present').count()
-            total_count = month_attendance.count()
-            rate = (present_count / total_count) * 100 if total_count > 0 else 0
-            attendance_rates.append(round(rate, 1))
-        else:
-            attendance_rates.append(0)
 
-    attendance_data = {
-        'labels': months,
-        'data': attendance_rates
-    }
+@login_required
+async def admin_dashboard(request):
+    # Snapshot is cached until a related write invalidates it (see users/signals.py);
+    # a miss runs its query groups side by side
+    snapshot = await aget_snapshot('admin', None, lambda: gather_parts(_admin_dashboard_parts()))
+    performance_data = snapshot['performance_data']
+    attendance_data = snapshot['attendance_data']
 
     context = {
-        'total_students': total_students,
-        'total_teachers': total_teachers,
-        'total_subjects': total_subjects,
-        'monthly_revenue': monthly_revenue,
-        'recent_homework': recent_homework,
-        'upcoming_exams': upcoming_exams,
-        'todays_attendance': todays_attendance,
-        'pending_payments': pending_payments,
-        'performance_data': performance_data,
-        'attendance_data': attendance_data,
+        **snapshot,
         'current_date': timezone.now().strftime("%A, %B %d, %Y"),
         'user': request.user,
         'performance_data_json': json.dumps(performance_data),
         'attendance_data_json': json.dumps(attendance_data),
     }
 
-    return render(request, 'admin/admin_dashboard.html', context)
+    return await sync_to_async(render)(request, 'admin/admin_dashboard.html', context)
+
+
+@login_required
+@admin_required
+def dashboard_cache_stats_api(request):
+    """API endpoint for dashboard snapshot cache hit/miss counters"""
+    return JsonResponse(snapshot_stats())
 
 
 
@@ -166,12 +137,8 @@ class StudentListView(ListView):
                 queryset = queryset.filter(user__is_active=False)
 
         if search_query:
-            queryset = queryset.filter(
-                Q(user__first_name__icontains=search_query) |
-                Q(user__last_name__icontains=search_query) |
-                Q(user__email__icontains=search_query) |
-                Q(user__username__icontains=search_query)
-            )
+            queryset = search_people(queryset, search_query, user_field='user')
+            return queryset.order_by('-search_rank', 'user__first_name', 'id')
 
         return queryset.order_by('user__first_name')
 
@@ -243,13 +210,14 @@ class StudentDeleteView(DeleteView):
 
 
 # API Views for dynamic data
+@api_condition(PEOPLE, daily=True)
 def student_stats_api(request):
     """API endpoint for student statistics"""
     total_students = Student.objects.count()
     active_students = Student.objects.filter(user__is_active=True).count()
 
-    # Calculate monthly growth (example)
-    last_month = timezone.now() - timedelta(days=30)
+    # Calculate monthly growth (whole days, so the figure only moves with the data or the date)
+    last_month = timezone.localdate() - timedelta(days=30)
     new_students_month = Student.objects.filter(enrollment_date__gte=last_month).count()
 
     data = {
@@ -263,25 +231,70 @@ def student_stats_api(request):
     return JsonResponse(data)
 
 
+# Fields of student_data_api: (columns to load, value)
+STUDENT_API_FIELDS = {
+    'id': ((), lambda student: student.id),
+    'name': (('user__first_name', 'user__last_name'),
+             lambda student: f"{student.user.first_name} {student.user.last_name}"),
+    'email': (('user__email',), lambda student: student.user.email),
+    'phone': (('user__phone',), lambda student: student.user.phone),
+    'enrollment_date': (('enrollment_date',), lambda student: student.enrollment_date.strftime('%b %d, %Y')),
+    'status': (('user__is_active',), lambda student: 'Active' if student.user.is_active else 'Inactive'),
+    'avatar_text': (('user__first_name', 'user__last_name'),
+                    lambda student: f"{student.user.first_name[:1]}{student.user.last_name[:1]}"),
+    'updated_at': (('user__updated_at',), lambda student: student.user.updated_at.isoformat()),
+}
+STUDENT_API_PER_PAGE = 200
+
+
+def _parse_since(value):
+    """Aware datetime from an ISO date or date-time (naive ones are local time), or ``None``."""
+    try:
+        since = parse_datetime(value)
+        if since is None and (day := parse_date(value)) is not None:
+            since = datetime.combine(day, datetime.min.time())
+    except ValueError:
+        return None
+    if since is not None and timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return since
+
+
+@api_condition(PEOPLE)
 def student_data_api(request):
-    """API endpoint for student data (AJAX)"""
-    students = Student.objects.select_related('user').all()
-
-    student_list = []
-    for student in students:
-        student_list.append({
-            'id': student.id,
-            'name': f"{student.user.first_name} {student.user.last_name}",
-            'email': student.user.email,
-            'phone': student.user.phone,
-            'enrollment_date': student.enrollment_date.strftime('%b %d, %Y'),
-            'status': 'Active' if student.user.is_active else 'Inactive',
-            'avatar_text': f"{student.user.first_name[0]}{student.user.last_name[0]}",
-        })
-
-    return JsonResponse({'students': student_list})
-
-
+    """API endpoint for student data (AJAX)
+
+    ``?fields=id,name`` picks the keys, ``?since=<ISO date/time>`` keeps the
+    students changed since then and ``?cursor=`` is the ``next_cursor`` of
+    the previous page. Pass the ``as_of`` of a full sync as the next
+    ``since``; deleted students are not reported.
+    """
+    fields = [name for name in request.GET.get('fields', '').split(',') if name] or list(STUDENT_API_FIELDS)
+    unknown = [name for name in fields if name not in STUDENT_API_FIELDS]
+    if unknown:
+        return JsonResponse({'error': f"Unknown fields: {', '.join(unknown)}"}, status=400)
+
+    as_of = timezone.now()
+    students = Student.objects.all()
+    columns = {column for name in fields for column in STUDENT_API_FIELDS[name][0]}
+    if any(column.startswith('user__') for column in columns):
+        students = students.select_related('user')
+    students = students.only('id', 'user', *columns)
+
+    since = request.GET.get('since')
+    if since:
+        since_at = _parse_since(since)
+        if since_at is None:
+            return JsonResponse({'error': 'since must be an ISO date or date-time'}, status=400)
+        students = students.filter(user__updated_at__gte=since_at)
+
+    page = keyset_page(students, ('id',), request.GET, per_page=STUDENT_API_PER_PAGE, with_total=False)
+
+    return JsonResponse({
+        'students': [{name: STUDENT_API_FIELDS[name][1](student) for name in fields} for student in page],
+        'next_cursor': page.next_cursor,
+        'as_of': as_of.isoformat(),
+    })
 
 
 # admin_teacher
@@ -436,22 +449,29 @@ from django.shortcuts import render, get_object_or_404
 from django.utils import timezone
 from django.db.models import Count, Avg, Q
 from education.models import Homework, Subject
-from exams.models import Exam, Result
+from exams.models import Exam, Result, GroupSubjectPerformance
+from exams.rollups import performance_totals
 from groups.models import Group, Attendance, GroupMembership
+from groups.schedule import classes_on
 from payments.models import Fee
 from .decorators import teacher_required
 from django.contrib.auth.decorators import login_required
 
 
-@login_required
-@teacher_required
-def teacher_dashboard(request):
-    # Get teacher profile
-    teacher = get_object_or_404(Teacher, user=request.user)
+def today_class_cards(slots):
+    """Cards of the "Today's classes" lists, one per :func:`groups.schedule.classes_on` slot."""
+    return [
+        {
+            'group': slot.group,
+            'subject': slot.group.subject,
+            'student_count': slot.student_count,
+            'slot': slot,
+        }
+        for slot in slots
+    ]
 
-    # Get current date info
-    today = timezone.now().date()
 
+def _teacher_dashboard_snapshot(teacher):
     # Get teacher's active groups
     active_groups = Group.objects.filter(teacher=teacher, status='active')
 
@@ -460,51 +480,57 @@ def teacher_dashboard(request):
         groupmembership__group__in=active_groups
     ).distinct().count()
 
-    active_classes_count = active_groups.count()
-
     # Pending assignments (homework due in future)
     pending_assignments = Homework.objects.filter(
         assigned_by=teacher,
         due_date__gte=timezone.now()
     ).count()
 
-    # Average performance (average of all exam results for teacher's groups)
-    average_performance = Result.objects.filter(
-        exam__group__teacher=teacher
-    ).aggregate(avg_score=Avg('score'))['avg_score'] or 0
-
-    # Today's classes (groups with classes scheduled today)
-    # Assuming schedule JSON has days of week - you might need to adjust this logic
-    today_classes = []
-    for group in active_groups:
-        # Basic implementation - you might need to customize based on your schedule structure
-        today_classes.append({
-            'group': group,
-            'subject': group.subject,
-            'student_count': group.students.count()
-        })
+    # Average performance (average percentage of all exam results in the teacher's groups)
+    average_performance = performance_totals(
+        GroupSubjectPerformance.objects.filter(group__teacher=teacher)
+    )['average']
 
     # Recent homework (last 5 assignments)
     recent_homeworks = Homework.objects.filter(
         assigned_by=teacher
-    ).order_by('-due_date')[:5]
+    ).select_related('subject', 'assigned_to').order_by('-due_date')[:5]
 
     # Upcoming exams (next 5 exams)
     upcoming_exams = Exam.objects.filter(
         group__teacher=teacher,
         date__gte=timezone.now()
-    ).order_by('date')[:5]
+    ).select_related('subject', 'group').order_by('date')[:5]
 
-    context = {
-        'teacher': teacher,
+    return {
         'total_students': total_students,
-        'active_classes_count': active_classes_count,
+        'active_classes_count': active_groups.count(),
         'pending_assignments': pending_assignments,
         'average_performance': round(average_performance, 1),
-        'today_classes': today_classes,
-        'recent_homeworks': recent_homeworks,
-        'upcoming_exams': upcoming_exams,
+        'recent_homeworks': list(recent_homeworks),
+        'upcoming_exams': list(upcoming_exams),
+    }
+
+
+@login_required
+@teacher_required
+def teacher_dashboard(request):
+    # Get teacher profile
+    teacher = request.profile
+
+    # Get current date info
+    today = timezone.localdate()
+
+    snapshot = get_snapshot('teacher', teacher.id, lambda: _teacher_dashboard_snapshot(teacher))
+
+    # Today's classes come from the timetable; kept out of the snapshot so they change at midnight
+    today_classes = today_class_cards(classes_on(today, teacher=teacher))
+
+    context = {
+        **snapshot,
+        'teacher': teacher,
         'today': today,
+        'today_classes': today_classes,
     }
 
     return render(request, 'teacher/teacher_dashboard.html', context)
@@ -513,7 +539,7 @@ def teacher_dashboard(request):
 @login_required
 @teacher_required
 def teacher_classes(request):
-    teacher = get_object_or_404(Teacher, user=request.user)
+    teacher = request.profile
     groups = Group.objects.filter(teacher=teacher)
     return render(request, 'teacher_classes.html', {'groups': groups})
 
@@ -521,7 +547,7 @@ def teacher_classes(request):
 @login_required
 @teacher_required
 def teacher_students(request):
-    teacher = get_object_or_404(Teacher, user=request.user)
+    teacher = request.profile
     # Get students from teacher's groups
     students = Student.objects.filter(
         groupmembership__group__teacher=teacher
@@ -532,7 +558,7 @@ def teacher_students(request):
 @login_required
 @teacher_required
 def teacher_homework(request):
-    teacher = get_object_or_404(Teacher, user=request.user)
+    teacher = request.profile
     homeworks = Homework.objects.filter(assigned_by=teacher)
     return render(request, 'teacher_homework.html', {'homeworks': homeworks})
 
@@ -540,7 +566,7 @@ def teacher_homework(request):
 @login_required
 @teacher_required
 def teacher_exams(request):
-    teacher = get_object_or_404(Teacher, user=request.user)
+    teacher = request.profile
     exams = Exam.objects.filter(group__teacher=teacher)
     return render(request, 'teacher_exams.html', {'exams': exams})
 
@@ -548,7 +574,7 @@ def teacher_exams(request):
 @login_required
 @teacher_required
 def teacher_attendance(request):
-    teacher = get_object_or_404(Teacher, user=request.user)
+    teacher = request.profile
     # Get attendance records for teacher's groups
     attendance_records = Attendance.objects.filter(
         group__teacher=teacher
@@ -561,127 +587,117 @@ from django.utils import timezone
 from django.db.models import Count, Q, Avg
 from education.models import Homework, Subject
 from exams.models import Exam, Result
-from groups.models import Group, GroupMembership, Attendance
+from groups.models import Group, GroupMembership, Attendance, MonthlyStudentAttendance
+from groups import rollups
 from payments.models import Fee
 from .decorators import student_required
 from django.http import JsonResponse
 
 
-@student_required
-def student_dashboard(request):
-    # Get the student profile for the logged-in user
-    student = get_object_or_404(Student, user=request.user)
+def _student_dashboard_parts(student):
+    """Independent query groups of a student's dashboard snapshot (see samo_edu_crm/fanout.py)."""
+    now = timezone.now()
+    # Student's active groups, as a subquery so the groups below need not wait for it
+    group_ids = Group.objects.filter(groupmembership__student=student, status='active').values('pk')
+
+    def attendance():
+        student_groups = list(Group.objects.filter(
+            groupmembership__student=student,
+            status='active'
+        ).select_related('subject').distinct())
+
+        # Attendance rate calculation (from the monthly rollup)
+        student_rollups = MonthlyStudentAttendance.objects.filter(student=student)
+        attendance_rate = rollups.attendance_rate(rollups.counter_totals(student_rollups), 1)
+
+        # Attendance summary by subject
+        group_counts = rollups.counters_by(student_rollups, 'group_id')
+        attendance_summary = []
+        for group in student_groups:
+            counts = group_counts.get(group.id, {'present': 0, 'total': 0})
+            total_classes = counts['total']
+            present_classes = counts['present']
+            attendance_percent = rollups.attendance_rate(counts, 1)
+
+            attendance_summary.append({
+                'subject': group.subject.name,
+                'group': group.name,
+                'total_classes': total_classes,
+                'present': present_classes,
+                'absent': total_classes - present_classes,
+                'attendance_percent': attendance_percent
+            })
+        return {
+            'student_groups': student_groups,
+            'attendance_rate': attendance_rate,
+            'attendance_summary': attendance_summary,
+        }
 
-    # Get student's groups
-    student_groups = Group.objects.filter(
-        groupmembership__student=student,
-        status='active'
-    ).distinct()
+    def homework():
+        # Pending homework (not due yet)
+        pending_homework = Homework.objects.filter(
+            assigned_to__in=group_ids,
+            due_date__gt=now
+        ).count()
 
-    # Calculate statistics
-    # Pending homework (not due yet)
-    pending_homework = Homework.objects.filter(
-        assigned_to__in=student_groups,
-        due_date__gt=timezone.now()
-    ).count()
+        # Homework for homework tab (recent homework is the first 10 of these)
+        homework_assignments = list(Homework.objects.filter(
+            assigned_to__in=group_ids
+        ).select_related('subject', 'assigned_by__user', 'assigned_to').order_by('-due_date'))
+        return {
+            'pending_homework': pending_homework,
+            'recent_homework': homework_assignments[:10],
+            'homework_assignments': homework_assignments,
+        }
 
-    # Upcoming exams
-    upcoming_exams = Exam.objects.filter(
-        group__in=student_groups,
-        date__gt=timezone.now()
-    ).count()
+    def exams():
+        upcoming = Exam.objects.filter(group__in=group_ids, date__gt=now)
+        return {
+            'upcoming_exams': upcoming.count(),
+            'upcoming_exams_list': list(upcoming.select_related('subject', 'group').order_by('date')[:10]),
+        }
 
-    # Pending payments
-    pending_payments = Fee.objects.filter(
-        student=student,
-        status__in=['pending', 'overdue']
-    ).count()
+    def payments():
+        # Pending payments and payment history
+        fees = Fee.objects.filter(student=student)
+        return {
+            'pending_payments': fees.filter(status__in=['pending', 'overdue']).count(),
+            'payment_history': list(fees.order_by('-due_date')),
+        }
 
-    # Attendance rate calculation
-    total_attendance = Attendance.objects.filter(student=student).count()
-    if total_attendance > 0:
-        present_count = Attendance.objects.filter(student=student, status='present').count()
-        attendance_rate = round((present_count / total_attendance) * 100, 1)
-    else:
-        attendance_rate = 0
-
-    # Recent homework (last 10 assignments)
-    recent_homework = Homework.objects.filter(
-        assigned_to__in=student_groups
-    ).order_by('-due_date')[:10]
-
-    # Upcoming exams
-    upcoming_exams_list = Exam.objects.filter(
-        group__in=student_groups,
-        date__gt=timezone.now()
-    ).order_by('date')[:10]
-
-    # Homework for homework tab
-    homework_assignments = Homework.objects.filter(
-        assigned_to__in=student_groups
-    ).order_by('-due_date')
-
-    # Attendance summary by subject
-    attendance_summary = []
-    for group in student_groups:
-        total_classes = Attendance.objects.filter(
-            student=student,
-            group=group
-        ).count()
-        present_classes = Attendance.objects.filter(
-            student=student,
-            group=group,
-            status='present'
-        ).count()
+    def recent_attendance():
+        return {'recent_attendance': list(Attendance.objects.filter(
+            student=student
+        ).select_related('group__subject', 'recorded_by').order_by('-date')[:10])}
 
-        if total_classes > 0:
-            attendance_percent = round((present_classes / total_classes) * 100, 1)
-        else:
-            attendance_percent = 0
-
-        attendance_summary.append({
-            'subject': group.subject.name,
-            'group': group.name,
-            'total_classes': total_classes,
-            'present': present_classes,
-            'absent': total_classes - present_classes,
-            'attendance_percent': attendance_percent
-        })
+    def exam_results():
+        return {'exam_results': list(Result.objects.filter(
+            student=student
+        ).select_related('exam__subject').order_by('-exam__date'))}
 
-    # Recent attendance records
-    recent_attendance = Attendance.objects.filter(
-        student=student
-    ).order_by('-date')[:10]
+    return [attendance, homework, exams, payments, recent_attendance, exam_results]
 
-    # Exam results
-    exam_results = Result.objects.filter(
-        student=student
-    ).order_by('-exam__date')
 
-    # Payment history
-    payment_history = Fee.objects.filter(
-        student=student
-    ).order_by('-due_date')
+@student_required
+async def student_dashboard(request):
+    # Get the student profile for the logged-in user
+    student = request.profile
+    today = timezone.localdate()
+
+    # Today's timetable is not cached (it changes at midnight), so it runs next to the snapshot
+    snapshot, timetable = await asyncio.gather(
+        aget_snapshot('student', student.id, lambda: gather_parts(_student_dashboard_parts(student))),
+        gather_parts([lambda: {'today_classes': today_class_cards(classes_on(today, student=student))}]),
+    )
 
     context = {
+        **snapshot,
+        **timetable,
         'student': student,
-        'pending_homework': pending_homework,
-        'upcoming_exams': upcoming_exams,
-        'pending_payments': pending_payments,
-        'attendance_rate': attendance_rate,
-        'recent_homework': recent_homework,
-        'upcoming_exams_list': upcoming_exams_list,
-        'homework_assignments': homework_assignments,
-        'attendance_summary': attendance_summary,
-        'recent_attendance': recent_attendance,
-        'exam_results': exam_results,
-        'payment_history': payment_history,
-        'student_groups': student_groups,
         'current_time': timezone.now(),
     }
 
-    return render(request, 'student/student_dashboard.html', context)
-
+    return await sync_to_async(render)(request, 'student/student_dashboard.html', context)
 
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
@@ -696,6 +712,45 @@ from datetime import timedelta
 from .decorators import admin_required
 
 
+USER_ORDERING = ('-date_joined', '-id')
+# With a search the best matches come first
+SEARCH_USER_ORDERING = ('-search_rank', *USER_ORDERING)
+
+
+def filter_users(users, params):
+    """Search/role/status filters shared by the users page and its export"""
+    search_query = params.get('search', '')
+    role_filter = params.get('role', 'all')
+    status_filter = params.get('status', 'all')
+
+    if search_query:
+        users = search_people(users, search_query)
+
+    if role_filter != 'all':
+        users = users.filter(role=role_filter)
+
+    if status_filter != 'all':
+        users = users.filter(is_active=(status_filter == 'active'))
+    return users
+
+
+def user_ordering(params):
+    """Ordering of the filtered users list: by join date, or by search rank first."""
+    return SEARCH_USER_ORDERING if params.get('search', '') else USER_ORDERING
+
+
+USER_EXPORT_COLUMNS = [
+    exports.column('Username', 'username'),
+    exports.column('First Name', 'first_name'),
+    exports.column('Last Name', 'last_name'),
+    exports.column('Email', 'email'),
+    exports.choice('Role', 'role', User.ROLE_CHOICES),
+    exports.column('Phone', 'phone'),
+    exports.column('Status', 'is_active', format=lambda active: 'Active' if active else 'Inactive'),
+    exports.column('Date Joined', 'date_joined', format=lambda value: timezone.localdate(value).isoformat()),
+]
+
+
 # Add this view to users/views.py
 @login_required
 @admin_required
@@ -706,23 +761,9 @@ def admin_users_management(request):
     role_filter = request.GET.get('role', 'all')
     status_filter = request.GET.get('status', 'all')
 
-    # Get all users
-    users = User.objects.all().order_by('-date_joined')
-
-    # Apply filters
-    if search_query:
-        users = users.filter(
-            Q(first_name__icontains=search_query) |
-            Q(last_name__icontains=search_query) |
-            Q(email__icontains=search_query) |
-            Q(username__icontains=search_query)
-        )
-
-    if role_filter != 'all':
-        users = users.filter(role=role_filter)
-
-    if status_filter != 'all':
-        users = users.filter(is_active=(status_filter == 'active'))
+    # Get all users and apply filters
+    users = filter_users(User.objects.all(), request.GET)
+    cursor_page = keyset_page(users, user_ordering(request.GET), request.GET)
 
     # Get statistics
     total_users = User.objects.count()
@@ -731,7 +772,8 @@ def admin_users_management(request):
     total_parents = Parent.objects.count()
 
     context = {
-        'users': users,
+        'users': cursor_page.object_list,
+        'cursor_page': cursor_page,
         'total_users': total_users,
         'total_students': total_students,
         'total_teachers': total_teachers,
@@ -744,6 +786,15 @@ def admin_users_management(request):
     return render(request, 'admin/admin_user.html', context)
 
 
+@login_required
+@admin_required
+@report_view
+def admin_users_export(request):
+    """Stream the filtered users list as CSV"""
+    users = filter_users(User.objects.all(), request.GET).order_by(*user_ordering(request.GET))
+    return exports.csv_response(users, USER_EXPORT_COLUMNS, 'users')
+
+
 @login_required
 @admin_required
 def admin_add_user(request):
@@ -908,15 +959,17 @@ def admin_delete_user(request, user_id):
 
 @login_required
 @admin_required
+@api_condition(PEOPLE, daily=True)
 def admin_users_stats_api(request):
     """API endpoint for user statistics"""
+    month_start = timezone.make_aware(datetime.combine(timezone.localdate() - timedelta(days=30), datetime.min.time()))
     stats = {
         'total_users': User.objects.count(),
         'total_students': Student.objects.count(),
         'total_teachers': Teacher.objects.count(),
         'total_parents': Parent.objects.count(),
         'active_users': User.objects.filter(is_active=True).count(),
-        'recent_users': User.objects.filter(date_joined__gte=timezone.now() - timedelta(days=30)).count(),
+        'recent_users': User.objects.filter(date_joined__gte=month_start).count(),
     }
 
     return JsonResponse(stats)
\ No newline at end of file